@@ -1,41 +1,50 @@
 """
 Simplified API main for local demo (minimal dependencies).
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import time
 
+import numpy as np
+
 from src.api.config import get_settings
 from src.api.deps_local import (
     check_health, 
+    encode_query,
+    get_embed_batcher,
+    get_executor,
     get_items_db, 
     get_vector_store,
     get_bm25_retriever,
     get_label_tagger,
+    warm_up,
 )
 from src.api.schemas import (
     HealthResponse, 
     SearchRequest, 
     SearchResponse, 
-    SearchResultItem, 
-    SearchTimings,
     TagRequest,
     TagResponse,
     LabelScore,
 )
-from src.core.embeddings import encode_texts
 from src.core.hybrid import combine_scores
-from src.core.normalize import normalize_text
+from src.core.normalize import normalize_cached
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize and cleanup."""
     print("Starting Menu Intelligence Suite (Local Demo)")
+    warm_up()
     health = check_health()
     print(f"Status: {health}")
+    await get_embed_batcher().start()
     yield
+    await get_embed_batcher().stop()
+    get_executor().shutdown(wait=False)
     print("Shutting down")
 
 
@@ -44,6 +53,7 @@ app = FastAPI(
     description="Multilingual semantic search for food delivery",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -70,18 +80,45 @@ async def root():
 async def health():
     """Health check endpoint."""
     health_status = check_health()
-    vector_store = get_vector_store()
     return HealthResponse(
         status=health_status["status"],
         db_connected=True,  # In-memory
         redis_connected=True,  # Mock
         model_loaded=True,  # Loaded on first use
-        vector_store_count=vector_store.count(),
+        vector_store_count=health_status["vector_count"],
     )
 
 
-@app.post("/api/search", response_model=SearchResponse)
-def search(request: SearchRequest):
+def _sparse_search(query_normalized: str) -> tuple[list, float]:
+    """Run BM25 retrieval (executes in the worker pool)."""
+    t0 = time.perf_counter()
+    bm25 = get_bm25_retriever()
+    results = bm25.search(query_normalized, k=100) if bm25 else []
+    return results, (time.perf_counter() - t0) * 1000
+
+
+async def _encode_and_search(
+    query_normalized: str,
+    k: int,
+    ef_search: int | None,
+) -> tuple[list, float, float]:
+    """Encode the query (cached, micro-batched), then run ANN search in the pool."""
+    t0 = time.perf_counter()
+    query_vector = await encode_query(query_normalized)
+    encode_ms = (time.perf_counter() - t0) * 1000
+    
+    t0 = time.perf_counter()
+    vector_store = get_vector_store()
+    results = await asyncio.get_running_loop().run_in_executor(
+        get_executor(), vector_store.search, query_vector, k, ef_search
+    )
+    dense_ms = (time.perf_counter() - t0) * 1000
+    
+    return results, encode_ms, dense_ms
+
+
+@app.post("/api/search", responses={200: {"model": SearchResponse}})
+async def search(request: SearchRequest):
     """
     Search for menu items using sparse, dense, or hybrid retrieval.
     
@@ -91,90 +128,102 @@ def search(request: SearchRequest):
     """
     start_time = time.perf_counter()
     timings = {}
+    loop = asyncio.get_running_loop()
+    pool = get_executor()
     
     # Normalize query
-    query_normalized = normalize_text(request.query, remove_diacritics=request.normalize_arabic)
+    query_normalized = normalize_cached(request.query, remove_diacritics=request.normalize_arabic)
     
     sparse_results = []
     dense_results = []
     
-    # Sparse retrieval
+    # Submit both retrieval stages up front so they overlap in the pool
+    sparse_task = None
+    dense_task = None
     if request.mode in ["sparse", "hybrid"]:
-        t0 = time.perf_counter()
+        sparse_task = loop.run_in_executor(pool, _sparse_search, query_normalized)
+    if request.mode in ["dense", "hybrid"]:
+        dense_task = asyncio.ensure_future(_encode_and_search(
+            query_normalized,
+            request.k if request.mode == "dense" else 100,
+            request.ef_search,
+        ))
+    
+    # Sparse retrieval
+    if sparse_task is not None:
         try:
-            bm25 = get_bm25_retriever()
-            if bm25:
-                sparse_results = bm25.search(query_normalized, k=100)
+            sparse_results, timings["sparse_ms"] = await sparse_task
         except Exception as e:
             print(f"Sparse search failed: {e}")
             if request.mode == "sparse":
                 raise HTTPException(status_code=500, detail="Sparse search failed")
-        timings["sparse_ms"] = (time.perf_counter() - t0) * 1000
     
     # Dense retrieval
-    if request.mode in ["dense", "hybrid"]:
-        # Encode query
-        t0 = time.perf_counter()
-        query_vector = encode_texts([query_normalized], normalize=True)[0]
-        timings["encode_ms"] = (time.perf_counter() - t0) * 1000
-        
-        # ANN search
-        t0 = time.perf_counter()
-        vector_store = get_vector_store()
-        dense_results = vector_store.search(
-            query_vector,
-            k=request.k if request.mode == "dense" else 100,
-            ef_search=request.ef_search,
-        )
-        timings["dense_ms"] = (time.perf_counter() - t0) * 1000
+    if dense_task is not None:
+        dense_results, timings["encode_ms"], timings["dense_ms"] = await dense_task
     
     # Combine results
     if request.mode == "hybrid":
         t0 = time.perf_counter()
-        combined = combine_scores(sparse_results, dense_results, alpha=request.alpha)
-        final_results = combined[:request.k]
+        final_results = combine_scores(
+            sparse_results,
+            dense_results,
+            alpha=request.alpha,
+            k=request.k,
+            fusion=request.fusion,
+        )
         timings["hybrid_ms"] = (time.perf_counter() - t0) * 1000
     elif request.mode == "sparse":
         final_results = sparse_results[:request.k]
     else:  # dense
         final_results = dense_results
     
-    # Get item details from in-memory store
+    # Get item details from the columnar store with one take per field
     items_db = get_items_db()
-    results = []
-    
-    for item_id, score in final_results:
-        if item_id in items_db:
-            item = items_db[item_id]
-            results.append(SearchResultItem(
-                item_id=item_id,
-                score=score,
-                title_en=item.get("title_en"),
-                title_ar=item.get("title_ar"),
-                outlet_name=item.get("outlet_name"),
-                city=item.get("city"),
-                price=item.get("price"),
-            ))
+    hits = [
+        (item_id, score, row)
+        for (item_id, score), row in zip(final_results, items_db.rows([i for i, _ in final_results]))
+        if row >= 0
+    ]
+    fields = items_db.take(
+        np.fromiter((row for _, _, row in hits), dtype=np.int64, count=len(hits)),
+        ["title_en", "title_ar", "outlet_name", "city", "price"],
+    )
+    
+    # Plain dicts: the response is serialized directly, without a
+    # per-request pass through the SearchResponse model
+    results = [
+        {
+            "item_id": item_id,
+            "score": score,
+            "title_en": fields["title_en"][j],
+            "title_ar": fields["title_ar"][j],
+            "outlet_name": fields["outlet_name"][j],
+            "city": fields["city"][j],
+            "price": fields["price"][j],
+        }
+        for j, (item_id, score, _) in enumerate(hits)
+    ]
     
     # Total time
     total_ms = (time.perf_counter() - start_time) * 1000
     
-    return SearchResponse(
-        results=results,
-        timings=SearchTimings(
-            encode_ms=timings.get("encode_ms", 0.0),
-            sparse_ms=timings.get("sparse_ms"),
-            dense_ms=timings.get("dense_ms"),
-            hybrid_ms=timings.get("hybrid_ms"),
-            total_ms=total_ms,
-        ),
-        query=request.query,
-        mode=request.mode,
-    )
+    return ORJSONResponse({
+        "results": results,
+        "timings": {
+            "encode_ms": timings.get("encode_ms", 0.0),
+            "sparse_ms": timings.get("sparse_ms"),
+            "dense_ms": timings.get("dense_ms"),
+            "hybrid_ms": timings.get("hybrid_ms"),
+            "total_ms": total_ms,
+        },
+        "query": request.query,
+        "mode": request.mode,
+    })
 
 
 @app.post("/api/tag", response_model=TagResponse)
-def tag(request: TagRequest):
+async def tag(request: TagRequest):
     """Auto-tag items with cuisine/diet labels."""
     items_db = get_items_db()
     
@@ -190,23 +239,22 @@ def tag(request: TagRequest):
     if not text:
         raise HTTPException(status_code=400, detail="No text to tag")
     
-    # Get tagger
-    tagger = get_label_tagger()
+    loop = asyncio.get_running_loop()
     
-    # Assign labels
-    cuisine_labels = tagger.assign_labels(
-        text, 
-        group="cuisine",
-        top_n=request.top_n,
-        threshold=request.threshold,
-    )
+    # Get tagger (first call loads the model, so keep it off the event loop)
+    tagger = await loop.run_in_executor(get_executor(), get_label_tagger)
     
-    diet_labels = tagger.assign_labels(
+    # Encode the text once and score it against every label group with one
+    # GEMV over the tagger's shared label matrix
+    text_embedding = await encode_query(normalize_cached(text))
+    results = tagger.assign_all_groups(
         text,
-        group="diet",
         top_n=request.top_n,
         threshold=request.threshold,
+        text_embedding=text_embedding,
     )
+    cuisine_labels = results.get("cuisine", [])
+    diet_labels = results.get("diet", [])
     
     # Format results
     cuisine_results = [
@@ -224,3 +272,20 @@ def tag(request: TagRequest):
         cuisine=cuisine_results,
         diet=diet_results,
     )
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    settings = get_settings()
+    
+    # Each worker process loads its own models; the FAISS index is mmapped so
+    # its pages are shared. "auto" picks uvloop/httptools when installed.
+    uvicorn.run(
+        "app_simple:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.web_concurrency,
+        loop="auto",
+        http="auto",
+    )
@@ -2,12 +2,17 @@
 Generate sample data and load into in-memory store for local demo.
 """
 import json
+import multiprocessing
+import os
 import random
 from pathlib import Path
 
+import numpy as np
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
 from src.api.deps_local import (
+    CACHE_DIR,
     set_items_db, 
     set_query_labels,
     get_vector_store,
@@ -15,7 +20,8 @@ from src.api.deps_local import (
     save_vector_store,
 )
 from src.core.embeddings import encode_texts
-from src.core.normalize import normalize_text
+from src.core.item_store import ItemTable
+from src.core.normalize import normalize_cached
 
 
 # Arabic translations
@@ -87,32 +93,41 @@ OUTLETS = [
 ]
 
 
-def generate_items(n=10000):
-    """Generate synthetic food items."""
-    items = {}
+# Items generated per worker task
+CHUNK_SIZE = 1000
+
+# Vectors buffered before the first FAISS add (index training sample)
+TRAIN_SIZE = 65536
+
+
+def _make_chunk(bounds: tuple[int, int]) -> dict:
+    """Generate items for indices [start, stop) (runs in a worker process)."""
+    start, stop = bounds
     
-    print(f"🔄 Generating {n} food items...")
+    # Fresh RNG per chunk so forked workers don't replay the same sequence
+    rng = random.Random()
+    items = {}
     
-    for i in tqdm(range(n), desc="Creating items"):
+    for i in range(start, stop):
         # Pick template
-        title_en, title_ar = random.choice(FOOD_TEMPLATES)
+        title_en, title_ar = rng.choice(FOOD_TEMPLATES)
         
         # Add variations
-        if random.random() < 0.3:
-            prefix = random.choice(["Spicy", "Grilled", "Fried", "Fresh", "Special"])
+        if rng.random() < 0.3:
+            prefix = rng.choice(["Spicy", "Grilled", "Fried", "Fresh", "Special"])
             prefix_ar = ARABIC_FOODS.get(prefix, prefix)
             title_en = f"{prefix} {title_en}"
             title_ar = f"{title_ar} {prefix_ar}"
         
         # Create item
         item_id = f"item_{i+1:06d}"
-        outlet = random.choice(OUTLETS)
-        city = random.choice(CITIES)
-        price = round(random.uniform(15, 120), 2)
+        outlet = rng.choice(OUTLETS)
+        city = rng.choice(CITIES)
+        price = round(rng.uniform(15, 120), 2)
         
         # Normalize
-        title_norm = normalize_text(f"{title_en} {title_ar}")
-        desc_norm = normalize_text(f"Delicious {title_en.lower()} from {outlet}")
+        title_norm = normalize_cached(f"{title_en} {title_ar}")
+        desc_norm = normalize_cached(f"Delicious {title_en.lower()} from {outlet}")
         
         items[item_id] = {
             "item_id": item_id,
@@ -126,16 +141,18 @@ def generate_items(n=10000):
             "desc_norm": desc_norm,
         }
     
-    # Add some near-duplicates (10%)
-    print("🔄 Adding near-duplicates...")
-    n_dupes = int(n * 0.1)
-    base_items = list(items.values())[:n_dupes]
+    return items
+
+
+def _make_dupes(base_items: list[dict], start: int) -> dict:
+    """Create near-duplicates of base_items, numbered from start."""
+    items = {}
+    variations = ["Special", "Premium", "Deluxe", "Classic", "Original"]
     
-    for i, base in enumerate(tqdm(base_items, desc="Creating duplicates")):
+    for i, base in enumerate(base_items, start=start):
         dupe_id = f"dupe_{i+1:06d}"
         
         # Slight variation
-        variations = ["Special", "Premium", "Deluxe", "Classic", "Original"]
         prefix = random.choice(variations)
         
         items[dupe_id] = {
@@ -146,13 +163,44 @@ def generate_items(n=10000):
             "title_ar": f"{prefix} {base['title_ar']}",
             "description": base["description"],
             "price": base["price"] + random.uniform(-5, 5),
-            "title_norm": normalize_text(f"{prefix} {base['title_en']} {base['title_ar']}"),
+            "title_norm": normalize_cached(f"{prefix} {base['title_en']} {base['title_ar']}"),
             "desc_norm": base["desc_norm"],
         }
     
     return items
 
 
+def generate_chunks(n=10000):
+    """
+    Generate synthetic food items chunk by chunk.
+    
+    Yields {item_id: item} dicts of up to CHUNK_SIZE items: first the n base
+    items, then near-duplicates (10%) of the first base items.
+    """
+    n_dupes = int(n * 0.1)
+    base_items = []
+    
+    # Generate chunks in parallel; imap keeps chunk order so IDs stay sequential
+    bounds = [(start, min(start + CHUNK_SIZE, n)) for start in range(0, n, CHUNK_SIZE)]
+    with multiprocessing.Pool(os.cpu_count()) as pool:
+        for chunk in pool.imap(_make_chunk, bounds):
+            if len(base_items) < n_dupes:
+                base_items.extend(list(chunk.values())[:n_dupes - len(base_items)])
+            yield chunk
+    
+    # Add some near-duplicates
+    for start in range(0, n_dupes, CHUNK_SIZE):
+        yield _make_dupes(base_items[start:start + CHUNK_SIZE], start)
+
+
+def generate_items(n=10000):
+    """Generate synthetic food items."""
+    items = {}
+    for chunk in generate_chunks(n):
+        items.update(chunk)
+    return items
+
+
 def generate_query_labels():
     """Generate labeled queries for evaluation."""
     queries = []
@@ -181,8 +229,6 @@ def generate_query_labels():
 
 def embed_items(items):
     """Generate embeddings for all items."""
-    print("\n🤖 Generating embeddings...")
-    
     texts = []
     ids = []
     for item_id, item in items.items():
@@ -190,16 +236,27 @@ def embed_items(items):
         texts.append(text)
         ids.append(item_id)
     
-    # Batch encode
-    batch_size = 100
+    # Batch encode (large batches keep the model saturated)
+    batch_size = 512
     all_embeddings = []
     
-    for i in tqdm(range(0, len(texts), batch_size), desc="Encoding batches"):
+    for i in range(0, len(texts), batch_size):
         batch = texts[i:i+batch_size]
-        embeddings = encode_texts(batch, normalize=True)
-        all_embeddings.extend(embeddings)
+        embeddings = encode_texts(batch, normalize=True, batch_size=batch_size)
+        all_embeddings.append(embeddings)
     
-    return ids, all_embeddings
+    return ids, np.vstack(all_embeddings)
+
+
+def _flush_vectors(vector_store, pending: list):
+    """Add buffered (ids, embeddings, metadata) chunks to the store in one call."""
+    if not pending:
+        return
+    ids = [item_id for chunk_ids, _, _ in pending for item_id in chunk_ids]
+    embeddings = np.vstack([chunk_embeddings for _, chunk_embeddings, _ in pending])
+    metadata = [meta for _, _, chunk_meta in pending for meta in chunk_meta]
+    vector_store.add(ids, embeddings, metadata)
+    pending.clear()
 
 
 def main():
@@ -208,27 +265,49 @@ def main():
     print("📦 Menu Intelligence Suite - Data Generator")
     print("=" * 60)
     
-    # Generate items
-    items = generate_items(n=10000)
-    print(f"✓ Generated {len(items)} items")
-    
-    # Generate embeddings
-    ids, embeddings = embed_items(items)
+    n = 10000
+    n_chunks = -(-n // CHUNK_SIZE) + -(-int(n * 0.1) // CHUNK_SIZE)
     
-    # Load into vector store
-    print("\n🔄 Loading into vector store...")
+    # Rebuild from scratch (a previously saved index is loaded read-only)
     vector_store = get_vector_store()
+    vector_store.clear()
     
-    # Prepare metadata
-    metadata = [{"city": items[item_id]["city"]} for item_id in ids]
+    # Stream chunks: generate -> embed -> add to FAISS -> append to Parquet.
+    # Only the first TRAIN_SIZE vectors are held back, so IVF/PQ training
+    # sees a broad sample rather than a single chunk.
+    print(f"🔄 Generating and embedding {n} food items (+10% near-duplicates)...")
+    items_path = CACHE_DIR / "items.parquet"
+    writer = None
+    pending = []
+    n_items = 0
     
-    vector_store.add(ids, embeddings, metadata)
-    print(f"✓ Added {len(ids)} vectors to FAISS")
+    for chunk in tqdm(generate_chunks(n), total=n_chunks, desc="Chunks"):
+        ids, embeddings = embed_items(chunk)
+        metadata = [{"city": chunk[item_id]["city"]} for item_id in ids]
+        
+        if vector_store.count() == 0:
+            pending.append((ids, embeddings, metadata))
+            if sum(len(p[0]) for p in pending) >= TRAIN_SIZE:
+                _flush_vectors(vector_store, pending)
+        else:
+            vector_store.add(ids, embeddings, metadata)
+        
+        table = ItemTable.from_items(chunk).table
+        if writer is None:
+            writer = pq.ParquetWriter(items_path, table.schema)
+        writer.write_table(table)
+        n_items += len(chunk)
+    
+    _flush_vectors(vector_store, pending)
+    writer.close()
+    print(f"✓ Generated {n_items} items")
+    print(f"✓ Added {vector_store.count()} vectors to FAISS")
     
     # Save vector store
     save_vector_store()
     
-    # Set items in memory
+    # Load items back from Parquet (memory-mapped)
+    items = ItemTable.read_parquet(items_path)
     set_items_db(items)
     print(f"✓ Loaded {len(items)} items into memory")
     
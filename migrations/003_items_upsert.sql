@@ -0,0 +1,54 @@
+-- Natural key for menu items, used by bulk ingest (INSERT ... ON CONFLICT)
+
+BEGIN;
+
+-- Map every older (outlet_id, title_en) duplicate onto the most recent row
+CREATE TEMP TABLE item_merge ON COMMIT DROP AS
+SELECT a.item_id AS old_id, MAX(b.item_id) AS new_id
+FROM items a
+JOIN items b
+  ON a.outlet_id = b.outlet_id
+ AND a.title_en = b.title_en
+ AND a.item_id < b.item_id
+GROUP BY a.item_id;
+
+-- Re-point dependent rows to the surviving item before deleting duplicates.
+-- Where the survivor already has an equivalent row, the old one is dropped.
+DELETE FROM dedup_clusters c
+USING item_merge m
+WHERE c.item_id = m.old_id
+  AND EXISTS (SELECT 1 FROM dedup_clusters s WHERE s.item_id = m.new_id);
+
+UPDATE dedup_clusters c
+SET item_id = m.new_id
+FROM item_merge m
+WHERE c.item_id = m.old_id;
+
+DELETE FROM user_interactions u
+USING item_merge m
+WHERE u.item_id = m.old_id
+  AND EXISTS (
+      SELECT 1 FROM user_interactions s
+      WHERE s.item_id = m.new_id
+        AND s.user_id = u.user_id
+        AND s.timestamp IS NOT DISTINCT FROM u.timestamp
+  );
+
+UPDATE user_interactions u
+SET item_id = m.new_id
+FROM item_merge m
+WHERE u.item_id = m.old_id;
+
+-- dedup_pairs is recomputed by the dedup job; drop pairs on removed items
+DELETE FROM dedup_pairs p
+USING item_merge m
+WHERE p.a = m.old_id OR p.b = m.old_id;
+
+DELETE FROM items i
+USING item_merge m
+WHERE i.item_id = m.old_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_outlet_title
+ON items(outlet_id, title_en);
+
+COMMIT;
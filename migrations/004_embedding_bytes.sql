@@ -0,0 +1,5 @@
+-- Raw little-endian float32 copy of each embedding, so bulk readers
+-- (recommender, dedup) can np.frombuffer rows instead of parsing vectors.
+-- Written by ingest, the embed worker and PgVectorStore.add; rows embedded before this
+-- migration fall back to the vector column until they are re-embedded.
+ALTER TABLE items ADD COLUMN IF NOT EXISTS embedding_bytes BYTEA;
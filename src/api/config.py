@@ -27,16 +27,25 @@ class Settings(BaseSettings):
     
     # Vector Store
     vector_backend: str = "pgvector"  # or "faiss"
+    faiss_index_type: str = "HNSW"  # HNSW, Flat, IVFFlat, IVFSQ, IVFSQ8, SQ8 or IVFPQ
     ann_lists: int = 100
     ef_search: int = 50
     
     # Hybrid Search
     hybrid_alpha: float = 0.4
     
+    # Query embedding cache
+    enable_query_cache: bool = True
+    query_cache_size: int = 4096
+    
+    # On-disk caches (recommender embeddings)
+    cache_dir: str = "data/cache"
+    
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     log_level: str = "INFO"
+    web_concurrency: int = 1  # uvicorn worker processes
     
     # Workers
     worker_concurrency: int = 2
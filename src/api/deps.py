@@ -1,5 +1,8 @@
 """Dependency injection for FastAPI."""
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 import redis
@@ -7,17 +10,30 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session, sessionmaker
 
 from src.api.config import get_settings
+from src.api.logging_conf import get_logger
+from src.core.debounce import Debouncer
+from src.core.embed_batcher import EmbedBatcher
 from src.core.embeddings import get_model
 from src.core.sparse import BM25Retriever
 from src.core.tagging import LabelTagger
 from src.core.vector_store import PgVectorStore, FAISSVectorStore
 
 settings = get_settings()
+logger = get_logger(__name__)
 
 # Database engine
-engine = create_engine(settings.db_url, pool_pre_ping=True)
+engine = create_engine(settings.db_url, pool_pre_ping=True, query_cache_size=1200)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_SPARSE_CORPUS_SQL = text("""
+    SELECT item_id, title_norm || ' ' || COALESCE(desc_norm, '')
+    FROM items
+    WHERE title_norm IS NOT NULL
+    ORDER BY item_id
+""")
+
+_PING_SQL = text("SELECT 1")
+
 
 def get_db():
     """Get database session."""
@@ -40,11 +56,35 @@ def get_vector_store():
     if settings.vector_backend == "pgvector":
         return PgVectorStore(dimension=settings.embedding_dim)
     elif settings.vector_backend == "faiss":
-        return FAISSVectorStore(dimension=settings.embedding_dim)
+        return FAISSVectorStore(
+            dimension=settings.embedding_dim,
+            index_type=settings.faiss_index_type,
+        )
     else:
         raise ValueError(f"Unknown vector backend: {settings.vector_backend}")
 
 
+@lru_cache
+def get_executor() -> ThreadPoolExecutor:
+    """Get shared thread pool for CPU-bound encoding, BM25 and ANN work."""
+    return ThreadPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        thread_name_prefix="mis-cpu",
+    )
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run a CPU-bound call on the shared executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+@lru_cache
+def get_embed_batcher() -> EmbedBatcher:
+    """Get query-encoding micro-batcher."""
+    return EmbedBatcher(executor=get_executor())
+
+
 @lru_cache
 def get_bm25_retriever():
     """Get BM25 retriever (lazy loaded)."""
@@ -55,11 +95,12 @@ def get_bm25_retriever():
 def get_label_tagger():
     """Get label tagger."""
     labels_path = os.path.join("src", "data", "seed", "labels.json")
+    cache_path = os.path.join(get_settings().cache_dir, "label_embeddings.npz")
     if os.path.exists(labels_path):
-        return LabelTagger(labels_path)
+        return LabelTagger(labels_path, cache_path=cache_path)
     else:
         # Create default labels
-        tagger = LabelTagger()
+        tagger = LabelTagger(cache_path=cache_path)
         tagger.set_labels("cuisine", [
             "Lebanese", "Saudi", "Turkish", "Indian", "Italian",
             "Seafood", "Dessert", "Fast Food", "Asian", "Mexican"
@@ -76,14 +117,7 @@ def build_sparse_index(db: Session):
     retriever = get_bm25_retriever()
     
     # Get all items with normalized text
-    query = text("""
-        SELECT item_id, title_norm || ' ' || COALESCE(desc_norm, '')
-        FROM items
-        WHERE title_norm IS NOT NULL
-        ORDER BY item_id
-    """)
-    
-    results = db.execute(query).fetchall()
+    results = db.execute(_SPARSE_CORPUS_SQL).fetchall()
     
     if not results:
         return
@@ -96,11 +130,38 @@ def build_sparse_index(db: Session):
     return len(ids)
 
 
+def _rebuild_sparse_index():
+    """Rebuild the BM25 index on its own session (runs on the debouncer thread)."""
+    with Session(engine) as db:
+        try:
+            count = build_sparse_index(db)
+        except Exception:
+            logger.exception("BM25 index rebuild failed")
+            raise
+    logger.info(f"BM25 index rebuilt with {count} items")
+
+
+@lru_cache
+def get_sparse_rebuilder() -> Debouncer:
+    """Get debounced BM25 index rebuilder."""
+    return Debouncer(_rebuild_sparse_index)
+
+
+def schedule_sparse_rebuild() -> int:
+    """
+    Schedule a debounced BM25 index rebuild.
+    
+    Returns:
+        Index version that will include all committed items
+    """
+    return get_sparse_rebuilder().trigger()
+
+
 def check_db_health() -> bool:
     """Check database connectivity."""
     try:
         with Session(engine) as session:
-            session.execute(text("SELECT 1"))
+            session.execute(_PING_SQL)
             return True
     except Exception:
         return False
@@ -1,35 +1,64 @@
 """
 Simplified dependencies for local demo (no DB, no Redis).
 """
-import pickle
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from functools import lru_cache
 from typing import Optional
 
-from src.core.embeddings import get_model
-from src.core.sparse import BM25Retriever
+import numpy as np
+
+from src.core.embed_batcher import EmbedBatcher
+from src.core.embeddings import encode_texts
+from src.core.hybrid import combine_scores
+from src.core.item_store import ItemTable
+from src.core.sparse import BM25Index, BM25Retriever
 from src.core.vector_store.faiss_store import FAISSVectorStore
 from src.core.tagging import LabelTagger
 from src.api.config import get_settings
 
 # In-memory data store
-_items_db = {}
+_items_db: ItemTable | None = None
 _query_labels = []
 
+# Warm state reported by check_health (set by warm_up and the setters)
+_READY = {"items": False, "vector": False, "bm25": False}
+
+# Normalized query -> embedding (LRU order)
+_query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
 # Cache directory
 CACHE_DIR = Path("data/cache")
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def get_items_db():
-    """Get in-memory items database."""
+def get_items_db() -> ItemTable:
+    """Get in-memory items database (loaded from Parquet on first use)."""
+    global _items_db
+    if _items_db is None:
+        items_path = CACHE_DIR / "items.parquet"
+        if items_path.exists():
+            _items_db = ItemTable.read_parquet(items_path)
+            print(f"[OK] Loaded {len(_items_db)} items")
+        else:
+            _items_db = ItemTable()
     return _items_db
 
 
 def set_items_db(items):
-    """Set in-memory items database."""
+    """Set in-memory items database from an ItemTable or {item_id: item} dict."""
     global _items_db
-    _items_db = items
+    _items_db = items if isinstance(items, ItemTable) else ItemTable.from_items(items)
+    _READY["items"] = True
+
+
+def save_items_db():
+    """Save items database to disk as Parquet."""
+    items = get_items_db()
+    items.write_parquet(CACHE_DIR / "items.parquet")
+    print(f"[OK] Saved {len(items)} items")
 
 
 def get_query_labels():
@@ -43,26 +72,62 @@ def set_query_labels(labels):
     _query_labels = labels
 
 
+@lru_cache()
+def get_executor() -> ThreadPoolExecutor:
+    """Get shared thread pool for CPU-bound search and tagging work."""
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.worker_concurrency,
+        thread_name_prefix="mis-cpu",
+    )
+
+
+@lru_cache()
+def get_embed_batcher() -> EmbedBatcher:
+    """Get shared micro-batcher for query encoding."""
+    return EmbedBatcher(executor=get_executor())
+
+
+async def encode_query(text: str) -> np.ndarray:
+    """Encode a normalized query, serving repeated queries from an LRU cache."""
+    settings = get_settings()
+    
+    if settings.enable_query_cache:
+        cached = _query_cache.get(text)
+        if cached is not None:
+            _query_cache.move_to_end(text)
+            return cached
+    
+    vector = await get_embed_batcher().submit(text)
+    
+    if settings.enable_query_cache:
+        # Copy out of the batch array and freeze, since entries are shared
+        vector = vector.copy()
+        vector.setflags(write=False)
+        _query_cache[text] = vector
+        if len(_query_cache) > settings.query_cache_size:
+            _query_cache.popitem(last=False)
+    
+    return vector
+
+
 @lru_cache()
 def get_vector_store() -> FAISSVectorStore:
     """Get cached FAISS vector store."""
     settings = get_settings()
     store = FAISSVectorStore(
         dimension=settings.embedding_dim,
-        index_type="IVFFlat",
+        index_type=settings.faiss_index_type,
     )
     
     # Try to load from disk
     index_path = CACHE_DIR / "faiss_index.idx"
-    meta_path = CACHE_DIR / "faiss_metadata.pkl"
+    meta_path = CACHE_DIR / "faiss_metadata"
     if index_path.exists():
         try:
-            store.load(str(index_path))
-            if meta_path.exists():
-                with open(meta_path, "rb") as f:
-                    data = pickle.load(f)
-                    store.id_map = data["id_map"]
-                    store.metadata = data.get("metadata", [])
+            store.load(str(index_path), mmap=True)
+            if (meta_path / "ids.npy").exists():
+                store.load_metadata(meta_path)
             print(f"[OK] Loaded FAISS index with {store.count()} vectors")
         except Exception as e:
             print(f"Warning: Could not load index: {e}")
@@ -71,14 +136,13 @@ def get_vector_store() -> FAISSVectorStore:
 
 
 @lru_cache()
-def get_bm25_retriever() -> Optional[BM25Retriever]:
-    """Get cached BM25 retriever."""
-    retriever_path = CACHE_DIR / "bm25_retriever.pkl"
-    if retriever_path.exists():
+def get_bm25_retriever() -> Optional[BM25Index]:
+    """Get cached BM25 index (memory-mapped from disk when available)."""
+    index_path = CACHE_DIR / "bm25"
+    if (index_path / "indptr.npy").exists():
         try:
-            with open(retriever_path, "rb") as f:
-                retriever = pickle.load(f)
-            print(f"[OK] Loaded BM25 index with {len(retriever.corpus)} documents")
+            retriever = BM25Index.load(index_path)
+            print(f"[OK] Loaded BM25 index with {len(retriever.corpus_ids)} documents")
             return retriever
         except Exception as e:
             print(f"Warning: Could not load BM25: {e}")
@@ -86,28 +150,15 @@ def get_bm25_retriever() -> Optional[BM25Retriever]:
     # Build from items
     items = get_items_db()
     if items:
-        corpus = []
-        ids = []
-        for item_id, item in items.items():
-            text = f"{item.get('title_norm', '')} {item.get('desc_norm', '')}"
-            corpus.append(text)
-            ids.append(item_id)
-        
-        retriever = BM25Retriever()
-        retriever.fit(corpus, ids)
-        
-        # Save for next time
-        with open(retriever_path, "wb") as f:
-            pickle.dump(retriever, f)
-        
-        print(f"[OK] Built BM25 index with {len(corpus)} documents")
+        retriever = _fit_sparse_index(items)
+        print(f"[OK] Built BM25 index with {len(retriever.corpus_ids)} documents")
         return retriever
     
     return None
 
 
-def build_sparse_index(items: dict):
-    """Build BM25 index from items."""
+def _fit_sparse_index(items: dict) -> BM25Index:
+    """Fit BM25 on items and persist it as a memory-mappable index."""
     corpus = []
     ids = []
     for item_id, item in items.items():
@@ -118,24 +169,30 @@ def build_sparse_index(items: dict):
     retriever = BM25Retriever()
     retriever.fit(corpus, ids)
     
-    # Save to disk
-    retriever_path = CACHE_DIR / "bm25_retriever.pkl"
-    with open(retriever_path, "wb") as f:
-        pickle.dump(retriever, f)
+    # Save to disk as SoA arrays
+    index = BM25Index.from_retriever(retriever)
+    index.save(CACHE_DIR / "bm25")
+    
+    return index
+
+
+def build_sparse_index(items: dict):
+    """Build BM25 index from items."""
+    index = _fit_sparse_index(items)
     
     # Clear cache to reload
     get_bm25_retriever.cache_clear()
+    _READY["bm25"] = True
     
-    return retriever
+    return index
 
 
 @lru_cache()
 def get_label_tagger() -> LabelTagger:
-    """Get cached label tagger."""
-    model = get_model()
-    tagger = LabelTagger(model)
+    """Get cached label tagger with label embeddings precomputed."""
+    tagger = LabelTagger(cache_path=Path(get_settings().cache_dir) / "label_embeddings.npz")
     
-    # Load default labels
+    # Load default labels (encoded together on first use; warm_up triggers it)
     labels_path = Path("src/data/labels.json")
     if labels_path.exists():
         tagger.load_labels(str(labels_path))
@@ -148,25 +205,61 @@ def save_vector_store():
     """Save FAISS index to disk."""
     store = get_vector_store()
     index_path = CACHE_DIR / "faiss_index.idx"
-    meta_path = CACHE_DIR / "faiss_metadata.pkl"
+    meta_path = CACHE_DIR / "faiss_metadata"
     
     store.save(str(index_path))
     
     # Save metadata separately
-    with open(meta_path, "wb") as f:
-        pickle.dump({
-            "id_map": store.id_map,
-            "metadata": store.metadata,
-        }, f)
+    store.save_metadata(meta_path)
     
     print(f"[OK] Saved FAISS index with {store.count()} vectors")
 
 
+def warm_up():
+    """
+    Load data and warm the hot path (call once at startup).
+    
+    Loads items, the vector store and the BM25 index, then runs each search
+    stage and the tagger once so numba compilation, model loading, label
+    encoding and index page faults happen here rather than on the first
+    request.
+    """
+    start = time.perf_counter()
+    
+    get_items_db()
+    _READY["items"] = True
+    store = get_vector_store()
+    _READY["vector"] = True
+    bm25 = get_bm25_retriever()
+    _READY["bm25"] = bm25 is not None
+    
+    steps = [
+        ("fusion", lambda: combine_scores([(0, 1.0)], [(0, 1.0)], k=1)),
+        ("rrf", lambda: combine_scores([(0, 1.0)], [(0, 1.0)], k=1, fusion="rrf")),
+        ("bm25", lambda: bm25.search("warmup", k=1) if bm25 is not None else None),
+        ("faiss", lambda: store.search(np.zeros(store.dimension, dtype=np.float32), k=1)),
+        ("model", lambda: encode_texts(["warmup"], normalize=True)),
+        ("tagger", lambda: get_label_tagger().assign_all_groups("warmup")),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"Warning: {name} warm-up failed: {e}")
+    
+    print(f"[OK] Warm-up took {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
 def check_health() -> dict:
-    """Check system health."""
+    """
+    Check system health.
+    
+    Only reads state that is already loaded, so it never triggers an index
+    load or BM25 fit from a health probe.
+    """
     return {
-        "status": "healthy",
-        "items_count": len(get_items_db()),
-        "vector_count": get_vector_store().count(),
-        "bm25_ready": get_bm25_retriever() is not None,
+        "status": "healthy" if _READY["items"] and _READY["vector"] else "starting",
+        "items_count": len(_items_db) if _items_db is not None else 0,
+        "vector_count": get_vector_store().count() if _READY["vector"] else 0,
+        "bm25_ready": _READY["bm25"],
     }
@@ -1,14 +1,20 @@
 """Logging configuration for MIS API."""
-import json
 import logging
+import queue
 import sys
 import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
+import orjson
+
 from src.api.config import get_settings
 
 settings = get_settings()
 
+# Background thread that formats and writes queued records
+_listener: QueueListener | None = None
+
 
 class JSONFormatter(logging.Formatter):
     """Format logs as JSON."""
@@ -32,18 +38,35 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
         
-        return json.dumps(log_data)
+        return orjson.dumps(log_data, default=str).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted so formatting happens on the listener thread."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logging():
     """Configure application logging."""
-    # Create handler
+    global _listener
+    
+    # Create handler (runs on the listener thread, off the request path)
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(JSONFormatter())
     
+    # Request code only enqueues records
+    log_queue: queue.Queue = queue.Queue(-1)
+    
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    
     # Configure root logger
     logging.root.handlers = []
-    logging.root.addHandler(handler)
+    logging.root.addHandler(_DeferredQueueHandler(log_queue))
     logging.root.setLevel(getattr(logging, settings.log_level.upper()))
     
     # Quiet down noisy libraries
@@ -51,6 +74,15 @@ def setup_logging():
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance."""
     return logging.getLogger(name)
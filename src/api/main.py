@@ -6,7 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.api import deps
 from src.api.config import get_settings
-from src.api.logging_conf import setup_logging, get_logger
+from src.api.logging_conf import setup_logging, shutdown_logging, get_logger
 from src.api.routers import dedup, ingest, metrics, recommend, search, tagging
 
 settings = get_settings()
@@ -30,10 +30,25 @@ async def lifespan(app: FastAPI):
     redis_ok = deps.check_redis_health()
     logger.info(f"Database: {'OK' if db_ok else 'FAIL'}, Redis: {'OK' if redis_ok else 'FAIL'}")
     
+    # Start query-encoding batcher
+    await deps.get_embed_batcher().start()
+    
+    # Preload the recommender corpus so the first request doesn't pay for it
+    if db_ok:
+        try:
+            with deps.SessionLocal() as db:
+                recommend.get_recommender(db)
+            logger.info("Recommender loaded")
+        except Exception as e:
+            logger.warning(f"Recommender preload failed: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down API")
+    await deps.get_embed_batcher().stop()
+    deps.get_sparse_rebuilder().stop(timeout=30)
+    shutdown_logging()
 
 
 # Create FastAPI app
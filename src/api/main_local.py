@@ -4,9 +4,10 @@ Simplified API main for local demo (no database).
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.api.config import get_settings
-from src.api.deps_local import check_health, get_items_db
+from src.api.deps_local import check_health, get_embed_batcher, get_executor, get_items_db, warm_up
 from src.api.schemas import HealthResponse
 
 # Import routers
@@ -18,9 +19,13 @@ from src.api.routers import tagging, dedup, recommend, ingest, metrics
 async def lifespan(app: FastAPI):
     """Initialize and cleanup."""
     print("🚀 Starting Menu Intelligence Suite (Local Demo)")
+    warm_up()
     health = check_health()
     print(f"📊 Status: {health}")
+    await get_embed_batcher().start()
     yield
+    await get_embed_batcher().stop()
+    get_executor().shutdown(wait=False)
     print("👋 Shutting down")
 
 
@@ -29,6 +34,7 @@ app = FastAPI(
     description="Multilingual semantic search for food delivery",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -65,7 +71,8 @@ async def health():
     health_status = check_health()
     return HealthResponse(
         status=health_status["status"],
-        database_connected=True,  # In-memory
+        db_connected=True,  # In-memory
         redis_connected=True,  # Mock
-        vector_store_ready=health_status["vector_count"] > 0,
+        model_loaded=True,  # Loaded on first use
+        vector_store_count=health_status["vector_count"],
     )
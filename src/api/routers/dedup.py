@@ -1,17 +1,75 @@
 """Deduplication router - find duplicate menu items."""
 import numpy as np
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
+from sqlalchemy import column, insert, table, text
 from sqlalchemy.orm import Session
 
 from src.api import deps
 from src.api.logging_conf import get_logger
 from src.api.schemas import DedupCluster, DedupClusterRequest, DedupClusterResponse, DedupStats
 from src.core.dedup import deduplicate_items
+from src.core.embeddings import embedding_from_row
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# A NULL :city matches every city; the vector column is only fetched for
+# rows without raw bytes
+_DEDUP_ITEMS_SQL = text("""
+    SELECT item_id, city, embedding_bytes, CASE WHEN embedding_bytes IS NULL THEN embedding END
+    FROM items
+    WHERE embedding IS NOT NULL
+      AND (CAST(:city AS text) IS NULL OR city = :city)
+    ORDER BY item_id
+""")
+
+_DEDUP_COUNT_SQL = text("""
+    SELECT count(*)
+    FROM items
+    WHERE embedding IS NOT NULL
+      AND (CAST(:city AS text) IS NULL OR city = :city)
+""")
+
+_DELETE_CLUSTERS_SQL = text("DELETE FROM dedup_clusters WHERE item_id = ANY(:ids)")
+
+DEDUP_CLUSTERS = table("dedup_clusters", column("item_id"), column("cluster_id"))
+
+# Rows per multi-row INSERT statement
+INSERT_BATCH = 1000
+
+# Rows per server-side cursor fetch when loading embeddings
+STREAM_ROWS = 10_000
+
+
+def _load_items(db: Session, city: str | None) -> tuple[list, np.ndarray, list]:
+    """
+    Stream item IDs, embeddings and cities into preallocated arrays.
+    
+    Rows arrive through a server-side cursor in STREAM_ROWS chunks, so the
+    full result set is never held as Python rows next to the array.
+    
+    Returns:
+        Tuple of (item_ids, embeddings (N x D), cities)
+    """
+    params = {"city": city}
+    count = db.execute(_DEDUP_COUNT_SQL, params).scalar() or 0
+    
+    item_ids = []
+    cities = []
+    embeddings = np.empty((count, deps.settings.embedding_dim), dtype=np.float32)
+    
+    result = db.execute(_DEDUP_ITEMS_SQL, params, execution_options={"yield_per": STREAM_ROWS})
+    for rows in result.partitions():
+        rows = rows[:count - len(item_ids)]
+        for i, row in enumerate(rows, start=len(item_ids)):
+            embeddings[i] = embedding_from_row(row[2], row[3])
+        item_ids.extend(row[0] for row in rows)
+        cities.extend(row[1] for row in rows)
+        if len(item_ids) == count:
+            break
+    
+    return item_ids, embeddings[:len(item_ids)], cities
+
 
 @router.post("/cluster", response_model=DedupClusterResponse)
 def cluster_duplicates(
@@ -24,47 +82,26 @@ def cluster_duplicates(
     Optionally filter by city to reduce comparisons.
     Uses cosine similarity on item embeddings.
     """
-    # Build query
-    where_clause = ""
-    params = {"sim_thresh": request.sim_threshold}
-    
-    if request.city:
-        where_clause = "WHERE city = :city"
-        params["city"] = request.city
-    
     # Fetch items with embeddings
-    query = text(f"""
-        SELECT item_id, embedding, city
-        FROM items
-        {where_clause}
-        AND embedding IS NOT NULL
-        ORDER BY item_id
-    """)
-    
-    rows = db.execute(query, params).fetchall()
+    item_ids, embeddings, cities = _load_items(db, request.city or None)
     
-    if len(rows) < 2:
+    if len(item_ids) < 2:
         return DedupClusterResponse(
             clusters=[],
             stats=DedupStats(
-                total_items=len(rows),
+                total_items=len(item_ids),
                 num_clusters=0,
                 num_duplicates=0,
                 pairs_compared=0,
             ),
         )
     
-    # Extract data
-    item_ids = [row[0] for row in rows]
-    embeddings = np.array([row[1] for row in rows], dtype=np.float32)
-    cities = [row[2] for row in rows] if request.city is None else None
-    
-    # Run deduplication
+    # Run deduplication (block by city unless already filtered to one)
     clusters = deduplicate_items(
         item_ids=item_ids,
         embeddings=embeddings,
         sim_threshold=request.sim_threshold,
-        blocks=cities,
+        blocks=cities if request.city is None else None,
     )
     
     # Format response
@@ -82,18 +119,16 @@ def cluster_duplicates(
     # Save clusters to database
     if clusters:
         # Clear existing clusters for these items
-        db.execute(
-            text("DELETE FROM dedup_clusters WHERE item_id = ANY(:ids)"),
-            {"ids": item_ids}
-        )
+        db.execute(_DELETE_CLUSTERS_SQL, {"ids": item_ids})
         
-        # Insert new clusters
-        for cluster_id, items in clusters.items():
-            for item_id in items:
-                db.execute(
-                    text("INSERT INTO dedup_clusters (item_id, cluster_id) VALUES (:item_id, :cluster_id)"),
-                    {"item_id": item_id, "cluster_id": cluster_id}
-                )
+        # Insert new clusters, INSERT_BATCH rows per statement
+        cluster_rows = [
+            {"item_id": item_id, "cluster_id": cluster_id}
+            for cluster_id, items in clusters.items()
+            for item_id in items
+        ]
+        for start in range(0, len(cluster_rows), INSERT_BATCH):
+            db.execute(insert(DEDUP_CLUSTERS).values(cluster_rows[start:start + INSERT_BATCH]))
         
         db.commit()
     
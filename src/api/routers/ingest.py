@@ -1,19 +1,94 @@
 """Ingest router - load menu items into the system."""
 from fastapi import APIRouter, Depends
-from sqlalchemy import text
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from src.api import deps
 from src.api.logging_conf import get_logger
-from src.api.schemas import IngestRequest, IngestResponse
-from src.core.embeddings import encode_texts
+from src.api.schemas import IndexStatusResponse, IngestRequest, IngestResponse
+from src.core.embeddings import embedding_to_bytes, encode_texts
 from src.core.normalize import normalize_text
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Columns overwritten when an (outlet_id, title_en) item already exists
+UPDATE_COLUMNS = [
+    "outlet_name", "city", "lat", "lon",
+    "title_ar", "description", "price",
+    "cuisine_tags", "diet_tags",
+    "title_norm", "desc_norm", "embedding", "embedding_bytes",
+]
 
-@router.post("", response_model=IngestResponse)
+ITEMS = table(
+    "items",
+    *(column(name) for name in ["item_id", "outlet_id", "title_en", "updated_at", *UPDATE_COLUMNS]),
+)
+
+# Rows per INSERT statement (15 bind parameters each, Postgres allows 65535)
+UPSERT_BATCH = 1000
+
+# Larger requests are COPY'd into a staging table and upserted in one statement
+COPY_THRESHOLD = 1000
+
+COPY_COLUMNS = ["outlet_id", "title_en", *UPDATE_COLUMNS]
+
+_CREATE_STAGE_SQL = text(f"""
+    CREATE TEMP TABLE items_stage ON COMMIT DROP AS
+    SELECT {", ".join(COPY_COLUMNS)} FROM items WITH NO DATA
+""")
+
+_UPSERT_FROM_STAGE_SQL = text(f"""
+    INSERT INTO items ({", ".join(COPY_COLUMNS)})
+    SELECT {", ".join(COPY_COLUMNS)} FROM items_stage
+    ON CONFLICT (outlet_id, title_en) DO UPDATE SET
+        {", ".join(f"{name} = EXCLUDED.{name}" for name in UPDATE_COLUMNS)},
+        updated_at = NOW()
+    RETURNING (xmax = 0) AS inserted
+""")
+
+
+def _upsert_batches(db: Session, rows: list[dict]) -> int:
+    """Upsert rows with multi-row INSERT statements; returns the insert count."""
+    inserted = 0
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = insert(ITEMS).values(rows[start:start + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["outlet_id", "title_en"],
+            set_={
+                **{name: stmt.excluded[name] for name in UPDATE_COLUMNS},
+                "updated_at": func.now(),
+            },
+        ).returning(ITEMS.c.item_id, literal_column("(xmax = 0)").label("inserted"))
+        inserted += sum(1 for row in db.execute(stmt) if row.inserted)
+    return inserted
+
+
+def _upsert_copy(db: Session, rows: list[dict]) -> int:
+    """
+    Upsert rows by streaming them into a temp table with COPY.
+    
+    COPY bypasses per-row statement parsing and bind parameters, and the
+    single INSERT ... SELECT maintains the items indexes in one pass.
+    """
+    db.execute(_CREATE_STAGE_SQL)
+    
+    # Raw psycopg connection on the session's transaction
+    conn = db.connection().connection.driver_connection
+    with conn.cursor() as cursor:
+        copy_sql = f"COPY items_stage ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+        with cursor.copy(copy_sql) as copy:
+            for row in rows:
+                # pgvector text literal for the embedding column
+                values = [row[name] for name in COPY_COLUMNS]
+                values[COPY_COLUMNS.index("embedding")] = "[" + ",".join(map(str, row["embedding"])) + "]"
+                copy.write_row(values)
+    
+    return sum(1 for row in db.execute(_UPSERT_FROM_STAGE_SQL) if row.inserted)
+
+
+@router.post("", response_model=IngestResponse, status_code=202)
 def ingest_items(
     request: IngestRequest,
     db: Session = Depends(deps.get_db),
@@ -21,16 +96,17 @@ def ingest_items(
     """
     Ingest menu items into the system.
     
-    Creates normalized text fields and embeddings for search.
+    Creates normalized text fields and embeddings for search. The BM25
+    index is rebuilt in the background once ingest traffic settles; poll
+    /ingest/status until index_version reaches the returned version.
     """
     if not request.items:
         return IngestResponse(inserted=0, updated=0, message="No items provided")
     
-    inserted = 0
-    updated = 0
-    
+    # Normalize text and build one row per item
+    rows = {}
+    texts = {}
     for item in request.items:
-        # Normalize text
         title_parts = []
         if item.title_en:
             title_parts.append(item.title_en)
@@ -38,101 +114,62 @@ def ingest_items(
             title_parts.append(item.title_ar)
         
         title_combined = " ".join(title_parts)
-        title_norm = normalize_text(title_combined)
-        desc_norm = normalize_text(item.description or "")
-        
-        # Generate embedding
-        text_for_embedding = f"{title_combined} {item.description or ''}"
-        embedding = encode_texts([text_for_embedding], normalize=True)[0]
-        embedding_list = embedding.tolist()
-        
-        # Check if item exists
-        check_query = text("""
-            SELECT item_id FROM items
-            WHERE outlet_id = :outlet_id AND title_en = :title_en
-        """)
-        existing = db.execute(check_query, {
+        row = {
             "outlet_id": item.outlet_id,
+            "outlet_name": item.outlet_name,
+            "city": item.city,
+            "lat": item.lat,
+            "lon": item.lon,
             "title_en": item.title_en,
-        }).fetchone()
+            "title_ar": item.title_ar,
+            "description": item.description,
+            "price": item.price,
+            "cuisine_tags": item.cuisine_tags,
+            "diet_tags": item.diet_tags,
+            "title_norm": normalize_text(title_combined),
+            "desc_norm": normalize_text(item.description or ""),
+        }
         
-        if existing:
-            # Update
-            update_query = text("""
-                UPDATE items SET
-                    outlet_name = :outlet_name,
-                    city = :city,
-                    lat = :lat,
-                    lon = :lon,
-                    title_ar = :title_ar,
-                    description = :description,
-                    price = :price,
-                    cuisine_tags = :cuisine_tags,
-                    diet_tags = :diet_tags,
-                    title_norm = :title_norm,
-                    desc_norm = :desc_norm,
-                    embedding = :embedding,
-                    updated_at = NOW()
-                WHERE item_id = :item_id
-            """)
-            db.execute(update_query, {
-                "item_id": existing[0],
-                "outlet_name": item.outlet_name,
-                "city": item.city,
-                "lat": item.lat,
-                "lon": item.lon,
-                "title_ar": item.title_ar,
-                "description": item.description,
-                "price": item.price,
-                "cuisine_tags": item.cuisine_tags,
-                "diet_tags": item.diet_tags,
-                "title_norm": title_norm,
-                "desc_norm": desc_norm,
-                "embedding": embedding_list,
-            })
-            updated += 1
+        # A later item with the same natural key replaces an earlier one, as
+        # a row-by-row upsert would; NULL keys never conflict
+        if item.outlet_id is None or item.title_en is None:
+            key = ("new", len(rows))
         else:
-            # Insert
-            insert_query = text("""
-                INSERT INTO items (
-                    outlet_id, outlet_name, city, lat, lon,
-                    title_en, title_ar, description, price,
-                    cuisine_tags, diet_tags,
-                    title_norm, desc_norm, embedding
-                ) VALUES (
-                    :outlet_id, :outlet_name, :city, :lat, :lon,
-                    :title_en, :title_ar, :description, :price,
-                    :cuisine_tags, :diet_tags,
-                    :title_norm, :desc_norm, :embedding
-                )
-            """)
-            db.execute(insert_query, {
-                "outlet_id": item.outlet_id,
-                "outlet_name": item.outlet_name,
-                "city": item.city,
-                "lat": item.lat,
-                "lon": item.lon,
-                "title_en": item.title_en,
-                "title_ar": item.title_ar,
-                "description": item.description,
-                "price": item.price,
-                "cuisine_tags": item.cuisine_tags,
-                "diet_tags": item.diet_tags,
-                "title_norm": title_norm,
-                "desc_norm": desc_norm,
-                "embedding": embedding_list,
-            })
-            inserted += 1
+            key = (item.outlet_id, item.title_en)
+        rows[key] = row
+        texts[key] = f"{title_combined} {item.description or ''}"
+    
+    # Generate all embeddings in one batched forward pass
+    embeddings = encode_texts(list(texts.values()), normalize=True, batch_size=64)
+    for row, embedding in zip(rows.values(), embeddings):
+        row["embedding"] = embedding.tolist()
+        row["embedding_bytes"] = embedding_to_bytes(embedding)
+    
+    # Upsert; xmax = 0 only for freshly inserted rows
+    rows = list(rows.values())
+    if len(rows) > COPY_THRESHOLD:
+        inserted = _upsert_copy(db, rows)
+    else:
+        inserted = _upsert_batches(db, rows)
+    
+    # Items repeated within the request count as updates
+    updated = len(request.items) - inserted
     
     db.commit()
     
-    # Rebuild sparse index
-    logger.info("Rebuilding BM25 index...")
-    count = deps.build_sparse_index(db)
-    logger.info(f"BM25 index rebuilt with {count} items")
+    # Coalesce BM25 rebuilds across back-to-back ingest calls
+    index_version = deps.schedule_sparse_rebuild()
     
     return IngestResponse(
         inserted=inserted,
         updated=updated,
         message=f"Processed {len(request.items)} items",
+        index_version=index_version,
     )
+
+
+@router.get("/status", response_model=IndexStatusResponse)
+def index_status():
+    """Report the sparse index version and whether a rebuild is pending."""
+    rebuilder = deps.get_sparse_rebuilder()
+    return IndexStatusResponse(index_version=rebuilder.version, pending=rebuilder.pending)
@@ -2,25 +2,44 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from src.api import deps
 from src.api.logging_conf import get_logger
 from src.api.schemas import QueryMetric, SearchMetricsRequest, SearchMetricsResponse
 from src.core.embeddings import encode_texts
-from src.core.eval import per_query_metrics, recall_at_k, mean_reciprocal_rank, precision_at_k
+from src.core.eval import evaluate_search as compute_search_metrics, per_query_metrics
 from src.core.hybrid import combine_scores
-from src.core.normalize import normalize_text
+from src.core.normalize import normalize_cached
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+_QUERY_LABELS_SQL = text("""
+    SELECT qid, query, relevant_ids
+    FROM query_labels
+    ORDER BY qid
+""")
+
+
+def _sparse_search_all(bm25, qids: list, query_norms: list[str]) -> list[list]:
+    """BM25 search for each query, logging (and skipping) failures."""
+    all_results = []
+    for qid, query_norm in zip(qids, query_norms):
+        try:
+            all_results.append(bm25.search(query_norm, k=100))
+        except Exception as e:
+            logger.warning(f"Sparse search failed for query {qid}: {e}")
+            all_results.append([])
+    return all_results
+
 
 @router.get("/search", response_model=SearchMetricsResponse)
-def evaluate_search(
+async def evaluate_search(
     k: int = Query(default=5, ge=1, le=20),
     mode: str = Query(default="hybrid", pattern="^(sparse|dense|hybrid)$"),
     alpha: float = Query(default=0.4, ge=0.0, le=1.0),
-    ef_search: int | None = Query(default=None, ge=1, le=200),
+    ef_search: int | None = Query(default=None, ge=1, le=1000),
     db: Session = Depends(deps.get_db),
 ):
     """
@@ -29,12 +48,7 @@ def evaluate_search(
     Returns Recall@k, MRR, and per-query metrics.
     """
     # Load query labels
-    query = text("""
-        SELECT qid, query, relevant_ids
-        FROM query_labels
-        ORDER BY qid
-    """)
-    rows = db.execute(query).fetchall()
+    rows = await run_in_threadpool(lambda: db.execute(_QUERY_LABELS_SQL).fetchall())
     
     if not rows:
         return SearchMetricsResponse(
@@ -52,35 +66,34 @@ def evaluate_search(
     bm25 = deps.get_bm25_retriever()
     vector_store = deps.get_vector_store()
     
-    for row in rows:
-        qid, query_text, relevant_ids = row
-        
-        # Normalize query
-        query_norm = normalize_text(query_text)
-        
-        sparse_results = []
-        dense_results = []
-        
-        # Sparse
-        if mode in ["sparse", "hybrid"]:
-            try:
-                sparse_results = bm25.search(query_norm, k=100)
-            except Exception as e:
-                logger.warning(f"Sparse search failed for query {qid}: {e}")
-        
-        # Dense
-        if mode in ["dense", "hybrid"]:
-            query_vector = encode_texts([query_norm], normalize=True)[0]
-            dense_results = vector_store.search(
-                query_vector,
-                k=100,
-                ef_search=ef_search,
-            )
+    # Normalize all queries (once; the encoder gets normalized text)
+    query_norms = [normalize_cached(row[1]) for row in rows]
+    
+    # Dense: encode all queries in one pass and search them as a batch
+    if mode in ["dense", "hybrid"]:
+        query_vectors = await deps.run_cpu(encode_texts, query_norms, normalize=False, batch_size=64)
+        all_dense_results = await deps.run_cpu(
+            vector_store.batch_search, query_vectors, k=100, ef_search=ef_search
+        )
+    else:
+        all_dense_results = [[] for _ in rows]
+    
+    # Sparse
+    if mode in ["sparse", "hybrid"]:
+        all_sparse_results = await deps.run_cpu(
+            _sparse_search_all, bm25, [row[0] for row in rows], query_norms
+        )
+    else:
+        all_sparse_results = [[] for _ in rows]
+    
+    for row, sparse_results, dense_results in zip(rows, all_sparse_results, all_dense_results):
+        _, query_text, relevant_ids = row
         
         # Combine
         if mode == "hybrid":
-            combined = combine_scores(sparse_results, dense_results, alpha=alpha)
-            final_results = combined[:k * 2]  # Get more for evaluation
+            final_results = combine_scores(
+                sparse_results, dense_results, alpha=alpha, k=k * 2
+            )  # Get more for evaluation
         elif mode == "sparse":
             final_results = sparse_results[:k * 2]
         else:
@@ -93,10 +106,8 @@ def evaluate_search(
         ground_truth.append(list(relevant_ids))
         queries.append(query_text)
     
-    # Compute metrics
-    recall = recall_at_k(predictions, ground_truth, k=k)
-    mrr = mean_reciprocal_rank(predictions, ground_truth)
-    precision = precision_at_k(predictions, ground_truth, k=k)
+    # Compute metrics (one pass over the queries)
+    metrics = compute_search_metrics(predictions, ground_truth, ks=[k])
     
     # Per-query metrics
     per_query = per_query_metrics(predictions, ground_truth, queries, k=k)
@@ -112,8 +123,8 @@ def evaluate_search(
         ))
     
     return SearchMetricsResponse(
-        recall_at_k=recall,
-        mrr=mrr,
-        precision_at_k=precision,
+        recall_at_k=metrics[f"recall@{k}"],
+        mrr=metrics["mrr"],
+        precision_at_k=metrics[f"precision@{k}"],
         per_query=query_metrics,
     )
@@ -1,41 +1,167 @@
 """Recommendation router - content-based recommendations."""
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import faiss
 import numpy as np
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from src.api import deps
+from src.api.config import get_settings
 from src.api.logging_conf import get_logger
 from src.api.schemas import RecommendItem, RecommendRequest, RecommendResponse
+from src.core.embeddings import embedding_from_row
 from src.core.recommend import ContentBasedRecommender
 
 router = APIRouter()
 logger = get_logger(__name__)
+settings = get_settings()
+
+# On-disk float16 embedding cache, reopened read-only on later boots. The
+# embeddings file is named after the data version it holds; the IDs file
+# records that version and is swapped in last, so readers never see a
+# half-written cache.
+CACHE_DIR = Path(settings.cache_dir)
+IDS_CACHE = CACHE_DIR / "recommend_ids.npz"
+STREAM_ROWS = 10_000
+
+# Changes whenever a row gains, loses or changes its embedding (updated_at
+# is maintained by the items_updated_at trigger)
+_EMBEDDING_VERSION_SQL = text("""
+    SELECT count(*), max(updated_at), coalesce(sum(item_id), 0)
+    FROM items
+    WHERE embedding IS NOT NULL
+""")
+
+# The vector column is only fetched for rows without raw bytes
+_ITEM_EMBEDDINGS_SQL = text("""
+    SELECT item_id, embedding_bytes, CASE WHEN embedding_bytes IS NULL THEN embedding END
+    FROM items
+    WHERE embedding IS NOT NULL
+    ORDER BY item_id
+""")
+
+_USER_HISTORY_SQL = text("""
+    SELECT item_id
+    FROM user_interactions
+    WHERE user_id = :user_id
+    ORDER BY timestamp DESC
+    LIMIT 50
+""")
 
 # Global recommender instance (in production, use Redis/cache)
 _recommender = None
+_recommender_lock = threading.Lock()
+
+
+def _embeddings_path(version: str) -> Path:
+    """Path of the float16 embeddings file for a data version."""
+    return CACHE_DIR / f"recommend_embeddings.{version}.fp16"
+
+
+def _replace_atomic(write, path: Path, suffix: str):
+    """Write via write(tmp_path) into a unique temp file, then rename it over path."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=suffix)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load_embeddings(db: Session) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Load item IDs and normalized float16 embeddings as a memory-mapped cache.
+    
+    The cache is reused while its version (embedded row count, latest
+    updated_at and item ID sum) matches the database; otherwise rows are
+    streamed from Postgres into a fresh memmap that replaces it atomically.
+    
+    Returns:
+        Tuple of (item_ids, embeddings), or None if no item has an embedding
+    """
+    count, last_updated, id_sum = db.execute(_EMBEDDING_VERSION_SQL).one()
+    if not count:
+        return None
+    version = hashlib.blake2b(
+        f"{count}|{last_updated}|{id_sum}".encode(), digest_size=8
+    ).hexdigest()
+    
+    embeddings_path = _embeddings_path(version)
+    if IDS_CACHE.exists() and embeddings_path.exists():
+        with np.load(IDS_CACHE, allow_pickle=False) as data:
+            if str(data["version"]) == version:
+                item_ids = data["item_ids"]
+                shape = (len(item_ids), settings.embedding_dim)
+                return item_ids, np.memmap(embeddings_path, dtype=np.float16, mode="r", shape=shape)
+    
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    item_ids = np.empty(count, dtype=np.int64)
+    written = 0
+    
+    def write_embeddings(tmp_path: str):
+        nonlocal written
+        embeddings = np.memmap(
+            tmp_path, dtype=np.float16, mode="w+", shape=(count, settings.embedding_dim)
+        )
+        result = db.execute(_ITEM_EMBEDDINGS_SQL, execution_options={"yield_per": STREAM_ROWS})
+        for rows in result.partitions():
+            rows = rows[:count - written]
+            chunk = np.empty((len(rows), settings.embedding_dim), dtype=np.float32)
+            for i, row in enumerate(rows):
+                chunk[i] = embedding_from_row(row[1], row[2])
+            faiss.normalize_L2(chunk)
+            
+            item_ids[written:written + len(rows)] = [row[0] for row in rows]
+            embeddings[written:written + len(rows)] = chunk
+            written += len(rows)
+            if written == count:
+                break
+        embeddings.flush()
+        del embeddings
+    
+    _replace_atomic(write_embeddings, embeddings_path, ".fp16")
+    _replace_atomic(
+        lambda tmp_path: np.savez(tmp_path, item_ids=item_ids[:written], version=np.array(version)),
+        IDS_CACHE,
+        ".npz",
+    )
+    
+    # Drop older versions (open memmaps keep their unlinked files readable)
+    for stale in CACHE_DIR.glob("recommend_embeddings.*.fp16"):
+        if stale != embeddings_path:
+            stale.unlink(missing_ok=True)
+    
+    shape = (written, settings.embedding_dim)
+    return item_ids[:written], np.memmap(embeddings_path, dtype=np.float16, mode="r", shape=shape)
 
 
 def get_recommender(db: Session) -> ContentBasedRecommender:
-    """Get or initialize recommender."""
+    """Get or initialize recommender (built once, even under concurrent requests)."""
     global _recommender
     
-    if _recommender is None:
-        _recommender = ContentBasedRecommender()
-        
-        # Load all items with embeddings
-        query = text("""
-            SELECT item_id, embedding
-            FROM items
-            WHERE embedding IS NOT NULL
-            ORDER BY item_id
-        """)
-        rows = db.execute(query).fetchall()
-        
-        if rows:
-            item_ids = [row[0] for row in rows]
-            embeddings = np.array([row[1] for row in rows], dtype=np.float32)
-            _recommender.set_items(item_ids, embeddings)
+    recommender = _recommender
+    if recommender is not None:
+        return recommender
+    
+    with _recommender_lock:
+        if _recommender is None:
+            recommender = ContentBasedRecommender()
+            
+            loaded = _load_embeddings(db)
+            if loaded is not None:
+                item_ids, embeddings = loaded
+                recommender.set_items(item_ids, embeddings, normalized=True)
+            
+            # Publish only once fully built
+            _recommender = recommender
     
     return _recommender
 
@@ -66,14 +192,7 @@ def recommend(
     
     elif request.user_id:
         # Load user interaction history
-        query = text("""
-            SELECT item_id
-            FROM user_interactions
-            WHERE user_id = :user_id
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """)
-        rows = db.execute(query, {"user_id": request.user_id}).fetchall()
+        rows = db.execute(_USER_HISTORY_SQL, {"user_id": request.user_id}).fetchall()
         interacted_ids = [row[0] for row in rows]
         
         if interacted_ids:
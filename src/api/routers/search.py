@@ -1,23 +1,84 @@
 """Search router - hybrid retrieval endpoint."""
+import asyncio
 import time
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from src.api import deps
 from src.api.logging_conf import get_logger
 from src.api.schemas import SearchRequest, SearchResponse, SearchResultItem, SearchTimings
-from src.core.embeddings import encode_texts
 from src.core.hybrid import combine_scores
-from src.core.normalize import normalize_text
+from src.core.normalize import normalize_cached
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# One array parameter keeps a single statement shape for every k; the
+# ordinality join returns rows in ANN rank order
+_ITEM_LOOKUP_SQL = text("""
+    SELECT items.item_id, title_en, title_ar, outlet_name, city, price
+    FROM items
+    JOIN unnest(CAST(:ids AS bigint[])) WITH ORDINALITY AS o(id, ix) ON items.item_id = o.id
+    ORDER BY o.ix
+""")
+
+
+def _fetch_results(db: Session, final_results: list) -> list[SearchResultItem]:
+    """Look up item details for ranked (item_id, score) pairs, keeping order."""
+    if not final_results:
+        return []
+    
+    item_ids = [item_id for item_id, _ in final_results]
+    score_map = {item_id: score for item_id, score in final_results}
+    
+    rows = db.execute(_ITEM_LOOKUP_SQL, {"ids": item_ids}).fetchall()
+    
+    # Rows come back in rank order; ids missing from the table are skipped
+    return [
+        SearchResultItem(
+            item_id=row[0],
+            score=score_map[row[0]],
+            title_en=row[1],
+            title_ar=row[2],
+            outlet_name=row[3],
+            city=row[4],
+            price=float(row[5]) if row[5] else None,
+        )
+        for row in rows
+    ]
+
+
+async def _sparse_search(query_normalized: str) -> tuple[list, float]:
+    """BM25 search in the CPU pool."""
+    t0 = time.perf_counter()
+    bm25 = deps.get_bm25_retriever()
+    results = await deps.run_cpu(bm25.search, query_normalized, k=100)
+    return results, (time.perf_counter() - t0) * 1000
+
+
+async def _encode_and_search(
+    query_normalized: str,
+    k: int,
+    ef_search: int | None,
+) -> tuple[list, float, float]:
+    """Encode the query (micro-batched), then run ANN search in the CPU pool."""
+    t0 = time.perf_counter()
+    query_vector = await deps.get_embed_batcher().submit(query_normalized)
+    encode_ms = (time.perf_counter() - t0) * 1000
+    
+    t0 = time.perf_counter()
+    vector_store = deps.get_vector_store()
+    results = await deps.run_cpu(vector_store.search, query_vector, k=k, ef_search=ef_search)
+    dense_ms = (time.perf_counter() - t0) * 1000
+    
+    return results, encode_ms, dense_ms
+
 
 @router.post("", response_model=SearchResponse)
-def search(
+async def search(
     request: SearchRequest,
     db: Session = Depends(deps.get_db),
 ):
@@ -32,83 +93,54 @@ def search(
     timings = {}
     
     # Normalize query
-    query_normalized = normalize_text(request.query, remove_diacritics=request.normalize_arabic)
+    query_normalized = normalize_cached(request.query, remove_diacritics=request.normalize_arabic)
     
     sparse_results = []
     dense_results = []
     
-    # Sparse retrieval
+    # Start both retrieval stages up front so they overlap in the pool
+    sparse_task = None
+    dense_task = None
     if request.mode in ["sparse", "hybrid"]:
-        t0 = time.perf_counter()
+        sparse_task = asyncio.ensure_future(_sparse_search(query_normalized))
+    if request.mode in ["dense", "hybrid"]:
+        dense_task = asyncio.ensure_future(_encode_and_search(
+            query_normalized,
+            request.k if request.mode == "dense" else 100,
+            request.ef_search,
+        ))
+    
+    # Sparse retrieval
+    if sparse_task is not None:
         try:
-            bm25 = deps.get_bm25_retriever()
-            sparse_results = bm25.search(query_normalized, k=100)
+            sparse_results, timings["sparse_ms"] = await sparse_task
         except Exception as e:
             logger.warning(f"Sparse search failed: {e}")
             if request.mode == "sparse":
                 raise HTTPException(status_code=500, detail="Sparse search failed")
-        timings["sparse_ms"] = (time.perf_counter() - t0) * 1000
     
     # Dense retrieval
-    if request.mode in ["dense", "hybrid"]:
-        # Encode query
-        t0 = time.perf_counter()
-        query_vector = encode_texts([query_normalized], normalize=True)[0]
-        timings["encode_ms"] = (time.perf_counter() - t0) * 1000
-        
-        # ANN search
-        t0 = time.perf_counter()
-        vector_store = deps.get_vector_store()
-        dense_results = vector_store.search(
-            query_vector,
-            k=request.k if request.mode == "dense" else 100,
-            ef_search=request.ef_search,
-        )
-        timings["dense_ms"] = (time.perf_counter() - t0) * 1000
+    if dense_task is not None:
+        dense_results, timings["encode_ms"], timings["dense_ms"] = await dense_task
     
     # Combine results
     if request.mode == "hybrid":
         t0 = time.perf_counter()
-        combined = combine_scores(sparse_results, dense_results, alpha=request.alpha)
-        final_results = combined[:request.k]
+        final_results = combine_scores(
+            sparse_results,
+            dense_results,
+            alpha=request.alpha,
+            k=request.k,
+            fusion=request.fusion,
+        )
         timings["hybrid_ms"] = (time.perf_counter() - t0) * 1000
     elif request.mode == "sparse":
         final_results = sparse_results[:request.k]
     else:  # dense
         final_results = dense_results
     
-    # Get item details from database
-    if final_results:
-        item_ids = [item_id for item_id, _ in final_results]
-        score_map = {item_id: score for item_id, score in final_results}
-        
-        placeholders = ','.join([':id' + str(i) for i in range(len(item_ids))])
-        query_sql = text(f"""
-            SELECT item_id, title_en, title_ar, outlet_name, city, price
-            FROM items
-            WHERE item_id IN ({placeholders})
-        """)
-        
-        params = {f'id{i}': item_id for i, item_id in enumerate(item_ids)}
-        rows = db.execute(query_sql, params).fetchall()
-        
-        # Build response maintaining order
-        id_to_row = {row[0]: row for row in rows}
-        results = []
-        for item_id, _ in final_results:
-            if item_id in id_to_row:
-                row = id_to_row[item_id]
-                results.append(SearchResultItem(
-                    item_id=row[0],
-                    score=score_map[item_id],
-                    title_en=row[1],
-                    title_ar=row[2],
-                    outlet_name=row[3],
-                    city=row[4],
-                    price=float(row[5]) if row[5] else None,
-                ))
-    else:
-        results = []
+    # Get item details from database (blocking I/O on the default threadpool)
+    results = await run_in_threadpool(_fetch_results, db, final_results)
     
     # Total time
     total_ms = (time.perf_counter() - start_time) * 1000
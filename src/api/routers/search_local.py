@@ -1,19 +1,49 @@
 """Search router - hybrid retrieval endpoint (local demo version)."""
+import asyncio
 import time
 
+import numpy as np
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 
 from src.api import deps_local as deps
-from src.api.schemas import SearchRequest, SearchResponse, SearchResultItem, SearchTimings
-from src.core.embeddings import encode_texts
+from src.api.schemas import SearchRequest, SearchResponse
 from src.core.hybrid import combine_scores
-from src.core.normalize import normalize_text
+from src.core.normalize import normalize_cached
 
 router = APIRouter()
 
 
-@router.post("/search", response_model=SearchResponse)
-def search(request: SearchRequest):
+def _sparse_search(query_normalized: str) -> tuple[list, float]:
+    """Run BM25 retrieval (executes in the worker pool)."""
+    t0 = time.perf_counter()
+    bm25 = deps.get_bm25_retriever()
+    results = bm25.search(query_normalized, k=100) if bm25 else []
+    return results, (time.perf_counter() - t0) * 1000
+
+
+async def _encode_and_search(
+    query_normalized: str,
+    k: int,
+    ef_search: int | None,
+) -> tuple[list, float, float]:
+    """Encode the query (cached, micro-batched), then run ANN search in the pool."""
+    t0 = time.perf_counter()
+    query_vector = await deps.encode_query(query_normalized)
+    encode_ms = (time.perf_counter() - t0) * 1000
+    
+    t0 = time.perf_counter()
+    vector_store = deps.get_vector_store()
+    results = await asyncio.get_running_loop().run_in_executor(
+        deps.get_executor(), vector_store.search, query_vector, k, ef_search
+    )
+    dense_ms = (time.perf_counter() - t0) * 1000
+    
+    return results, encode_ms, dense_ms
+
+
+@router.post("/search", responses={200: {"model": SearchResponse}})
+async def search(request: SearchRequest):
     """
     Search for menu items using sparse, dense, or hybrid retrieval.
     
@@ -23,83 +53,95 @@ def search(request: SearchRequest):
     """
     start_time = time.perf_counter()
     timings = {}
+    loop = asyncio.get_running_loop()
+    pool = deps.get_executor()
     
     # Normalize query
-    query_normalized = normalize_text(request.query, remove_diacritics=request.normalize_arabic)
+    query_normalized = normalize_cached(request.query, remove_diacritics=request.normalize_arabic)
     
     sparse_results = []
     dense_results = []
     
-    # Sparse retrieval
+    # Submit both retrieval stages up front so they overlap in the pool
+    sparse_task = None
+    dense_task = None
     if request.mode in ["sparse", "hybrid"]:
-        t0 = time.perf_counter()
+        sparse_task = loop.run_in_executor(pool, _sparse_search, query_normalized)
+    if request.mode in ["dense", "hybrid"]:
+        dense_task = asyncio.ensure_future(_encode_and_search(
+            query_normalized,
+            request.k if request.mode == "dense" else 100,
+            request.ef_search,
+        ))
+    
+    # Sparse retrieval
+    if sparse_task is not None:
         try:
-            bm25 = deps.get_bm25_retriever()
-            if bm25:
-                sparse_results = bm25.search(query_normalized, k=100)
+            sparse_results, timings["sparse_ms"] = await sparse_task
         except Exception as e:
             print(f"Sparse search failed: {e}")
             if request.mode == "sparse":
                 raise HTTPException(status_code=500, detail="Sparse search failed")
-        timings["sparse_ms"] = (time.perf_counter() - t0) * 1000
     
     # Dense retrieval
-    if request.mode in ["dense", "hybrid"]:
-        # Encode query
-        t0 = time.perf_counter()
-        query_vector = encode_texts([query_normalized], normalize=True)[0]
-        timings["encode_ms"] = (time.perf_counter() - t0) * 1000
-        
-        # ANN search
-        t0 = time.perf_counter()
-        vector_store = deps.get_vector_store()
-        dense_results = vector_store.search(
-            query_vector,
-            k=request.k if request.mode == "dense" else 100,
-            ef_search=request.ef_search,
-        )
-        timings["dense_ms"] = (time.perf_counter() - t0) * 1000
+    if dense_task is not None:
+        dense_results, timings["encode_ms"], timings["dense_ms"] = await dense_task
     
     # Combine results
     if request.mode == "hybrid":
         t0 = time.perf_counter()
-        combined = combine_scores(sparse_results, dense_results, alpha=request.alpha)
-        final_results = combined[:request.k]
+        final_results = combine_scores(
+            sparse_results,
+            dense_results,
+            alpha=request.alpha,
+            k=request.k,
+            fusion=request.fusion,
+        )
         timings["hybrid_ms"] = (time.perf_counter() - t0) * 1000
     elif request.mode == "sparse":
         final_results = sparse_results[:request.k]
     else:  # dense
         final_results = dense_results
     
-    # Get item details from in-memory store
+    # Get item details from the columnar store with one take per field
     items_db = deps.get_items_db()
-    results = []
+    hits = [
+        (item_id, score, row)
+        for (item_id, score), row in zip(final_results, items_db.rows([i for i, _ in final_results]))
+        if row >= 0
+    ]
+    fields = items_db.take(
+        np.fromiter((row for _, _, row in hits), dtype=np.int64, count=len(hits)),
+        ["title_en", "title_ar", "outlet_name", "city", "price"],
+    )
     
-    for item_id, score in final_results:
-        if item_id in items_db:
-            item = items_db[item_id]
-            results.append(SearchResultItem(
-                item_id=item_id,
-                score=score,
-                title_en=item.get("title_en"),
-                title_ar=item.get("title_ar"),
-                outlet_name=item.get("outlet_name"),
-                city=item.get("city"),
-                price=item.get("price"),
-            ))
+    # Plain dicts: the response is serialized directly, without a
+    # per-request pass through the SearchResponse model
+    results = [
+        {
+            "item_id": item_id,
+            "score": score,
+            "title_en": fields["title_en"][j],
+            "title_ar": fields["title_ar"][j],
+            "outlet_name": fields["outlet_name"][j],
+            "city": fields["city"][j],
+            "price": fields["price"][j],
+        }
+        for j, (item_id, score, _) in enumerate(hits)
+    ]
     
     # Total time
     total_ms = (time.perf_counter() - start_time) * 1000
     
-    return SearchResponse(
-        results=results,
-        timings=SearchTimings(
-            encode_ms=timings.get("encode_ms", 0.0),
-            sparse_ms=timings.get("sparse_ms"),
-            dense_ms=timings.get("dense_ms"),
-            hybrid_ms=timings.get("hybrid_ms"),
-            total_ms=total_ms,
-        ),
-        query=request.query,
-        mode=request.mode,
-    )
+    return ORJSONResponse({
+        "results": results,
+        "timings": {
+            "encode_ms": timings.get("encode_ms", 0.0),
+            "sparse_ms": timings.get("sparse_ms"),
+            "dense_ms": timings.get("dense_ms"),
+            "hybrid_ms": timings.get("hybrid_ms"),
+            "total_ms": total_ms,
+        },
+        "query": request.query,
+        "mode": request.mode,
+    })
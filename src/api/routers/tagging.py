@@ -2,17 +2,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from src.api import deps
 from src.api.logging_conf import get_logger
 from src.api.schemas import TagRequest, TagResponse, LabelScore
+from src.core.normalize import normalize_cached
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+_ITEM_TEXT_SQL = text("""
+    SELECT title_en, title_ar, description
+    FROM items
+    WHERE item_id = :item_id
+""")
+
 
 @router.post("", response_model=TagResponse)
-def tag_item(
+async def tag_item(
     request: TagRequest,
     db: Session = Depends(deps.get_db),
 ):
@@ -24,12 +32,9 @@ def tag_item(
     # Get text to tag
     if request.item_id:
         # Fetch item from database
-        query = text("""
-            SELECT title_en, title_ar, description
-            FROM items
-            WHERE item_id = :item_id
-        """)
-        row = db.execute(query, {"item_id": request.item_id}).fetchone()
+        row = await run_in_threadpool(
+            lambda: db.execute(_ITEM_TEXT_SQL, {"item_id": request.item_id}).fetchone()
+        )
         
         if not row:
             raise HTTPException(status_code=404, detail="Item not found")
@@ -45,11 +50,15 @@ def tag_item(
     # Get tagger
     tagger = deps.get_label_tagger()
     
-    # Assign labels for all groups
-    results = tagger.assign_all_groups(
+    # Encode via the shared batcher, then score all groups against it in the
+    # pool (first use also encodes the deferred labels)
+    text_embedding = await deps.get_embed_batcher().submit(normalize_cached(text))
+    results = await deps.run_cpu(
+        tagger.assign_all_groups,
         text,
         top_n=request.top_n,
         threshold=request.threshold,
+        text_embedding=text_embedding,
     )
     
     # Format response
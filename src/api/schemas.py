@@ -30,6 +30,13 @@ class IngestResponse(BaseModel):
     inserted: int
     updated: int
     message: str = "Items ingested successfully"
+    index_version: int | None = None  # Sparse index version that will include these items
+
+
+class IndexStatusResponse(BaseModel):
+    """Sparse index rebuild status."""
+    index_version: int
+    pending: bool
 
 
 # Search schemas
@@ -39,13 +46,14 @@ class SearchRequest(BaseModel):
     k: int = Field(default=10, ge=1, le=100)
     mode: str = Field(default="hybrid", pattern="^(sparse|dense|hybrid)$")
     alpha: float = Field(default=0.4, ge=0.0, le=1.0)
-    ef_search: int | None = Field(default=None, ge=1, le=200)
+    fusion: str = Field(default="minmax", pattern="^(minmax|rrf)$")
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
     normalize_arabic: bool = True
 
 
 class SearchResultItem(BaseModel):
     """Single search result."""
-    item_id: int
+    item_id: int | str  # Local demo data uses string IDs
     score: float
     title_en: str | None
     title_ar: str | None
@@ -8,6 +8,105 @@ import streamlit as st
 # API configuration
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
+# Identical requests within the TTL are served from Streamlit's cache
+CACHE_TTL = 3600
+CACHE_ENTRIES = 256
+
+# Search results shown per page
+PAGE_SIZE = 10
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Get the shared keep-alive HTTP client (one connection pool for all sessions)."""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+    )
+
+
+class APIError(Exception):
+    """Non-success response from the API (message is the response body)."""
+
+
+def _json(response: httpx.Response) -> dict:
+    """Decode a successful response, raising APIError otherwise."""
+    if response.status_code != 200:
+        raise APIError(response.text)
+    return response.json()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_search(
+    query: str,
+    k: int,
+    mode: str,
+    alpha: float,
+    ef_search: int,
+    normalize_arabic: bool,
+) -> dict:
+    """POST /search."""
+    response = get_http_client().post(
+        "/search",
+        json={
+            "query": query,
+            "k": k,
+            "mode": mode,
+            "alpha": alpha,
+            "ef_search": ef_search,
+            "normalize_arabic": normalize_arabic,
+        },
+        timeout=30.0
+    )
+    return _json(response)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_dedup(city: str | None, sim_threshold: float) -> dict:
+    """POST /dedup/cluster."""
+    response = get_http_client().post(
+        "/dedup/cluster",
+        json={
+            "city": city,
+            "sim_threshold": sim_threshold,
+        },
+        timeout=60.0
+    )
+    return _json(response)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_tag(text: str, top_n: int, threshold: float) -> dict:
+    """POST /tag."""
+    response = get_http_client().post(
+        "/tag",
+        json={
+            "text": text,
+            "top_n": top_n,
+            "threshold": threshold,
+        },
+        timeout=30.0
+    )
+    return _json(response)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_eval(k: int, mode: str, alpha: float, ef_search: int) -> dict:
+    """GET /metrics/search."""
+    response = get_http_client().get(
+        "/metrics/search",
+        params={
+            "k": k,
+            "mode": mode,
+            "alpha": alpha,
+            "ef_search": ef_search,
+        },
+        timeout=120.0
+    )
+    return _json(response)
+
+
 st.set_page_config(
     page_title="Menu Intelligence Suite",
     page_icon="🍽️",
@@ -20,37 +119,41 @@ st.markdown("**Multilingual semantic search and intelligence for food delivery**
 # Sidebar controls
 st.sidebar.header("⚙️ Configuration")
 
-mode = st.sidebar.selectbox(
-    "Search Mode",
-    ["hybrid", "sparse", "dense"],
-    index=0,
-    help="Hybrid combines sparse and dense retrieval"
-)
-
-alpha = st.sidebar.slider(
-    "Alpha (Sparse Weight)",
-    min_value=0.0,
-    max_value=1.0,
-    value=0.4,
-    step=0.05,
-    help="Weight for sparse retrieval in hybrid mode (1.0 = pure sparse, 0.0 = pure dense)",
-    disabled=(mode != "hybrid")
-)
-
-ef_search = st.sidebar.slider(
-    "efSearch (ANN Quality)",
-    min_value=10,
-    max_value=200,
-    value=50,
-    step=10,
-    help="Higher values = better quality but slower search"
-)
-
-normalize_arabic = st.sidebar.checkbox(
-    "Normalize Arabic",
-    value=True,
-    help="Remove diacritics and normalize Alef/Yaa variants"
-)
+# Search settings apply on submit, so dragging a slider doesn't rerun per step
+with st.sidebar.form("search_settings"):
+    mode = st.selectbox(
+        "Search Mode",
+        ["hybrid", "sparse", "dense"],
+        index=0,
+        help="Hybrid combines sparse and dense retrieval"
+    )
+    
+    alpha = st.slider(
+        "Alpha (Sparse Weight)",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.4,
+        step=0.05,
+        help="Weight for sparse retrieval in hybrid mode (1.0 = pure sparse, 0.0 = pure dense)",
+        disabled=(mode != "hybrid")
+    )
+    
+    ef_search = st.slider(
+        "efSearch (ANN Quality)",
+        min_value=10,
+        max_value=200,
+        value=50,
+        step=10,
+        help="Higher values = better quality but slower search"
+    )
+    
+    normalize_arabic = st.checkbox(
+        "Normalize Arabic",
+        value=True,
+        help="Remove diacritics and normalize Alef/Yaa variants"
+    )
+    
+    st.form_submit_button("Apply")
 
 # Tabs
 tab1, tab2, tab3, tab4 = st.tabs(["🔍 Search", "🔗 Deduplication", "🏷️ Tagging", "📊 Metrics"])
@@ -61,82 +164,88 @@ tab1, tab2, tab3, tab4 = st.tabs(["🔍 Search", "🔗 Deduplication", "🏷️
 with tab1:
     st.header("Search Menu Items")
     
-    col1, col2 = st.columns([3, 1])
-    with col1:
-        query = st.text_input(
-            "Enter query (EN or AR)",
-            placeholder="e.g., chicken shawarma, شاورما دجاج",
-            key="search_query"
-        )
-    with col2:
-        k = st.number_input("Results", min_value=1, max_value=50, value=10)
+    with st.form("search_form"):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            query = st.text_input(
+                "Enter query (EN or AR)",
+                placeholder="e.g., chicken shawarma, شاورما دجاج",
+                key="search_query"
+            )
+        with col2:
+            k = st.number_input("Results", min_value=1, max_value=50, value=10)
+        
+        submitted = st.form_submit_button("Search", type="primary")
     
-    if st.button("Search", type="primary"):
+    if submitted:
         if not query:
             st.warning("Please enter a search query")
         else:
             with st.spinner("Searching..."):
                 try:
-                    response = httpx.post(
-                        f"{API_URL}/search",
-                        json={
-                            "query": query,
-                            "k": k,
-                            "mode": mode,
-                            "alpha": alpha,
-                            "ef_search": ef_search,
-                            "normalize_arabic": normalize_arabic,
-                        },
-                        timeout=30.0
+                    # Kept across reruns so paging doesn't re-fetch
+                    st.session_state["last_search"] = api_search(
+                        query, k, mode, alpha, ef_search, normalize_arabic
                     )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        # Display timings
-                        timings = data["timings"]
-                        col1, col2, col3, col4 = st.columns(4)
-                        col1.metric("Total Time", f"{timings['total_ms']:.1f} ms")
-                        if timings.get("sparse_ms"):
-                            col2.metric("Sparse", f"{timings['sparse_ms']:.1f} ms")
-                        if timings.get("dense_ms"):
-                            col3.metric("Dense", f"{timings['dense_ms']:.1f} ms")
-                        if timings.get("encode_ms"):
-                            col4.metric("Encoding", f"{timings['encode_ms']:.1f} ms")
-                        
-                        st.divider()
-                        
-                        # Display results
-                        if data["results"]:
-                            st.success(f"Found {len(data['results'])} results")
-                            
-                            for i, item in enumerate(data["results"], 1):
-                                with st.container():
-                                    col1, col2, col3 = st.columns([0.5, 3, 1])
-                                    
-                                    with col1:
-                                        st.metric("Rank", i)
-                                        st.metric("Score", f"{item['score']:.3f}")
-                                    
-                                    with col2:
-                                        st.markdown(f"**{item['title_en']}**")
-                                        if item['title_ar']:
-                                            st.markdown(f"*{item['title_ar']}*")
-                                        st.caption(f"📍 {item['outlet_name']} • {item['city']}")
-                                    
-                                    with col3:
-                                        if item['price']:
-                                            st.metric("Price", f"${item['price']:.2f}")
-                                        st.caption(f"ID: {item['item_id']}")
-                                    
-                                    st.divider()
-                        else:
-                            st.info("No results found")
-                    else:
-                        st.error(f"API Error: {response.text}")
+                    st.session_state["search_page"] = 1
                 
+                except APIError as e:
+                    st.error(f"API Error: {e}")
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
+    
+    data = st.session_state.get("last_search")
+    if data:
+        # Display timings
+        timings = data["timings"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Time", f"{timings['total_ms']:.1f} ms")
+        if timings.get("sparse_ms"):
+            col2.metric("Sparse", f"{timings['sparse_ms']:.1f} ms")
+        if timings.get("dense_ms"):
+            col3.metric("Dense", f"{timings['dense_ms']:.1f} ms")
+        if timings.get("encode_ms"):
+            col4.metric("Encoding", f"{timings['encode_ms']:.1f} ms")
+        
+        st.divider()
+        
+        # Display results
+        results = data["results"]
+        if results:
+            st.success(f"Found {len(results)} results")
+            
+            num_pages = (len(results) + PAGE_SIZE - 1) // PAGE_SIZE
+            page = st.number_input(
+                "Page",
+                min_value=1,
+                max_value=num_pages,
+                key="search_page",
+            ) if num_pages > 1 else 1
+            offset = (page - 1) * PAGE_SIZE
+            
+            # One Arrow-serialized table (current page only) instead of widgets per hit
+            df = pd.DataFrame(results[offset:offset + PAGE_SIZE])[
+                ["score", "title_en", "title_ar", "outlet_name", "city", "price", "item_id"]
+            ]
+            df.insert(0, "rank", range(offset + 1, offset + len(df) + 1))
+            
+            st.dataframe(
+                df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "rank": "Rank",
+                    "score": st.column_config.NumberColumn("Score", format="%.3f"),
+                    "title_en": "Title",
+                    "title_ar": "Title (AR)",
+                    "outlet_name": "Outlet",
+                    "city": "City",
+                    "price": st.column_config.NumberColumn("Price", format="$%.2f"),
+                    "item_id": "ID",
+                },
+            )
+        else:
+            st.info("No results found")
 
 # ============================================================================
 # TAB 2: Deduplication
@@ -144,57 +253,50 @@ with tab1:
 with tab2:
     st.header("Item Deduplication")
     
-    col1, col2 = st.columns(2)
-    with col1:
-        dedup_city = st.text_input("Filter by city (optional)", key="dedup_city")
-    with col2:
-        sim_threshold = st.slider(
-            "Similarity Threshold",
-            min_value=0.5,
-            max_value=1.0,
-            value=0.82,
-            step=0.02,
-            help="Higher = stricter matching"
-        )
+    with st.form("dedup_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            dedup_city = st.text_input("Filter by city (optional)", key="dedup_city")
+        with col2:
+            sim_threshold = st.slider(
+                "Similarity Threshold",
+                min_value=0.5,
+                max_value=1.0,
+                value=0.82,
+                step=0.02,
+                help="Higher = stricter matching"
+            )
+        
+        submitted = st.form_submit_button("Find Duplicates", type="primary")
     
-    if st.button("Find Duplicates", type="primary"):
+    if submitted:
         with st.spinner("Clustering duplicates..."):
             try:
-                response = httpx.post(
-                    f"{API_URL}/dedup/cluster",
-                    json={
-                        "city": dedup_city if dedup_city else None,
-                        "sim_threshold": sim_threshold,
-                    },
-                    timeout=60.0
-                )
+                data = api_dedup(dedup_city if dedup_city else None, sim_threshold)
+                stats = data["stats"]
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    stats = data["stats"]
-                    
-                    # Display stats
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("Total Items", stats["total_items"])
-                    col2.metric("Clusters Found", stats["num_clusters"])
-                    col3.metric("Duplicate Items", stats["num_duplicates"])
-                    
-                    st.divider()
+                # Display stats
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Total Items", stats["total_items"])
+                col2.metric("Clusters Found", stats["num_clusters"])
+                col3.metric("Duplicate Items", stats["num_duplicates"])
+                
+                st.divider()
+                
+                # Display clusters
+                if data["clusters"]:
+                    st.success(f"Found {len(data['clusters'])} duplicate clusters")
                     
-                    # Display clusters
-                    if data["clusters"]:
-                        st.success(f"Found {len(data['clusters'])} duplicate clusters")
-                        
-                        for cluster in data["clusters"][:20]:  # Limit display
-                            with st.expander(
-                                f"Cluster {cluster['cluster_id']} ({len(cluster['item_ids'])} items)"
-                            ):
-                                st.write(f"Item IDs: {', '.join(map(str, cluster['item_ids']))}")
-                    else:
-                        st.info("No duplicate clusters found")
+                    for cluster in data["clusters"][:20]:  # Limit display
+                        with st.expander(
+                            f"Cluster {cluster['cluster_id']} ({len(cluster['item_ids'])} items)"
+                        ):
+                            st.write(f"Item IDs: {', '.join(map(str, cluster['item_ids']))}")
                 else:
-                    st.error(f"API Error: {response.text}")
+                    st.info("No duplicate clusters found")
             
+            except APIError as e:
+                st.error(f"API Error: {e}")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
 
@@ -204,68 +306,60 @@ with tab2:
 with tab3:
     st.header("Auto-Tagging")
     
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        tag_text = st.text_area(
-            "Enter item text to tag",
-            placeholder="e.g., Grilled chicken shawarma with fresh vegetables",
-            height=100
-        )
-    with col2:
-        top_n = st.number_input("Top N labels", min_value=1, max_value=5, value=2)
-        threshold = st.slider(
-            "Confidence Threshold",
-            min_value=0.0,
-            max_value=1.0,
-            value=0.35,
-            step=0.05
-        )
+    with st.form("tag_form"):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            tag_text = st.text_area(
+                "Enter item text to tag",
+                placeholder="e.g., Grilled chicken shawarma with fresh vegetables",
+                height=100
+            )
+        with col2:
+            top_n = st.number_input("Top N labels", min_value=1, max_value=5, value=2)
+            threshold = st.slider(
+                "Confidence Threshold",
+                min_value=0.0,
+                max_value=1.0,
+                value=0.35,
+                step=0.05
+            )
+        
+        submitted = st.form_submit_button("Tag Item", type="primary")
     
-    if st.button("Tag Item", type="primary"):
+    if submitted:
         if not tag_text:
             st.warning("Please enter text to tag")
         else:
             with st.spinner("Tagging..."):
                 try:
-                    response = httpx.post(
-                        f"{API_URL}/tag",
-                        json={
-                            "text": tag_text,
-                            "top_n": top_n,
-                            "threshold": threshold,
-                        },
-                        timeout=30.0
-                    )
+                    data = api_tag(tag_text, top_n, threshold)
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.subheader("🍴 Cuisine")
+                        if data["cuisine"]:
+                            for label_data in data["cuisine"]:
+                                st.metric(
+                                    label_data["label"],
+                                    f"{label_data['score']:.3f}"
+                                )
+                        else:
+                            st.info("No cuisine labels above threshold")
                     
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.subheader("🍴 Cuisine")
-                            if data["cuisine"]:
-                                for label_data in data["cuisine"]:
-                                    st.metric(
-                                        label_data["label"],
-                                        f"{label_data['score']:.3f}"
-                                    )
-                            else:
-                                st.info("No cuisine labels above threshold")
-                        
-                        with col2:
-                            st.subheader("🥗 Diet")
-                            if data["diet"]:
-                                for label_data in data["diet"]:
-                                    st.metric(
-                                        label_data["label"],
-                                        f"{label_data['score']:.3f}"
-                                    )
-                            else:
-                                st.info("No diet labels above threshold")
-                    else:
-                        st.error(f"API Error: {response.text}")
+                    with col2:
+                        st.subheader("🥗 Diet")
+                        if data["diet"]:
+                            for label_data in data["diet"]:
+                                st.metric(
+                                    label_data["label"],
+                                    f"{label_data['score']:.3f}"
+                                )
+                        else:
+                            st.info("No diet labels above threshold")
                 
+                except APIError as e:
+                    st.error(f"API Error: {e}")
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
 
@@ -275,61 +369,52 @@ with tab3:
 with tab4:
     st.header("Offline Evaluation Metrics")
     
-    col1, col2 = st.columns([2, 2])
-    with col1:
-        eval_k = st.number_input("Evaluate at k", min_value=1, max_value=20, value=5)
-    with col2:
-        eval_mode = st.selectbox("Mode", ["hybrid", "sparse", "dense"], key="eval_mode")
+    with st.form("eval_form"):
+        col1, col2 = st.columns([2, 2])
+        with col1:
+            eval_k = st.number_input("Evaluate at k", min_value=1, max_value=20, value=5)
+        with col2:
+            eval_mode = st.selectbox("Mode", ["hybrid", "sparse", "dense"], key="eval_mode")
+        
+        submitted = st.form_submit_button("Run Evaluation", type="primary")
     
-    if st.button("Run Evaluation", type="primary"):
+    if submitted:
         with st.spinner("Evaluating on labeled queries..."):
             try:
-                response = httpx.get(
-                    f"{API_URL}/metrics/search",
-                    params={
-                        "k": eval_k,
-                        "mode": eval_mode,
-                        "alpha": alpha,
-                        "ef_search": ef_search,
-                    },
-                    timeout=120.0
-                )
+                data = api_eval(eval_k, eval_mode, alpha, ef_search)
+                
+                # Display aggregate metrics
+                col1, col2, col3 = st.columns(3)
+                col1.metric(f"Recall@{eval_k}", f"{data['recall_at_k']:.3f}")
+                col2.metric("MRR", f"{data['mrr']:.3f}")
+                col3.metric(f"Precision@{eval_k}", f"{data['precision_at_k']:.3f}")
                 
-                if response.status_code == 200:
-                    data = response.json()
+                st.divider()
+                
+                # Per-query table
+                if data["per_query"]:
+                    st.subheader("Per-Query Results")
                     
-                    # Display aggregate metrics
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric(f"Recall@{eval_k}", f"{data['recall_at_k']:.3f}")
-                    col2.metric("MRR", f"{data['mrr']:.3f}")
-                    col3.metric(f"Precision@{eval_k}", f"{data['precision_at_k']:.3f}")
+                    df = pd.DataFrame(data["per_query"])
+                    df = df.rename(columns={
+                        "query": "Query",
+                        "hit": "Hit",
+                        "first_rank": "First Hit Rank",
+                        "recall": "Recall"
+                    })
                     
-                    st.divider()
+                    st.dataframe(
+                        df,
+                        use_container_width=True,
+                        height=400
+                    )
                     
-                    # Per-query table
-                    if data["per_query"]:
-                        st.subheader("Per-Query Results")
-                        
-                        df = pd.DataFrame(data["per_query"])
-                        df = df.rename(columns={
-                            "query": "Query",
-                            "hit": "Hit",
-                            "first_rank": "First Hit Rank",
-                            "recall": "Recall"
-                        })
-                        
-                        st.dataframe(
-                            df,
-                            use_container_width=True,
-                            height=400
-                        )
-                        
-                        # Summary
-                        hit_rate = df["Hit"].mean()
-                        st.info(f"Hit Rate: {hit_rate:.1%} ({df['Hit'].sum()}/{len(df)} queries)")
-                else:
-                    st.error(f"API Error: {response.text}")
+                    # Summary
+                    hit_rate = df["Hit"].mean()
+                    st.info(f"Hit Rate: {hit_rate:.1%} ({df['Hit'].sum()}/{len(df)} queries)")
             
+            except APIError as e:
+                st.error(f"API Error: {e}")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
 
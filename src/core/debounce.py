@@ -0,0 +1,93 @@
+"""Debounced background execution for expensive rebuilds."""
+import threading
+import time
+from collections.abc import Callable
+
+# Debounce configuration
+DEBOUNCE_MS = 500.0
+
+
+class Debouncer:
+    """
+    Coalesce bursts of triggers into one background run of a function.
+    
+    Each trigger pushes the run back until no trigger has arrived for the
+    debounce window, so N back-to-back calls cost a single run.
+    """
+    
+    def __init__(self, fn: Callable[[], object], delay_ms: float = DEBOUNCE_MS):
+        """
+        Initialize debouncer.
+        
+        Args:
+            fn: Function to run (exceptions are caught and kept in last_error)
+            delay_ms: Quiet period after the last trigger before running
+        """
+        self.fn = fn
+        self.delay = delay_ms / 1000
+        self.version = 0  # Number of completed runs
+        self.last_error: Exception | None = None
+        self._started = 0
+        self._last_trigger = 0.0
+        self._pending = threading.Event()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+    
+    def trigger(self) -> int:
+        """
+        Schedule a run.
+        
+        Returns:
+            Version that will include everything committed before this call
+        """
+        with self._lock:
+            self._last_trigger = time.monotonic()
+            self._pending.set()
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return self._started + 1
+    
+    @property
+    def pending(self) -> bool:
+        """Whether a run is scheduled or in progress."""
+        return self._pending.is_set() or self.version < self._started
+    
+    def stop(self, timeout: float | None = None):
+        """Stop the background thread, dropping any run that has not started."""
+        with self._lock:
+            thread = self._thread
+            self._stopped = True
+            self._pending.set()
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._pending.clear()
+    
+    def _run(self):
+        """Wait for triggers, let them settle, then run fn."""
+        while True:
+            self._pending.wait()
+            if self._stopped:
+                return
+            
+            # Sleep until the debounce window after the last trigger closes
+            while (remaining := self._last_trigger + self.delay - time.monotonic()) > 0:
+                time.sleep(remaining)
+            if self._stopped:
+                return
+            
+            with self._lock:
+                self._pending.clear()
+                self._started += 1
+                version = self._started
+            
+            try:
+                self.fn()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            self.version = version
@@ -1,55 +1,324 @@
 """Item deduplication using embedding-based similarity and union-find clustering."""
 from collections import defaultdict
+from itertools import combinations
 from typing import Any
 
+import faiss
 import numpy as np
+from numba import njit
 
 from src.core.embeddings import batch_cosine_similarity
 
+# Blocks up to this size use an exact dense similarity matrix
+EXACT_MAX_ITEMS = 2000
+
+# Rows per similarity tile on the dense path (TILE_ROWS x N float32 at a time).
+# Tiles stay float32: NumPy has no BLAS kernel for int8 matmul, so int8 tiles
+# are far slower than SGEMM; compressed codes are used only for candidates
+# (1-bit signatures in _hamming_candidates)
+TILE_ROWS = 512
+
+# IVF range search parameters for larger blocks
+IVF_LISTS_PER_SQRT_N = 4
+IVF_NPROBE = 8
+
+# HNSW neighbor-list parameters (candidates are each item's top-k neighbors)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 100
+HNSW_NEIGHBORS = 50
+
+# Hamming radius slack (binomial standard deviations) for sign-bit candidates
+HAMMING_SLACK_SIGMAS = 3.0
+
 
 class UnionFind:
-    """Union-Find data structure for clustering."""
+    """
+    Union-Find over arbitrary hashable items, backed by int arrays.
     
-    def __init__(self):
-        self.parent = {}
-        self.rank = {}
+    Items are mapped to dense node indices on first sight; parent and rank
+    live in NumPy arrays and are updated by the same JIT-compiled find/union
+    kernels as the batch dedup path.
+    """
     
-    def find(self, x):
-        """Find root with path compression."""
-        if x not in self.parent:
-            self.parent[x] = x
-            self.rank[x] = 0
-            return x
-        
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])
+    def __init__(self, n: int = 0):
+        """
+        Initialize an empty disjoint set.
         
-        return self.parent[x]
+        Args:
+            n: Expected number of items (initial array capacity; grows as needed)
+        """
+        self.index: dict[Any, int] = {}  # item -> node
+        self.items: list[Any] = []  # node -> item
+        self.parent = np.arange(max(n, 16), dtype=np.int64)
+        self.rank = np.zeros(max(n, 16), dtype=np.int8)
+    
+    def _node(self, x) -> int:
+        """Node index of x, adding it as a singleton if unseen."""
+        node = self.index.get(x)
+        if node is None:
+            node = len(self.items)
+            if node == len(self.parent):
+                # Double the capacity; new slots are their own roots
+                parent = np.arange(2 * node, dtype=np.int64)
+                parent[:node] = self.parent
+                rank = np.zeros(2 * node, dtype=np.int8)
+                rank[:node] = self.rank
+                self.parent, self.rank = parent, rank
+            self.index[x] = node
+            self.items.append(x)
+        return node
+    
+    def _nodes(self, xs) -> np.ndarray:
+        """Node indices of many items."""
+        return np.fromiter((self._node(x) for x in xs), dtype=np.int64, count=len(xs))
+    
+    def find(self, x):
+        """Find root item with path compression (iterative, so long chains can't hit the recursion limit)."""
+        node = self._node(x)  # may grow parent, so resolve before passing it
+        return self.items[_find_root(self.parent, node)]
     
     def union(self, x, y):
         """Union by rank."""
-        root_x = self.find(x)
-        root_y = self.find(y)
-        
-        if root_x == root_y:
-            return
-        
-        # Union by rank
-        if self.rank[root_x] < self.rank[root_y]:
-            self.parent[root_x] = root_y
-        elif self.rank[root_x] > self.rank[root_y]:
-            self.parent[root_y] = root_x
-        else:
-            self.parent[root_y] = root_x
-            self.rank[root_x] += 1
+        a, b = self._node(x), self._node(y)
+        _union(self.parent, self.rank, a, b)
+    
+    def union_many(self, xs: list[Any], ys: list[Any]):
+        """Union xs[k] with ys[k] for every k in one compiled loop."""
+        a, b = self._nodes(xs), self._nodes(ys)
+        union_pairs(self.parent, self.rank, a, b)
     
     def get_clusters(self):
         """Get all clusters as dict of {cluster_id: [item_ids]}."""
-        clusters = defaultdict(list)
-        for item in list(self.parent.keys()):
-            root = self.find(item)
-            clusters[root].append(item)
-        return dict(clusters)
+        # Flatten every node onto its root, then group nodes by root
+        roots = find_roots(self.parent[:len(self.items)])
+        order = np.argsort(roots, kind="stable")
+        _, starts, counts = np.unique(roots[order], return_index=True, return_counts=True)
+        
+        items = self.items
+        clusters = {}
+        for start, count in zip(starts.tolist(), counts.tolist()):
+            members = order[start:start + count].tolist()
+            clusters[items[roots[members[0]]]] = [items[i] for i in members]
+        return clusters
+
+
+@njit(cache=True)
+def _find_root(parent, x):
+    """Find root of x in an int parent array, compressing the path."""
+    root = x
+    while parent[root] != root:
+        root = parent[root]
+    while parent[x] != root:
+        nxt = parent[x]
+        parent[x] = root
+        x = nxt
+    return root
+
+
+@njit(cache=True)
+def _union(parent, rank, x, y):
+    """Union the sets of x and y by rank."""
+    a = _find_root(parent, x)
+    b = _find_root(parent, y)
+    if a == b:
+        return
+    if rank[a] < rank[b]:
+        parent[a] = b
+    elif rank[a] > rank[b]:
+        parent[b] = a
+    else:
+        parent[b] = a
+        rank[a] += 1
+
+
+@njit(cache=True)
+def union_pairs(parent, rank, rows_i, rows_j):
+    """
+    Union index pairs in an array-backed disjoint set (by rank).
+    
+    Args:
+        parent: Parent index per node (N,), updated in place
+        rank: Rank per node (N,), updated in place
+        rows_i: First node of each pair
+        rows_j: Second node of each pair
+    """
+    for k in range(rows_i.shape[0]):
+        _union(parent, rank, rows_i[k], rows_j[k])
+
+
+@njit(cache=True)
+def union_tile(parent, rank, sim, sim_threshold, row0, nodes):
+    """
+    Union all above-threshold pairs of an upper-triangular similarity tile.
+    
+    Scans and unions in one native loop, so dense blocks never materialize
+    pair index arrays.
+    
+    Args:
+        parent: Parent index per node (N,), updated in place
+        rank: Rank per node (N,), updated in place
+        sim: Tile of similarities for block rows row0.. against columns row0..
+        sim_threshold: Similarity threshold
+        row0: Block-local index of the tile's first row (and first column)
+        nodes: Node index per block-local index
+    """
+    for r in range(sim.shape[0]):
+        for c in range(r + 1, sim.shape[1]):
+            if sim[r, c] >= sim_threshold:
+                _union(parent, rank, nodes[row0 + r], nodes[row0 + c])
+
+
+@njit(cache=True)
+def find_roots(parent):
+    """Root index of every node."""
+    roots = np.empty_like(parent)
+    for i in range(parent.shape[0]):
+        roots[i] = _find_root(parent, i)
+    return roots
+
+
+def similar_pairs(
+    embeddings: np.ndarray,
+    sim_threshold: float,
+    method: str = "hamming",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find all row pairs (i < j) with cosine similarity >= sim_threshold.
+    
+    Small inputs use an exact dense similarity matrix. Larger ones avoid
+    materializing N x N similarities by generating candidates first:
+    
+    - hamming: sign-bit signatures compared by Hamming distance (XOR +
+      popcount), then verified with exact cosine
+    - ivf: FAISS IVF range search over the nearest inverted lists
+    - hnsw: each item's HNSW_NEIGHBORS nearest neighbors, O(N * k) memory;
+      items with more duplicates than that are linked transitively
+    
+    Args:
+        embeddings: Embeddings (N x D)
+        sim_threshold: Similarity threshold
+        method: Candidate generation for large inputs ("hamming", "ivf" or "hnsw")
+    
+    Returns:
+        Tuple of (rows_i, rows_j) index arrays
+    """
+    vectors = _normalized(embeddings)
+    
+    if len(vectors) <= EXACT_MAX_ITEMS:
+        return _dense_pairs(vectors, sim_threshold)
+    
+    if method == "hamming":
+        rows_i, rows_j = _hamming_candidates(vectors, sim_threshold)
+    elif method == "ivf":
+        rows_i, rows_j = _ivf_candidates(vectors, sim_threshold)
+    elif method == "hnsw":
+        rows_i, rows_j = _hnsw_candidates(vectors)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    
+    # Verify candidates with exact cosine
+    sims = np.einsum("ij,ij->i", vectors[rows_i], vectors[rows_j])
+    keep = sims >= sim_threshold
+    return rows_i[keep], rows_j[keep]
+
+
+def _normalized(embeddings: np.ndarray) -> np.ndarray:
+    """Unit-norm float32 C-contiguous copy, so similarity is an SGEMM inner product."""
+    vectors = np.array(embeddings, dtype=np.float32, order="C")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _dense_tiles(vectors: np.ndarray):
+    """
+    Yield (row0, tile) upper-triangular similarity tiles.
+    
+    Each tile is (TILE_ROWS x remaining columns) and views one reused
+    buffer, so peak memory is O(N * TILE_ROWS) instead of O(N^2).
+    """
+    n = len(vectors)
+    buf = np.empty(min(n, TILE_ROWS) * n, dtype=np.float32)
+    for i0 in range(0, n, TILE_ROWS):
+        # Columns before i0 were covered by earlier tiles
+        rows = vectors[i0:i0 + TILE_ROWS]
+        out = buf[:len(rows) * (n - i0)].reshape(len(rows), n - i0)
+        yield i0, batch_cosine_similarity(rows, vectors[i0:], assume_normalized=True, out=out)
+
+
+def _dense_pairs(vectors: np.ndarray, sim_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Exact pairs from row tiles of the upper-triangular similarity matrix."""
+    pairs_i, pairs_j = [], []
+    for i0, sub in _dense_tiles(vectors):
+        rows, cols = np.nonzero(sub >= sim_threshold)
+        keep = cols > rows
+        pairs_i.append(rows[keep] + i0)
+        pairs_j.append(cols[keep] + i0)
+    
+    if not pairs_i:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def _range_pairs(lims: np.ndarray, labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Convert FAISS range search results to (i < j) row pairs."""
+    rows_i = np.repeat(np.arange(len(lims) - 1), np.diff(lims).astype(np.int64))
+    rows_j = labels.astype(np.int64)
+    keep = rows_i < rows_j
+    return rows_i[keep], rows_j[keep]
+
+
+def _hamming_candidates(vectors: np.ndarray, sim_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Candidate pairs whose sign-bit signatures are within a Hamming radius."""
+    dim = vectors.shape[1]
+    signatures = np.packbits(vectors > 0, axis=1)
+    
+    # A bit differs with probability angle / pi; allow a few standard
+    # deviations of slack so true duplicates are rarely missed
+    p = np.arccos(np.clip(sim_threshold, -1.0, 1.0)) / np.pi
+    radius = int(dim * p + HAMMING_SLACK_SIGMAS * np.sqrt(dim * p * (1 - p))) + 1
+    
+    index = faiss.IndexBinaryFlat(signatures.shape[1] * 8)
+    index.add(signatures)
+    lims, _, labels = index.range_search(signatures, radius)
+    return _range_pairs(lims, labels)
+
+
+def _ivf_candidates(vectors: np.ndarray, sim_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Candidate pairs from an IVF inner-product range search."""
+    n, dim = vectors.shape
+    
+    # k-means wants ~39 training points per list
+    nlist = max(1, min(int(IVF_LISTS_PER_SQRT_N * np.sqrt(n)), n // 39))
+    quantizer = faiss.IndexFlatIP(dim)
+    index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = IVF_NPROBE
+    
+    # FAISS keeps results strictly above the radius, so step just below it
+    radius = float(np.nextafter(np.float32(sim_threshold), np.float32(-np.inf)))
+    lims, _, labels = index.range_search(vectors, radius)
+    return _range_pairs(lims, labels)
+
+
+def _hnsw_candidates(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Candidate pairs from an HNSW top-k neighbor search."""
+    n, dim = vectors.shape
+    k = min(HNSW_NEIGHBORS + 1, n)  # +1: each item finds itself
+    
+    index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = max(64, k)
+    index.add(vectors)
+    _, labels = index.search(vectors, k)
+    
+    # Neighbor lists are one-directional; orient and dedupe pairs
+    rows_i = np.repeat(np.arange(n), k)
+    rows_j = labels.ravel().astype(np.int64)
+    keep = (rows_j >= 0) & (rows_i != rows_j)
+    pairs = np.unique(np.sort(np.stack([rows_i[keep], rows_j[keep]], axis=1), axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
 
 
 def deduplicate_items(
@@ -57,6 +326,7 @@ def deduplicate_items(
     embeddings: np.ndarray,
     sim_threshold: float = 0.82,
     blocks: list[Any] | None = None,
+    method: str = "hamming",
 ) -> dict[int, list[Any]]:
     """
     Find duplicate items using cosine similarity and union-find.
@@ -66,58 +336,49 @@ def deduplicate_items(
         embeddings: Item embeddings (N x D)
         sim_threshold: Similarity threshold for duplicates
         blocks: Optional blocking keys (e.g., city) to reduce comparisons
+        method: Candidate generation for large blocks (see similar_pairs)
     
     Returns:
         Dictionary of {cluster_id: [item_ids]}
     """
+    # Disjoint set over dense 0..N-1 indices; item IDs are only used at the end
     n = len(item_ids)
-    uf = UnionFind()
-    
-    # Initialize all items
-    for item_id in item_ids:
-        uf.find(item_id)
+    parent = np.arange(n, dtype=np.int64)
+    rank = np.zeros(n, dtype=np.int8)
     
     # If blocks provided, only compare within blocks
     if blocks:
         block_groups = defaultdict(list)
-        for i, (item_id, block) in enumerate(zip(item_ids, blocks)):
-            block_groups[block].append((i, item_id))
-        
-        # Process each block
-        for block_items in block_groups.values():
-            if len(block_items) < 2:
-                continue
-            
-            indices = [i for i, _ in block_items]
-            ids = [id_ for _, id_ in block_items]
-            block_embeddings = embeddings[indices]
-            
-            # Compute pairwise similarities
-            sim_matrix = batch_cosine_similarity(block_embeddings, block_embeddings)
-            
-            # Find pairs above threshold
-            for i in range(len(indices)):
-                for j in range(i + 1, len(indices)):
-                    if sim_matrix[i, j] >= sim_threshold:
-                        uf.union(ids[i], ids[j])
+        for i, block in enumerate(blocks):
+            block_groups[block].append(i)
+        groups = [np.asarray(indices) for indices in block_groups.values()]
     else:
-        # No blocking - compare all pairs (expensive for large datasets)
-        sim_matrix = batch_cosine_similarity(embeddings, embeddings)
+        # No blocking - compare all pairs
+        groups = [np.arange(len(item_ids))]
+    
+    for indices in groups:
+        if len(indices) < 2:
+            continue
         
-        for i in range(n):
-            for j in range(i + 1, n):
-                if sim_matrix[i, j] >= sim_threshold:
-                    uf.union(item_ids[i], item_ids[j])
-    
-    # Get clusters
-    clusters = uf.get_clusters()
-    
-    # Filter to only clusters with multiple items
-    dedup_clusters = {
-        cluster_id: items
-        for cluster_id, items in clusters.items()
-        if len(items) > 1
-    }
+        nodes = indices.astype(np.int64)
+        if len(indices) <= EXACT_MAX_ITEMS:
+            # Exact tiles are scanned and unioned natively, without pair arrays
+            for i0, sub in _dense_tiles(_normalized(embeddings[indices])):
+                union_tile(parent, rank, sub, np.float32(sim_threshold), i0, nodes)
+        else:
+            rows_i, rows_j = similar_pairs(embeddings[indices], sim_threshold, method)
+            union_pairs(parent, rank, nodes[rows_i], nodes[rows_j])
+    
+    # Group indices by root, keeping only clusters with multiple items
+    roots = find_roots(parent)
+    order = np.argsort(roots, kind="stable")
+    _, starts, counts = np.unique(roots[order], return_index=True, return_counts=True)
+    
+    # Cluster ID is the root item's ID
+    dedup_clusters = {}
+    for start, count in zip(starts[counts > 1].tolist(), counts[counts > 1].tolist()):
+        members = order[start:start + count].tolist()
+        dedup_clusters[item_ids[roots[members[0]]]] = [item_ids[i] for i in members]
     
     return dedup_clusters
 
@@ -132,14 +393,8 @@ def compute_dedup_pairs(clusters: dict[int, list[Any]]) -> list[tuple[Any, Any]]
     Returns:
         List of (item_a, item_b) duplicate pairs
     """
-    pairs = []
-    for items in clusters.values():
-        # Generate all pairs within cluster
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                pairs.append((items[i], items[j]))
-    
-    return pairs
+    # All pairs within each cluster, generated in C by combinations()
+    return [pair for items in clusters.values() for pair in combinations(items, 2)]
 
 
 def evaluate_dedup_pairs(
@@ -156,8 +411,8 @@ def evaluate_dedup_pairs(
     Returns:
         Dict with precision, recall, f1
     """
-    pred_set = {tuple(sorted(pair)) for pair in predicted_pairs}
-    true_set = {tuple(sorted(pair)) for pair in true_pairs}
+    pred_set = {(a, b) if a <= b else (b, a) for a, b in predicted_pairs}
+    true_set = {(a, b) if a <= b else (b, a) for a, b in true_pairs}
     
     tp = len(pred_set & true_set)
     fp = len(pred_set - true_set)
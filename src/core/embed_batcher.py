@@ -0,0 +1,106 @@
+"""Micro-batching front end for query encoding."""
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+import numpy as np
+
+from src.core.embeddings import encode_texts
+
+# Batching configuration
+MAX_BATCH = 32
+MAX_WAIT_MS = 5.0
+
+
+class EmbedBatcher:
+    """Coalesce concurrent single-text encode requests into one forward pass."""
+    
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], np.ndarray] | None = None,
+        executor: Executor | None = None,
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ):
+        """
+        Initialize batcher.
+        
+        Args:
+            encode_fn: Function mapping a list of texts to an (N x D) array
+                (default: encode_texts on already-normalized text)
+            executor: Executor used to run encode_fn off the event loop
+            max_batch: Maximum number of texts per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill
+        """
+        self.encode_fn = encode_fn or functools.partial(encode_texts, normalize=False)
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+    
+    async def start(self):
+        """Start the background batching loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the batching loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Encode a single text, sharing the forward pass with concurrent callers.
+        
+        Args:
+            text: Normalized text to encode (see normalize_cached)
+        
+        Returns:
+            Embedding vector (D,)
+        """
+        if self._task is None:
+            await self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches and resolve per-request futures."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            # Accumulate until the batch is full or the wait window closes
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(self.executor, self.encode_fn, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
@@ -12,15 +12,97 @@ from src.core.normalize import normalize_batch
 MODEL_NAME = os.getenv("MODEL_NAME", "intfloat/multilingual-e5-small")
 EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
 
+# Optional ONNX export of MODEL_NAME (e.g. int8-quantized) served by onnxruntime
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH")
+ONNX_MAX_LENGTH = 512
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime encoder with the SentenceTransformer.encode interface.
+    
+    Mean-pools the last hidden state over the attention mask, matching the
+    e5 pooling used by sentence-transformers.
+    """
+    
+    def __init__(self, model_path: str, tokenizer_name: str):
+        """
+        Initialize encoder.
+        
+        Args:
+            model_path: Path to the exported .onnx model
+            tokenizer_name: Hugging Face name of the matching tokenizer
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX_MODEL_PATH requires onnxruntime: pip install onnxruntime") from e
+        from transformers import AutoTokenizer
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = True,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """
+        Encode texts to an (N x D) float32 array.
+        
+        Texts are batched longest-first (as sentence-transformers does), so
+        each batch pads to similar lengths; rows are returned in input order.
+        """
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+        
+        batches = []
+        for start in range(0, len(sorted_texts), batch_size):
+            tokens = self.tokenizer(
+                sorted_texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=ONNX_MAX_LENGTH,
+                return_tensors="np",
+            )
+            inputs = {name: value for name, value in tokens.items() if name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            
+            # Mean pooling over non-padding tokens
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+        
+        embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.vstack(batches)
+        if normalize_embeddings:
+            l2_normalize_inplace(embeddings)
+        return embeddings
+
 
 @functools.lru_cache(maxsize=1)
-def get_model() -> SentenceTransformer:
+def get_model() -> SentenceTransformer | OnnxEncoder:
     """
-    Load and cache the sentence transformer model.
+    Load and cache the embedding model.
+    
+    Uses the ONNX Runtime encoder when ONNX_MODEL_PATH is set, otherwise the
+    PyTorch SentenceTransformer.
     
     Returns:
-        Loaded SentenceTransformer model
+        Loaded model
     """
+    if ONNX_MODEL_PATH:
+        print(f"Loading ONNX model: {ONNX_MODEL_PATH}")
+        return OnnxEncoder(ONNX_MODEL_PATH, MODEL_NAME)
+    
     print(f"Loading model: {MODEL_NAME}")
     model = SentenceTransformer(MODEL_NAME)
     return model
@@ -47,7 +129,7 @@ def encode_texts(
         Array of embeddings (N x D)
     """
     if not texts:
-        return np.array([]).reshape(0, EMBEDDING_DIM)
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
     
     # Normalize text if requested
     if normalize:
@@ -63,7 +145,8 @@ def encode_texts(
         convert_to_numpy=True,
     )
     
-    return np.asarray(embeddings, dtype="float32")
+    # No-op for the usual float32 C-contiguous output; copies only otherwise
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
 
 
 def encode_single(text: str, normalize: bool = True) -> np.ndarray:
@@ -71,35 +154,90 @@ def encode_single(text: str, normalize: bool = True) -> np.ndarray:
     return encode_texts([text], normalize=normalize)[0]
 
 
-def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+def embedding_to_bytes(embedding: np.ndarray) -> bytes:
+    """Serialize an embedding as raw little-endian float32 bytes."""
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def embedding_from_row(raw: bytes | None, vector: Any = None) -> np.ndarray:
+    """
+    Decode an embedding fetched as (embedding_bytes, embedding).
+    
+    Args:
+        raw: Raw float32 bytes (zero-copy view via np.frombuffer)
+        vector: Fallback vector value for rows without raw bytes
+    
+    Returns:
+        Embedding vector (D,)
+    """
+    if raw is not None:
+        return np.frombuffer(raw, dtype="<f4")
+    return np.asarray(vector, dtype=np.float32)
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float | np.ndarray:
     """
     Compute cosine similarity between two vectors.
     
+    If either input is a stack of vectors (2D), all pairs are scored with
+    one matrix product via batch_cosine_similarity.
+    
     Args:
-        a: Vector 1
-        b: Vector 2
+        a: Vector 1 (D,) or vectors (N x D)
+        b: Vector 2 (D,) or vectors (M x D)
     
     Returns:
-        Cosine similarity [-1, 1]
+        Cosine similarity [-1, 1], or an (N x M) matrix for 2D inputs
     """
     if a.ndim == 1 and b.ndim == 1:
         return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-9))
-    raise ValueError("Inputs must be 1D vectors")
+    if a.ndim <= 2 and b.ndim <= 2:
+        return batch_cosine_similarity(np.atleast_2d(a), np.atleast_2d(b))
+    raise ValueError("Inputs must be 1D vectors or 2D arrays of vectors")
+
+
+def l2_normalize_inplace(x: np.ndarray) -> np.ndarray:
+    """
+    Scale the rows of x to unit L2 norm in place (zero rows stay zero).
+    
+    Writes back into x instead of allocating a second (N x D) array.
+    
+    Args:
+        x: Float array (N x D) or vector (D,)
+    
+    Returns:
+        x itself
+    """
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    np.divide(x, norms, out=x, where=norms > 0)
+    return x
 
 
-def batch_cosine_similarity(queries: np.ndarray, docs: np.ndarray) -> np.ndarray:
+def batch_cosine_similarity(
+    queries: np.ndarray,
+    docs: np.ndarray,
+    assume_normalized: bool = False,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
     """
     Compute pairwise cosine similarities.
     
     Args:
         queries: Query embeddings (N x D)
         docs: Document embeddings (M x D)
+        assume_normalized: Skip normalization for unit-norm inputs
+            (e.g. encode_texts output with normalize=True)
+        out: Optional preallocated (N x M) result buffer, reused across calls
     
     Returns:
         Similarity matrix (N x M)
     """
-    # Normalize if not already
-    queries_norm = queries / (np.linalg.norm(queries, axis=1, keepdims=True) + 1e-9)
-    docs_norm = docs / (np.linalg.norm(docs, axis=1, keepdims=True) + 1e-9)
+    if assume_normalized:
+        return np.matmul(queries, docs.T, out=out)
+    
+    # One normalized copy of each input (the caller's arrays are untouched)
+    dtype = np.result_type(queries.dtype, docs.dtype, np.float32)
+    queries_norm = l2_normalize_inplace(np.array(queries, dtype=dtype))
+    docs_norm = l2_normalize_inplace(np.array(docs, dtype=dtype))
     
-    return queries_norm @ docs_norm.T
+    return np.matmul(queries_norm, docs_norm.T, out=out)
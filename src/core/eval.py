@@ -3,6 +3,12 @@ from typing import Any
 
 import numpy as np
 
+# Rank discounts 1 / log2(rank + 1) and their prefix sums (ideal DCG), as
+# Python lists so per-item lookups avoid NumPy scalar dispatch
+NDCG_MAX_RANK = 1024
+_INV_LOG2 = (1.0 / np.log2(np.arange(2, NDCG_MAX_RANK + 2))).tolist()
+_IDCG = np.cumsum(_INV_LOG2).tolist()
+
 
 def recall_at_k(
     predictions: list[list[Any]],
@@ -135,23 +141,47 @@ def ndcg_at_k(
         true_set = set(true)
         if not true_set:
             continue
-        
-        # DCG
-        dcg = 0.0
-        for i, item in enumerate(pred[:k], start=1):
-            if item in true_set:
-                dcg += 1.0 / np.log2(i + 1)
-        
-        # IDCG (perfect ranking)
-        idcg = sum(1.0 / np.log2(i + 1) for i in range(1, min(len(true_set), k) + 1))
-        
-        # NDCG
-        ndcg = dcg / idcg if idcg > 0 else 0.0
-        ndcgs.append(ndcg)
+        ndcgs.append(_ndcg(pred, true_set, k))
     
     return float(np.mean(ndcgs)) if ndcgs else 0.0
 
 
+def _ndcg(pred: list[Any], true_set: set, k: int) -> float:
+    """NDCG@k for a single query with a non-empty relevant set."""
+    if k <= 0:
+        return 0.0
+    if k > NDCG_MAX_RANK:
+        discounts = (1.0 / np.log2(np.arange(2, k + 2))).tolist()
+        ideal = np.cumsum(discounts).tolist()
+    else:
+        discounts, ideal = _INV_LOG2, _IDCG
+    
+    # DCG
+    dcg = sum(discounts[i] for i, item in enumerate(pred[:k]) if item in true_set)
+    
+    # IDCG (perfect ranking)
+    idcg = ideal[min(len(true_set), k) - 1]
+    
+    return dcg / idcg
+
+
+def _query_metrics(pred: list[Any], true_set: set, ks: list[int]) -> dict[str, float]:
+    """All evaluate_search metrics for a single query with a non-empty relevant set."""
+    metrics = {"mrr": 0.0}
+    for rank, item in enumerate(pred, start=1):
+        if item in true_set:
+            metrics["mrr"] = 1.0 / rank
+            break
+    
+    for k in ks:
+        hits = len(set(pred[:k]) & true_set)
+        metrics[f"recall@{k}"] = hits / len(true_set)
+        metrics[f"precision@{k}"] = hits / k if k > 0 else 0.0
+        metrics[f"ndcg@{k}"] = _ndcg(pred, true_set, k)
+    
+    return metrics
+
+
 def evaluate_search(
     predictions: list[list[Any]],
     ground_truth: list[list[Any]],
@@ -168,14 +198,21 @@ def evaluate_search(
     Returns:
         Dict of metrics
     """
-    metrics = {"mrr": mean_reciprocal_rank(predictions, ground_truth)}
+    if len(predictions) != len(ground_truth):
+        raise ValueError("Predictions and ground truth must have same length")
     
-    for k in ks:
-        metrics[f"recall@{k}"] = recall_at_k(predictions, ground_truth, k)
-        metrics[f"precision@{k}"] = precision_at_k(predictions, ground_truth, k)
-        metrics[f"ndcg@{k}"] = ndcg_at_k(predictions, ground_truth, k)
+    # One pass per query (and one set(true)) for every metric
+    per_query = []
+    for pred, true in zip(predictions, ground_truth):
+        true_set = set(true)
+        if true_set:
+            per_query.append(_query_metrics(pred, true_set, ks))
     
-    return metrics
+    names = ["mrr"] + [f"{name}@{k}" for k in ks for name in ("recall", "precision", "ndcg")]
+    return {
+        name: float(np.mean([metrics[name] for metrics in per_query])) if per_query else 0.0
+        for name in names
+    }
 
 
 def per_query_metrics(
@@ -202,23 +239,26 @@ def per_query_metrics(
     results = []
     for qid, pred, true in zip(query_ids, predictions, ground_truth):
         true_set = set(true)
-        pred_k = pred[:k]
-        pred_set = set(pred_k)
         
-        # Find first hit
+        # One pass: first hit rank and distinct relevant items in the top k
         first_hit_rank = None
+        hits_k = set()
         for rank, item in enumerate(pred, start=1):
-            if item in true_set:
-                first_hit_rank = rank
+            if rank > k and first_hit_rank is not None:
                 break
+            if item in true_set:
+                if first_hit_rank is None:
+                    first_hit_rank = rank
+                if rank <= k:
+                    hits_k.add(item)
         
         results.append({
             "query_id": qid,
             "num_relevant": len(true_set),
-            "hit": 1 if (pred_set & true_set) else 0,
+            "hit": 1 if hits_k else 0,
             "first_hit_rank": first_hit_rank,
-            "recall": len(pred_set & true_set) / len(true_set) if true_set else 0.0,
-            "precision": len(pred_set & true_set) / k if k > 0 else 0.0,
+            "recall": len(hits_k) / len(true_set) if true_set else 0.0,
+            "precision": len(hits_k) / k if k > 0 else 0.0,
         })
     
     return results
@@ -1,54 +1,116 @@
 """Hybrid retrieval combining sparse and dense methods."""
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+from numba import njit
+
+from src.core.normalize import normalize_cached
+from src.core.topk import topk
+
+# Reciprocal Rank Fusion damping constant (standard value from the RRF paper)
+RRF_K = 60
+
+# Runs the sparse and dense retrievers side by side (both release the GIL
+# in native scoring code)
+_RETRIEVAL_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mis-hybrid")
+
+
+@njit(cache=True)
+def _accumulate_normalized(out, codes, scores, weight):
+    """Min-max normalize scores and add them, weighted, into out[codes]."""
+    if scores.shape[0] == 0:
+        return
+    lo = scores.min()
+    span = scores.max() - lo
+    for i in range(codes.shape[0]):
+        norm = 1.0 if span < 1e-9 else (scores[i] - lo) / span
+        out[codes[i]] += weight * norm
+
 
-from src.core.utils import min_max_normalize
+@njit(cache=True)
+def _fuse_scores(sparse_codes, sparse_scores, dense_codes, dense_scores, n_ids, alpha):
+    """Weighted sum of min-max normalized sparse and dense scores."""
+    out = np.zeros(n_ids, dtype=np.float64)
+    _accumulate_normalized(out, sparse_codes, sparse_scores, alpha)
+    _accumulate_normalized(out, dense_codes, dense_scores, 1.0 - alpha)
+    return out
+
+
+@njit(cache=True)
+def _fuse_ranks(sparse_codes, dense_codes, n_ids, alpha, rrf_k):
+    """Weighted Reciprocal Rank Fusion: sum of weight / (rrf_k + rank)."""
+    out = np.zeros(n_ids, dtype=np.float64)
+    for rank in range(sparse_codes.shape[0]):
+        out[sparse_codes[rank]] += alpha / (rrf_k + rank + 1)
+    for rank in range(dense_codes.shape[0]):
+        out[dense_codes[rank]] += (1.0 - alpha) / (rrf_k + rank + 1)
+    return out
 
 
 def combine_scores(
     sparse_scores: list[tuple[any, float]],
     dense_scores: list[tuple[any, float]],
     alpha: float = 0.4,
+    k: int | None = None,
+    fusion: str = "minmax",
+    rrf_k: int = RRF_K,
 ) -> list[tuple[any, float]]:
     """
     Combine sparse and dense scores using weighted sum.
     
+    With fusion="rrf", uses Reciprocal Rank Fusion instead: each list
+    contributes weight / (rrf_k + rank), so raw score scales (BM25 vs cosine)
+    need no normalization. Both lists must be ordered best first.
+    
     Args:
         sparse_scores: List of (id, score) from sparse retrieval
         dense_scores: List of (id, score) from dense retrieval
         alpha: Weight for sparse (0-1); dense gets (1-alpha)
+        k: Number of results to keep (all if None)
+        fusion: "minmax" (normalized weighted sum) or "rrf"
+        rrf_k: RRF damping constant
     
     Returns:
-        Combined and sorted list of (id, score)
+        Combined list of (id, score), best first
     """
-    # Normalize both score lists
-    sparse_dict = {id_: score for id_, score in sparse_scores}
-    dense_dict = {id_: score for id_, score in dense_scores}
-    
-    # Get all unique IDs
-    all_ids = set(sparse_dict.keys()) | set(dense_dict.keys())
+    if not sparse_scores and not dense_scores:
+        return []
     
-    # Normalize scores
-    if sparse_scores:
-        sparse_vals = list(sparse_dict.values())
-        sparse_normalized = min_max_normalize(sparse_vals)
-        sparse_dict = dict(zip(sparse_dict.keys(), sparse_normalized))
+    # Hash IDs from both lists onto dense integer codes (first-seen order),
+    # keeping the original ID objects
+    id_codes = {}
+    n_sparse = len(sparse_scores)
+    n_dense = len(dense_scores)
+    sparse_codes = np.fromiter(
+        (id_codes.setdefault(id_, len(id_codes)) for id_, _ in sparse_scores),
+        dtype=np.int64,
+        count=n_sparse,
+    )
+    dense_codes = np.fromiter(
+        (id_codes.setdefault(id_, len(id_codes)) for id_, _ in dense_scores),
+        dtype=np.int64,
+        count=n_dense,
+    )
     
-    if dense_scores:
-        dense_vals = list(dense_dict.values())
-        dense_normalized = min_max_normalize(dense_vals)
-        dense_dict = dict(zip(dense_dict.keys(), dense_normalized))
+    if fusion == "rrf":
+        combined = _fuse_ranks(sparse_codes, dense_codes, len(id_codes), float(alpha), float(rrf_k))
+    elif fusion == "minmax":
+        combined = _fuse_scores(
+            sparse_codes,
+            np.fromiter((s for _, s in sparse_scores), dtype=np.float64, count=n_sparse),
+            dense_codes,
+            np.fromiter((s for _, s in dense_scores), dtype=np.float64, count=n_dense),
+            len(id_codes),
+            float(alpha),
+        )
+    else:
+        raise ValueError(f"Unknown fusion method: {fusion}")
     
-    # Combine scores
-    combined = {}
-    for id_ in all_ids:
-        s = sparse_dict.get(id_, 0.0)
-        d = dense_dict.get(id_, 0.0)
-        combined[id_] = alpha * s + (1 - alpha) * d
+    # Select the top-k by combined score
+    order = topk(combined, len(combined) if k is None else k)
+    unique_ids = list(id_codes)
     
-    # Sort by combined score
-    result = sorted(combined.items(), key=lambda x: x[1], reverse=True)
-    
-    return result
+    return [(unique_ids[i], score) for i, score in zip(order.tolist(), combined[order].tolist())]
 
 
 def hybrid_search(
@@ -59,6 +121,8 @@ def hybrid_search(
     alpha: float = 0.4,
     sparse_k: int = 100,
     dense_k: int = 100,
+    normalize: bool = True,
+    fusion: str = "minmax",
 ) -> list[tuple[any, float]]:
     """
     Perform hybrid search.
@@ -71,16 +135,19 @@ def hybrid_search(
         alpha: Sparse weight
         sparse_k: Number of sparse candidates
         dense_k: Number of dense candidates
+        normalize: Normalize the raw query once for both retrievers
+        fusion: Score fusion method ("minmax" or "rrf", see combine_scores)
     
     Returns:
         Top-k results after hybrid scoring
     """
-    # Get candidates from both retrievers
-    sparse_results = sparse_retriever.search(query, k=sparse_k)
-    dense_results = dense_retriever.search(query, k=dense_k)
+    if normalize:
+        query = normalize_cached(query)
     
-    # Combine scores
-    combined = combine_scores(sparse_results, dense_results, alpha=alpha)
+    # Get candidates from both retrievers concurrently
+    sparse_future = _RETRIEVAL_POOL.submit(sparse_retriever.search, query, k=sparse_k)
+    dense_results = dense_retriever.search(query, k=dense_k)
+    sparse_results = sparse_future.result()
     
-    # Return top-k
-    return combined[:k]
+    # Combine scores and keep the top-k
+    return combine_scores(sparse_results, dense_results, alpha=alpha, k=k, fusion=fusion)
@@ -0,0 +1,111 @@
+"""Columnar (Arrow-backed) store for menu items."""
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Low-cardinality string fields stored as uint16 codes into a small dictionary
+DICTIONARY_FIELDS = ("outlet_name", "city")
+DICTIONARY_TYPE = pa.dictionary(pa.uint16(), pa.string())
+
+
+class ItemTable(Mapping):
+    """
+    Items held as one Arrow table, keyed by item_id.
+    
+    Behaves like the old dict-of-dicts (``items[item_id]`` returns a dict),
+    while search result assembly gathers whole columns with take().
+    """
+    
+    def __init__(self, table: pa.Table | None = None):
+        """
+        Initialize store.
+        
+        Args:
+            table: Arrow table with an item_id column (empty if None)
+        """
+        self.table = table if table is not None else pa.table({"item_id": pa.array([], pa.string())})
+        ids = self.table.column("item_id").to_pylist()
+        self.id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+    
+    @classmethod
+    def from_items(cls, items: dict[Any, dict]) -> "ItemTable":
+        """Build from a {item_id: item} dict."""
+        if not items:
+            return cls()
+        
+        # Union of fields across items (from_pylist would only use the first row's)
+        fields = dict.fromkeys(field for item in items.values() for field in item)
+        fields.pop("item_id", None)
+        columns = {"item_id": list(items)}
+        for field in fields:
+            values = [item.get(field) for item in items.values()]
+            if field in DICTIONARY_FIELDS:
+                encoded = pa.array(values, pa.string()).dictionary_encode()
+                if len(encoded.dictionary) <= np.iinfo(np.uint16).max:
+                    encoded = encoded.cast(DICTIONARY_TYPE)
+                columns[field] = encoded
+            else:
+                columns[field] = values
+        return cls(pa.table(columns))
+    
+    @classmethod
+    def read_parquet(cls, path: str | Path) -> "ItemTable":
+        """Load from a Parquet file (memory-mapped)."""
+        return cls(pq.read_table(path, memory_map=True))
+    
+    def write_parquet(self, path: str | Path):
+        """Save to a Parquet file."""
+        pq.write_table(self.table, path)
+    
+    def rows(self, item_ids: list) -> np.ndarray:
+        """Map item IDs to row indices (-1 for unknown IDs)."""
+        id_to_row = self.id_to_row
+        return np.fromiter(
+            (id_to_row.get(item_id, -1) for item_id in item_ids),
+            dtype=np.int64,
+            count=len(item_ids),
+        )
+    
+    def take(self, rows: np.ndarray, fields: list[str]) -> dict[str, list]:
+        """
+        Gather fields for the given rows, one vectorized take per column.
+        
+        Args:
+            rows: Row indices
+            fields: Column names (missing columns yield None values)
+        
+        Returns:
+            Dict of {field: [value per row]}
+        """
+        indices = pa.array(rows, type=pa.int64())
+        columns = {}
+        for field in fields:
+            if field in self.table.column_names:
+                columns[field] = self.table.column(field).take(indices).to_pylist()
+            else:
+                columns[field] = [None] * len(rows)
+        return columns
+    
+    def __getitem__(self, item_id: Any) -> dict:
+        return self.table.slice(self.id_to_row[item_id], 1).to_pylist()[0]
+    
+    def __iter__(self) -> Iterator:
+        return iter(self.id_to_row)
+    
+    def __len__(self) -> int:
+        return self.table.num_rows
+    
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self.id_to_row
+    
+    def items(self):
+        """Iterate (item_id, item) pairs, converting the table once."""
+        return zip(self.id_to_row, self.table.to_pylist())
+    
+    def values(self):
+        """Iterate items as dicts, converting the table once."""
+        return iter(self.table.to_pylist())
@@ -1,14 +1,29 @@
 """Text normalization utilities for multilingual search (EN/AR)."""
 import re
+from functools import lru_cache
 
 # Arabic diacritics pattern
 AR_DIAC = re.compile(r'[\u0617-\u061A\u064B-\u0652]')
 
-# Alef variants
-ALEF = re.compile(r'[\u0622\u0623\u0625]')
+# Single-character substitutions applied in one translate() pass:
+# - Arabic-Indic digits to Western
+# - Alef variants (U+0622, U+0623, U+0625) to base Alef (U+0627)
+# - Alif Maqsura (U+0649) to Yaa (U+064A)
+AR_CHARS = str.maketrans({
+    **dict(zip('٠١٢٣٤٥٦٧٨٩', '0123456789')),
+    'آ': 'ا',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ى': 'ي',
+})
 
-# Arabic-Indic to Western digits
-AR_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+# Same substitutions plus diacritic deletion (the AR_DIAC ranges), so the
+# whole Arabic normalization is a single translate() pass
+AR_CHARS_NO_DIAC = {
+    **AR_CHARS,
+    **dict.fromkeys(range(0x0617, 0x061A + 1)),
+    **dict.fromkeys(range(0x064B, 0x0652 + 1)),
+}
 
 
 def normalize_text(s: str, remove_diacritics: bool = True) -> str:
@@ -16,12 +31,12 @@ def normalize_text(s: str, remove_diacritics: bool = True) -> str:
     Normalize text for search (EN/AR).
     
     Steps:
-    - Lowercase
     - Convert Arabic-Indic digits to Western
     - Remove Arabic diacritics (optional)
     - Normalize Alef variants
     - Normalize Alif Maqsura to Yaa
-    - Strip whitespace
+    - Collapse and strip whitespace
+    - Lowercase
     
     Args:
         s: Input text
@@ -33,25 +48,28 @@ def normalize_text(s: str, remove_diacritics: bool = True) -> str:
     if not s:
         return ""
     
-    # Lowercase and strip
-    s = s.strip().lower()
-    
-    # Convert Arabic-Indic digits to Western
-    s = s.translate(AR_DIGITS)
-    
-    # Remove diacritics
-    if remove_diacritics:
-        s = AR_DIAC.sub('', s)
-    
-    # Normalize Alef variants to base Alef (U+0627)
-    s = ALEF.sub('\u0627', s)
+    # Pure ASCII text has nothing Arabic to normalize
+    if s.isascii():
+        return " ".join(s.split()).lower()
     
-    # Normalize Alif Maqsura (U+0649) to Yaa (U+064A)
-    s = s.replace('\u0649', '\u064A')
+    # Digits, Alef variants, Alif Maqsura and diacritics in a single pass
+    s = s.translate(AR_CHARS_NO_DIAC if remove_diacritics else AR_CHARS)
     
-    return s
+    # Collapse whitespace, strip and lowercase
+    return " ".join(s.split()).lower()
+
+
+@lru_cache(maxsize=8192)
+def normalize_cached(s: str, remove_diacritics: bool = True) -> str:
+    """Memoized normalize_text for inputs that repeat (hot queries, templates)."""
+    return normalize_text(s, remove_diacritics)
 
 
 def normalize_batch(texts: list[str], remove_diacritics: bool = True) -> list[str]:
-    """Normalize a batch of texts."""
+    """
+    Normalize a batch of texts.
+    
+    Stays per-item: translate() cost is per character, so joining the batch
+    into one string saves nothing and loses the per-item ASCII fast path.
+    """
     return [normalize_text(t, remove_diacritics) for t in texts]
@@ -2,24 +2,101 @@
 from collections import defaultdict
 from typing import Any
 
+import faiss
 import numpy as np
 
-from src.core.embeddings import batch_cosine_similarity
+from src.core.topk import topk
+
+# Rows per similarity tile (4096 x 384 fp32 stays cache-resident)
+SCORE_TILE_ROWS = 4096
 
 
 class ContentBasedRecommender:
     """Content-based recommender using item embeddings."""
     
     def __init__(self):
-        self.item_ids: list[Any] = []
+        self.item_ids: np.ndarray = np.empty(0, dtype=np.int64)
         self.item_embeddings: np.ndarray | None = None
+        self.id_to_row: dict[Any, int] = {}
         self.user_profiles: dict[str, np.ndarray] = {}
         self.item_popularity: dict[Any, int] = defaultdict(int)
+        # Popularity counts aligned with item rows, and their running max
+        self._pop_vec: np.ndarray = np.zeros(0, dtype=np.float32)
+        self._pop_max = 0.0
     
-    def set_items(self, item_ids: list[Any], embeddings: np.ndarray):
-        """Set item catalog."""
-        self.item_ids = item_ids
+    def set_items(
+        self,
+        item_ids: list[Any] | np.ndarray,
+        embeddings: np.ndarray,
+        normalized: bool = False,
+    ):
+        """
+        Set item catalog.
+        
+        Embeddings are held as L2-normalized float16, so cosine similarity is
+        a plain inner product at query time.
+        
+        Args:
+            item_ids: Item IDs, parallel to embedding rows
+            embeddings: Item embeddings (N x D)
+            normalized: Embeddings are already L2-normalized float16 (e.g. a
+                np.memmap cache); they are used as-is without a copy
+        """
+        if not normalized:
+            vectors = np.array(embeddings, dtype=np.float32, order="C")
+            faiss.normalize_L2(vectors)
+            embeddings = vectors.astype(np.float16)
+        
+        self.item_ids = np.asarray(item_ids)
         self.item_embeddings = embeddings
+        self.id_to_row = {item_id: row for row, item_id in enumerate(self.item_ids.tolist())}
+        
+        # Carry existing popularity counts over to the new rows
+        self._pop_vec = np.zeros(len(self.item_ids), dtype=np.float32)
+        for item_id, count in self.item_popularity.items():
+            row = self.id_to_row.get(item_id)
+            if row is not None:
+                self._pop_vec[row] = count
+        self._pop_max = float(self._pop_vec.max()) if len(self._pop_vec) else 0.0
+    
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Inner products of a normalized query with every item (one GEMV per tile)."""
+        query = query.astype(np.float32)
+        scores = np.empty(len(self.item_embeddings), dtype=np.float32)
+        for start in range(0, len(scores), SCORE_TILE_ROWS):
+            tile = self.item_embeddings[start:start + SCORE_TILE_ROWS].astype(np.float32)
+            np.matmul(tile, query, out=scores[start:start + SCORE_TILE_ROWS])
+        return scores
+    
+    def _scores_batch(self, queries: np.ndarray) -> np.ndarray:
+        """Inner products of Q queries with every item (Q x N), one GEMM per tile."""
+        queries = queries.astype(np.float32)
+        scores = np.empty((len(queries), len(self.item_embeddings)), dtype=np.float32)
+        for start in range(0, scores.shape[1], SCORE_TILE_ROWS):
+            tile = self.item_embeddings[start:start + SCORE_TILE_ROWS].astype(np.float32)
+            scores[:, start:start + SCORE_TILE_ROWS] = queries @ tile.T
+        return scores
+    
+    def _popularity_scores(self, popularity_boost: float) -> np.ndarray | None:
+        """Popularity boost per item row (None when there is nothing to add)."""
+        if popularity_boost <= 0 or self._pop_max == 0:
+            return None
+        return self._pop_vec * np.float32(popularity_boost / self._pop_max)
+    
+    def _top_rows(
+        self,
+        similarities: np.ndarray,
+        k: int,
+        exclude_items: list[Any] | None = None,
+    ) -> list[tuple[Any, float]]:
+        """Mask excluded items and take the top k of a score row."""
+        for item_id in exclude_items or []:
+            row = self.id_to_row.get(item_id)
+            if row is not None:
+                similarities[row] = -np.inf
+        
+        rows = [row for row in topk(similarities, k) if similarities[row] != -np.inf]
+        return list(zip(self.item_ids[rows].tolist(), similarities[rows].tolist()))
     
     def update_user_profile(
         self,
@@ -38,22 +115,28 @@ class ContentBasedRecommender:
         if self.item_embeddings is None:
             return
         
-        # Find embeddings for interacted items
-        interacted_embeddings = []
+        # Find rows for interacted items (dict lookups, no list scans)
+        rows = []
         for item_id in interacted_item_ids:
-            if item_id in self.item_ids:
-                idx = self.item_ids.index(item_id)
-                interacted_embeddings.append(self.item_embeddings[idx])
+            row = self.id_to_row.get(item_id)
+            if row is not None:
+                rows.append(row)
                 self.item_popularity[item_id] += 1
         
-        if not interacted_embeddings:
+        if not rows:
             return
         
-        # User profile = mean of interacted item embeddings
-        user_profile = np.mean(interacted_embeddings, axis=0)
+        rows = np.asarray(rows, dtype=np.int64)
+        np.add.at(self._pop_vec, rows, 1)
+        self._pop_max = max(self._pop_max, float(self._pop_vec[rows].max()))
+        
+        # User profile = mean of interacted item embeddings (one gather)
+        interacted = self.item_embeddings[rows].astype(np.float32)
+        user_profile = interacted.mean(axis=0, keepdims=True)
         
         # Normalize
-        user_profile = user_profile / (np.linalg.norm(user_profile) + 1e-9)
+        faiss.normalize_L2(user_profile)
+        user_profile = user_profile[0]
         
         self.user_profiles[user_id] = user_profile
     
@@ -83,28 +166,59 @@ class ContentBasedRecommender:
         user_profile = self.user_profiles[user_id]
         
         # Compute similarities
-        similarities = batch_cosine_similarity(
-            user_profile.reshape(1, -1),
-            self.item_embeddings
-        )[0]
+        similarities = self._scores(user_profile)
         
         # Apply popularity boost
-        if popularity_boost > 0:
-            max_pop = max(self.item_popularity.values()) if self.item_popularity else 1
-            for i, item_id in enumerate(self.item_ids):
-                pop_score = self.item_popularity.get(item_id, 0) / max_pop
-                similarities[i] += popularity_boost * pop_score
+        boost = self._popularity_scores(popularity_boost)
+        if boost is not None:
+            similarities += boost
         
-        # Sort and filter
-        results = []
-        exclude_set = set(exclude_items or [])
+        # Filter and take the top k
+        return self._top_rows(similarities, k, exclude_items)
+    
+    def recommend_for_users(
+        self,
+        user_ids: list[str],
+        k: int = 10,
+        exclude_map: dict[str, list[Any]] | None = None,
+        popularity_boost: float = 0.1,
+    ) -> dict[str, list[tuple[Any, float]]]:
+        """
+        Recommend items for many users at once.
         
-        for item_id, score in zip(self.item_ids, similarities):
-            if item_id not in exclude_set:
-                results.append((item_id, float(score)))
+        Profiles are stacked into one (U x D) matrix so all similarities come
+        from a single GEMM per item tile instead of one matrix-vector product
+        per user.
         
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:k]
+        Args:
+            user_ids: User identifiers
+            k: Number of recommendations per user
+            exclude_map: Items to exclude per user
+            popularity_boost: Boost popular items
+        
+        Returns:
+            Dict of {user_id: [(item_id, score), ...]}
+        """
+        exclude_map = exclude_map or {}
+        known = [user_id for user_id in user_ids if user_id in self.user_profiles]
+        
+        results = {}
+        if known and self.item_embeddings is not None:
+            similarities = self._scores_batch(np.stack([self.user_profiles[u] for u in known]))
+            
+            boost = self._popularity_scores(popularity_boost)
+            if boost is not None:
+                similarities += boost
+            
+            for user_id, row in zip(known, similarities):
+                results[user_id] = self._top_rows(row, k, exclude_map.get(user_id))
+        
+        # Users without a profile (or no catalog) fall back to popularity
+        for user_id in user_ids:
+            if user_id not in results:
+                results[user_id] = self._recommend_popular(k, exclude_map.get(user_id))
+        
+        return {user_id: results[user_id] for user_id in user_ids}
     
     def recommend_similar_items(
         self,
@@ -123,28 +237,16 @@ class ContentBasedRecommender:
         Returns:
             List of (item_id, score) tuples
         """
-        if self.item_embeddings is None or item_id not in self.item_ids:
+        if self.item_embeddings is None or item_id not in self.id_to_row:
             return []
         
-        # Get item embedding
-        idx = self.item_ids.index(item_id)
-        item_embedding = self.item_embeddings[idx]
-        
         # Compute similarities
-        similarities = batch_cosine_similarity(
-            item_embedding.reshape(1, -1),
-            self.item_embeddings
-        )[0]
-        
-        # Sort
-        results = []
-        for i, (other_id, score) in enumerate(zip(self.item_ids, similarities)):
-            if exclude_self and other_id == item_id:
-                continue
-            results.append((other_id, float(score)))
+        idx = self.id_to_row[item_id]
+        similarities = self._scores(self.item_embeddings[idx])
+        if exclude_self:
+            similarities[idx] = -np.inf
         
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:k]
+        return self._top_rows(similarities, k)
     
     def _recommend_popular(
         self,
@@ -153,6 +255,7 @@ class ContentBasedRecommender:
     ) -> list[tuple[Any, float]]:
         """Fallback to popularity-based recommendations."""
         exclude_set = set(exclude_items or [])
+        seen = set()
         
         # Sort by popularity
         popular = sorted(
@@ -165,13 +268,14 @@ class ContentBasedRecommender:
         for item_id, count in popular:
             if item_id not in exclude_set:
                 results.append((item_id, float(count)))
+                seen.add(item_id)
                 if len(results) >= k:
                     break
         
         # If not enough popular items, add random items
-        if len(results) < k and self.item_ids:
-            for item_id in self.item_ids:
-                if item_id not in exclude_set and item_id not in [x[0] for x in results]:
+        if len(results) < k and len(self.item_ids):
+            for item_id in self.item_ids.tolist():
+                if item_id not in exclude_set and item_id not in seen:
                     results.append((item_id, 0.0))
                     if len(results) >= k:
                         break
@@ -1,20 +1,35 @@
 """Sparse retrieval using BM25."""
+from pathlib import Path
 from typing import Any
 
 import numpy as np
+from numba import njit
 from rank_bm25 import BM25Okapi
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 from src.core.normalize import normalize_text
 
 
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top_k_idx = np.argpartition(-scores, k - 1)[:k]
+    return top_k_idx[np.argsort(-scores[top_k_idx], kind="stable")]
+
+
 class BM25Retriever:
     """BM25-based sparse retrieval."""
     
     def __init__(self):
         self.bm25: BM25Okapi | None = None
         self.corpus_ids: list[Any] = []
-        self.tokenized_corpus: list[list[str]] = []
+        # Tokenized corpus as flat term IDs; doc i is token_ids[doc_offsets[i]:doc_offsets[i + 1]]
+        self.vocab: list[str] = []
+        self.token_ids = np.empty(0, dtype=np.int32)
+        self.doc_offsets = np.zeros(1, dtype=np.int64)
+        self.index: BM25Index | None = None
     
     def fit(self, corpus: list[str], ids: list[Any]):
         """
@@ -27,10 +42,33 @@ class BM25Retriever:
         self.corpus_ids = ids
         
         # Tokenize corpus (simple whitespace)
-        self.tokenized_corpus = [doc.split() for doc in corpus]
+        tokenized = [doc.split() for doc in corpus]
+        
+        # Encode tokens to term IDs (first-seen order) in one flat array
+        term_index = {}
+        self.token_ids = np.fromiter(
+            (term_index.setdefault(t, len(term_index)) for doc in tokenized for t in doc),
+            dtype=np.int32,
+        )
+        self.doc_offsets = np.zeros(len(tokenized) + 1, dtype=np.int64)
+        np.cumsum([len(doc) for doc in tokenized], out=self.doc_offsets[1:])
+        self.vocab = list(term_index)
+        
+        # Fit BM25, then precompute CSR postings for scoring (assigned last,
+        # so concurrent searches see either the old or the new index)
+        self.bm25 = BM25Okapi(tokenized)
+        self.index = BM25Index.from_retriever(self)
+    
+    @property
+    def tokenized_corpus(self) -> list[list[str]]:
+        """Tokenized documents, decoded from the flat term IDs."""
+        if "token_ids" not in self.__dict__:
+            # Retrievers pickled before the flat layout stored the lists
+            return self.__dict__.get("tokenized_corpus", [])
         
-        # Fit BM25
-        self.bm25 = BM25Okapi(self.tokenized_corpus)
+        tokens = [self.vocab[t] for t in self.token_ids.tolist()]
+        offsets = self.doc_offsets.tolist()
+        return [tokens[start:end] for start, end in zip(offsets, offsets[1:])]
     
     def search(self, query: str, k: int = 10) -> list[tuple[Any, float]]:
         """
@@ -46,14 +84,16 @@ class BM25Retriever:
         if self.bm25 is None:
             raise ValueError("BM25 not fitted. Call fit() first.")
         
-        # Tokenize query
-        tokenized_query = query.split()
+        # Score over the CSR postings of the query terms only
+        index = getattr(self, "index", None)
+        if index is not None:
+            return index.search(query, k)
         
-        # Get scores
-        scores = self.bm25.get_scores(tokenized_query)
+        # Retrievers pickled before the index existed score with rank_bm25
+        scores = self.bm25.get_scores(query.split())
         
         # Get top-k indices
-        top_k_idx = np.argsort(scores)[::-1][:k]
+        top_k_idx = _top_k_indices(scores, k)
         
         # Return (id, score) pairs
         results = [(self.corpus_ids[i], float(scores[i])) for i in top_k_idx]
@@ -61,6 +101,166 @@ class BM25Retriever:
         return results
 
 
+@njit(cache=True)
+def _bm25_scores(term_ids, indptr, indices, data, idf, doc_lens, avgdl, k1, b):
+    """Accumulate BM25 scores over the posting lists of the query terms."""
+    scores = np.zeros(doc_lens.shape[0], dtype=np.float32)
+    for t in term_ids:
+        w = idf[t]
+        for j in range(indptr[t], indptr[t + 1]):
+            d = indices[j]
+            tf = data[j]
+            scores[d] += w * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lens[d] / avgdl))
+    return scores
+
+
+class BM25Index:
+    """
+    Read-only BM25 index stored as term-major CSR numpy arrays.
+    
+    Arrays are persisted as individual .npy files so they can be
+    memory-mapped on load instead of unpickling a full retriever.
+    """
+    
+    def __init__(
+        self,
+        vocab: list[str],
+        corpus_ids: list[Any],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        idf: np.ndarray,
+        doc_lens: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.term_index = {term: i for i, term in enumerate(vocab)}
+        self.corpus_ids = corpus_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.idf = idf
+        self.doc_lens = doc_lens
+        self.avgdl = float(doc_lens.mean()) if len(doc_lens) else 0.0
+        self.k1 = k1
+        self.b = b
+    
+    @classmethod
+    def from_retriever(cls, retriever: "BM25Retriever") -> "BM25Index":
+        """Build CSR arrays from a fitted BM25Retriever."""
+        bm25 = retriever.bm25
+        if bm25 is None:
+            raise ValueError("BM25 not fitted. Call fit() first.")
+        
+        if "token_ids" in retriever.__dict__:
+            # Count (term, doc) pairs over the flat term IDs; unique keys come
+            # out sorted term-major, then by doc
+            vocab = retriever.vocab
+            n_docs = len(retriever.doc_offsets) - 1
+            doc_lens = np.diff(retriever.doc_offsets)
+            docs = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lens)
+            keys, tfs = np.unique(
+                retriever.token_ids.astype(np.int64) * n_docs + docs, return_counts=True
+            )
+            rows, cols = np.divmod(keys, n_docs)
+            indices = cols.astype(np.int32)
+            data = tfs.astype(np.float32)
+        else:
+            # Retrievers pickled before the flat layout: walk rank_bm25's dicts
+            vocab = list(bm25.idf.keys())
+            term_index = {term: i for i, term in enumerate(vocab)}
+            
+            # Gather (term, doc, tf) postings then sort term-major
+            rows, cols, vals = [], [], []
+            for doc_idx, freqs in enumerate(bm25.doc_freqs):
+                for term, tf in freqs.items():
+                    rows.append(term_index[term])
+                    cols.append(doc_idx)
+                    vals.append(tf)
+            rows = np.asarray(rows, dtype=np.int32)
+            order = np.argsort(rows, kind="stable")
+            indices = np.asarray(cols, dtype=np.int32)[order]
+            data = np.asarray(vals, dtype=np.float32)[order]
+            doc_lens = bm25.doc_len
+        
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(vocab)), out=indptr[1:])
+        
+        return cls(
+            vocab=vocab,
+            corpus_ids=list(retriever.corpus_ids),
+            indptr=indptr,
+            indices=indices,
+            data=data,
+            idf=np.asarray([bm25.idf[t] for t in vocab], dtype=np.float32),
+            doc_lens=np.asarray(doc_lens, dtype=np.float32),
+            k1=bm25.k1,
+            b=bm25.b,
+        )
+    
+    def save(self, path: str | Path):
+        """Save arrays to a directory of .npy files."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        
+        vocab = sorted(self.term_index, key=self.term_index.get)
+        arrays = {
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "data": self.data,
+            "idf": self.idf,
+            "doc_lens": self.doc_lens,
+            "vocab": np.asarray(vocab, dtype=str),
+            "corpus_ids": np.asarray(self.corpus_ids),
+        }
+        for name, arr in arrays.items():
+            np.save(path / f"{name}.npy", arr, allow_pickle=False)
+        np.save(path / "params.npy", np.array([self.k1, self.b], dtype=np.float64))
+    
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "BM25Index":
+        """Load arrays from disk, memory-mapping the numeric ones."""
+        path = Path(path)
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in ("indptr", "indices", "data", "idf", "doc_lens")
+        }
+        vocab = np.load(path / "vocab.npy", allow_pickle=False).tolist()
+        corpus_ids = np.load(path / "corpus_ids.npy", allow_pickle=False).tolist()
+        k1, b = np.load(path / "params.npy").tolist()
+        return cls(vocab=vocab, corpus_ids=corpus_ids, k1=k1, b=b, **arrays)
+    
+    def search(self, query: str, k: int = 10) -> list[tuple[Any, float]]:
+        """
+        Search for top-k documents.
+        
+        Args:
+            query: Query string (normalized)
+            k: Number of results
+        
+        Returns:
+            List of (id, score) tuples
+        """
+        n_docs = len(self.corpus_ids)
+        if n_docs == 0:
+            return []
+        
+        term_ids = np.array(
+            [self.term_index[t] for t in query.split() if t in self.term_index],
+            dtype=np.int64,
+        )
+        scores = _bm25_scores(
+            term_ids, self.indptr, self.indices, self.data,
+            self.idf, self.doc_lens, self.avgdl, self.k1, self.b,
+        )
+        
+        # Top-k without a full sort
+        top_k_idx = _top_k_indices(scores, k)
+        
+        return [(self.corpus_ids[i], float(scores[i])) for i in top_k_idx]
+
+
 class TfidfRetriever:
     """TF-IDF based sparse retrieval (alternative to BM25)."""
     
@@ -90,7 +290,7 @@ class TfidfRetriever:
         scores = (self.tfidf_matrix @ query_vec.T).toarray().flatten()
         
         # Get top-k
-        top_k_idx = np.argsort(scores)[::-1][:k]
+        top_k_idx = _top_k_indices(scores, k)
         
         results = [(self.corpus_ids[i], float(scores[i])) for i in top_k_idx]
         
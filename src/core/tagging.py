@@ -1,26 +1,50 @@
 """Auto-tagging for cuisine and diet labels using label centroids."""
 import json
 import os
+import tempfile
 from pathlib import Path
 from typing import Any
 
 import numpy as np
+from sklearn.preprocessing import MultiLabelBinarizer
 
-from src.core.embeddings import encode_texts, batch_cosine_similarity
+from src.core.embeddings import MODEL_NAME, ONNX_MODEL_PATH, encode_texts, l2_normalize_inplace
+from src.core.topk import topk_above
+
+# Texts per encoder forward pass in the batch tagging paths
+TAG_BATCH_SIZE = 64
+
+# Identifies the encoder that produced a saved label cache
+ENCODER_KEY = f"{MODEL_NAME}|{ONNX_MODEL_PATH or ''}"
 
 
 class LabelTagger:
     """Assign labels based on nearest centroid in embedding space."""
     
-    def __init__(self, labels_path: str | None = None):
+    def __init__(self, labels_path: str | None = None, cache_path: str | Path | None = None):
         """
         Initialize tagger with label definitions.
         
         Args:
             labels_path: Path to JSON file with label groups
+            cache_path: Optional .npz file persisting label embeddings across
+                runs (ignored if written by a different encoder)
         """
         self.label_groups = {}
-        self.label_embeddings = {}
+        # All groups' label embeddings in one (L_total x D) float32 matrix,
+        # with each group's rows at a slice
+        self.label_matrix: np.ndarray | None = None
+        self.label_names = np.empty(0, dtype=object)
+        self.group_slices: dict[str, slice] = {}
+        # Normalized embedding per label string, so labels shared between
+        # groups or set again are encoded once
+        self._label_emb_cache: dict[str, np.ndarray] = {}
+        # Groups set by name but not yet encoded (see _ensure_encoded)
+        self._pending: dict[str, list[str]] = {}
+        
+        self.cache_path = Path(cache_path) if cache_path else None
+        if self.cache_path is not None:
+            self._load_cache()
         
         if labels_path and os.path.exists(labels_path):
             self.load_labels(labels_path)
@@ -28,25 +52,163 @@ class LabelTagger:
     def load_labels(self, labels_path: str):
         """Load label definitions from JSON."""
         with open(labels_path) as f:
-            self.label_groups = json.load(f)
+            label_groups = json.load(f)
         
         # Compute embeddings for each label group
-        for group_name, labels in self.label_groups.items():
-            # Encode label strings
-            embeddings = encode_texts(labels, normalize=True)
-            self.label_embeddings[group_name] = {
-                "labels": labels,
-                "embeddings": embeddings,
-            }
+        for group_name, labels in label_groups.items():
+            self.set_labels(group_name, labels)
     
     def set_labels(self, group_name: str, labels: list[str]):
-        """Manually set labels for a group."""
-        self.label_groups[group_name] = labels
-        embeddings = encode_texts(labels, normalize=True)
-        self.label_embeddings[group_name] = {
-            "labels": labels,
-            "embeddings": embeddings,
-        }
+        """
+        Manually set labels for a group.
+        
+        Encoding is deferred until the tagger is next used, so labels set for
+        several groups go through the encoder together (see _ensure_encoded).
+        """
+        self.label_groups[group_name] = list(labels)
+        self._pending[group_name] = list(labels)
+    
+    def _ensure_encoded(self):
+        """Encode all pending groups' new labels in one pass and install them."""
+        if not self._pending:
+            return
+        
+        # Copy: set_label_embeddings pops each group once it is installed, so
+        # a failed encode leaves every group pending
+        pending = dict(self._pending)
+        cache = self._label_emb_cache
+        missing = list(dict.fromkeys(
+            label for labels in pending.values() for label in labels if label not in cache
+        ))
+        if missing:
+            cache.update(zip(missing, encode_texts(missing, normalize=True, batch_size=TAG_BATCH_SIZE)))
+            if self.cache_path is not None:
+                self._save_cache()
+        
+        for group_name, labels in pending.items():
+            embeddings = np.stack([cache[label] for label in labels]) if labels else encode_texts([])
+            self.set_label_embeddings(group_name, labels, embeddings)
+    
+    def set_label_embeddings(self, group_name: str, labels: list[str], embeddings: np.ndarray):
+        """
+        Set a group's labels from precomputed embeddings.
+        
+        Args:
+            group_name: Label group (e.g., "cuisine", "diet")
+            labels: Label strings
+            embeddings: Label embeddings (len(labels) x D), normalized here
+        """
+        self.label_groups[group_name] = list(labels)
+        self._pending.pop(group_name, None)
+        
+        # Rebuild the shared matrix with this group's rows replaced
+        blocks, names, slices, offset = [], [], {}, 0
+        for name in self.label_groups:
+            if name == group_name:
+                group_embeddings = np.array(embeddings, dtype=np.float32, order="C")
+                l2_normalize_inplace(group_embeddings)
+                group_labels = list(labels)
+            elif name in self.group_slices:
+                group_embeddings = self.label_matrix[self.group_slices[name]]
+                group_labels = self.label_names[self.group_slices[name]].tolist()
+            else:
+                continue
+            blocks.append(group_embeddings)
+            names.extend(group_labels)
+            slices[name] = slice(offset, offset + len(group_labels))
+            offset += len(group_labels)
+        
+        self.label_matrix = np.vstack(blocks)
+        self.label_names = np.asarray(names, dtype=object)
+        self.group_slices = slices
+    
+    def _load_cache(self):
+        """Load label embeddings saved by an earlier run with the same encoder."""
+        if not self.cache_path.exists():
+            return
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if str(data["encoder"]) != ENCODER_KEY:
+                    return
+                self._label_emb_cache.update(zip(data["labels"].tolist(), data["embeddings"]))
+        except (OSError, KeyError, ValueError):
+            # Unreadable cache: labels are simply encoded again
+            return
+    
+    def _save_cache(self):
+        """Write the label embedding cache (atomically, via a unique temp file)."""
+        labels = list(self._label_emb_cache)
+        tmp_path = None
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    encoder=np.array(ENCODER_KEY),
+                    labels=np.array(labels),
+                    embeddings=np.stack([self._label_emb_cache[label] for label in labels]),
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # Unwritable cache: labels are simply encoded again next run
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    
+    def _select(
+        self,
+        similarities: np.ndarray,
+        group_name: str,
+        top_n: int,
+        threshold: float,
+    ) -> list[tuple[str, float]]:
+        """Top-n labels above threshold from one group's similarity slice."""
+        labels = self.label_names[self.group_slices[group_name]]
+        
+        # Threshold and top-n in one heap pass (compiled), best first
+        candidates = topk_above(similarities, top_n, threshold)
+        
+        return [(labels[i], float(similarities[i])) for i in candidates]
+    
+    def _similarities(self, text_embedding: np.ndarray, rows: slice = slice(None)) -> np.ndarray:
+        """Cosine similarities of a text embedding with label rows (one GEMV)."""
+        # Label rows are stored normalized, so normalizing the single query is
+        # all a cosine needs
+        query = np.asarray(text_embedding, dtype=np.float32)
+        query = query / np.float32(np.sqrt(np.vdot(query, query)) + 1e-9)
+        return self.label_matrix[rows] @ query
+    
+    def _similarities_batch(self, text_embeddings: np.ndarray, rows: slice = slice(None)) -> np.ndarray:
+        """Cosine similarities of T text embeddings with label rows (T x L, one GEMM)."""
+        queries = np.array(text_embeddings, dtype=np.float32, ndmin=2)
+        l2_normalize_inplace(queries)
+        return queries @ self.label_matrix[rows].T
+    
+    def score_labels(
+        self,
+        text_embedding: np.ndarray,
+        group_name: str,
+        top_n: int = 1,
+        threshold: float = 0.35,
+    ) -> list[tuple[str, float]]:
+        """
+        Assign labels from a group to an already-encoded text.
+        
+        Args:
+            text_embedding: Text embedding (D,); normalized here with one vdot
+            group_name: Label group (e.g., "cuisine", "diet")
+            top_n: Number of labels to return
+            threshold: Minimum similarity threshold
+        
+        Returns:
+            List of (label, score) tuples
+        """
+        self._ensure_encoded()
+        if group_name not in self.group_slices or top_n <= 0:
+            return []
+        
+        similarities = self._similarities(text_embedding, self.group_slices[group_name])
+        return self._select(similarities, group_name, top_n, threshold)
     
     def assign_labels(
         self,
@@ -67,56 +229,115 @@ class LabelTagger:
         Returns:
             List of (label, score) tuples
         """
-        if group_name not in self.label_embeddings:
+        self._ensure_encoded()
+        if group_name not in self.group_slices:
             return []
         
-        # Encode text
         text_embedding = encode_texts([text], normalize=True)[0]
-        
-        # Get label embeddings
-        label_data = self.label_embeddings[group_name]
-        labels = label_data["labels"]
-        label_embs = label_data["embeddings"]
-        
-        # Compute similarities
-        similarities = batch_cosine_similarity(
-            text_embedding.reshape(1, -1),
-            label_embs
-        )[0]
-        
-        # Get top-n above threshold
-        results = []
-        for label, score in zip(labels, similarities):
-            if score >= threshold:
-                results.append((label, float(score)))
-        
-        # Sort by score and return top-n
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_n]
+        return self.score_labels(text_embedding, group_name, top_n, threshold)
     
     def assign_all_groups(
         self,
         text: str,
         top_n: int = 1,
         threshold: float = 0.35,
+        text_embedding: np.ndarray | None = None,
     ) -> dict[str, list[tuple[str, float]]]:
         """
-        Assign labels from all groups.
+        Assign labels from all groups, encoding the text only once.
+        
+        One GEMV over the shared label matrix scores every group at once.
         
         Args:
             text: Text to tag
             top_n: Number of labels per group
             threshold: Minimum similarity threshold
+            text_embedding: Precomputed normalized embedding of text (optional)
         
         Returns:
             Dict of {group_name: [(label, score), ...]}
         """
-        results = {}
-        for group_name in self.label_groups:
-            results[group_name] = self.assign_labels(
-                text, group_name, top_n=top_n, threshold=threshold
-            )
-        return results
+        self._ensure_encoded()
+        if not self.group_slices or top_n <= 0:
+            return {group_name: [] for group_name in self.label_groups}
+        
+        if text_embedding is None:
+            text_embedding = encode_texts([text], normalize=True)[0]
+        
+        similarities = self._similarities(text_embedding)
+        return {
+            group_name: self._select(similarities[rows], group_name, top_n, threshold)
+            for group_name, rows in self.group_slices.items()
+        }
+    
+    def assign_labels_batch(
+        self,
+        texts: list[str],
+        group_name: str,
+        top_n: int = 1,
+        threshold: float = 0.35,
+        text_embeddings: np.ndarray | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Assign labels from a group to many texts.
+        
+        Texts are encoded in batched forward passes and scored with one
+        (T x L) matmul, instead of one encode per text.
+        
+        Args:
+            texts: Texts to tag
+            group_name: Label group (e.g., "cuisine", "diet")
+            top_n: Number of labels per text
+            threshold: Minimum similarity threshold
+            text_embeddings: Precomputed embeddings of texts (T x D, optional)
+        
+        Returns:
+            List of [(label, score), ...] per text
+        """
+        self._ensure_encoded()
+        if group_name not in self.group_slices or top_n <= 0 or not len(texts):
+            return [[] for _ in texts]
+        
+        if text_embeddings is None:
+            text_embeddings = encode_texts(texts, normalize=True, batch_size=TAG_BATCH_SIZE)
+        
+        similarities = self._similarities_batch(text_embeddings, self.group_slices[group_name])
+        return [self._select(row, group_name, top_n, threshold) for row in similarities]
+    
+    def assign_all_groups_batch(
+        self,
+        texts: list[str],
+        top_n: int = 1,
+        threshold: float = 0.35,
+        text_embeddings: np.ndarray | None = None,
+    ) -> list[dict[str, list[tuple[str, float]]]]:
+        """
+        Assign labels from all groups to many texts.
+        
+        Args:
+            texts: Texts to tag
+            top_n: Number of labels per group
+            threshold: Minimum similarity threshold
+            text_embeddings: Precomputed embeddings of texts (T x D, optional)
+        
+        Returns:
+            List of {group_name: [(label, score), ...]} per text
+        """
+        self._ensure_encoded()
+        if not self.group_slices or top_n <= 0 or not len(texts):
+            return [{group_name: [] for group_name in self.label_groups} for _ in texts]
+        
+        if text_embeddings is None:
+            text_embeddings = encode_texts(texts, normalize=True, batch_size=TAG_BATCH_SIZE)
+        
+        similarities = self._similarities_batch(text_embeddings)
+        return [
+            {
+                group_name: self._select(row[rows], group_name, top_n, threshold)
+                for group_name, rows in self.group_slices.items()
+            }
+            for row in similarities
+        ]
 
 
 def evaluate_tagging(
@@ -131,34 +352,37 @@ def evaluate_tagging(
         ground_truth: List of true label sets
     
     Returns:
-        Dict with precision, recall, f1 (macro-averaged)
+        Dict with precision, recall, f1 (macro-averaged over samples), plus
+        micro_precision, micro_recall, micro_f1 from the pooled TP/FP/FN
     """
     if len(predictions) != len(ground_truth):
         raise ValueError("Predictions and ground truth must have same length")
     
-    precisions = []
-    recalls = []
-    f1s = []
-    
-    for pred, true in zip(predictions, ground_truth):
-        pred_set = set(pred)
-        true_set = set(true)
+    if not predictions:
+        precisions = recalls = f1s = np.empty(0)
+        tp = n_pred = n_true = np.zeros(0, dtype=np.int64)
+    else:
+        # Binarize both sides over a shared label vocabulary (N x L booleans)
+        binarizer = MultiLabelBinarizer()
+        binarizer.fit(list(predictions) + list(ground_truth))
+        pred = binarizer.transform(predictions).astype(bool)
+        truth = binarizer.transform(ground_truth).astype(bool)
         
-        if len(pred_set) == 0 and len(true_set) == 0:
-            precisions.append(1.0)
-            recalls.append(1.0)
-            f1s.append(1.0)
-            continue
+        tp = (pred & truth).sum(axis=1)
+        n_pred = pred.sum(axis=1)
+        n_true = truth.sum(axis=1)
         
-        tp = len(pred_set & true_set)
+        precisions = np.divide(tp, n_pred, out=np.zeros(len(tp)), where=n_pred > 0)
+        recalls = np.divide(tp, n_true, out=np.zeros(len(tp)), where=n_true > 0)
+        denom = precisions + recalls
+        f1s = np.divide(2 * precisions * recalls, denom, out=np.zeros(len(tp)), where=denom > 0)
         
-        precision = tp / len(pred_set) if len(pred_set) > 0 else 0.0
-        recall = tp / len(true_set) if len(true_set) > 0 else 0.0
-        f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
-        
-        precisions.append(precision)
-        recalls.append(recall)
-        f1s.append(f1)
+        # Both sides empty counts as a perfect match
+        both_empty = (n_pred == 0) & (n_true == 0)
+        precisions[both_empty] = recalls[both_empty] = f1s[both_empty] = 1.0
+    
+    # Pooled counts: fp = predicted - tp, fn = true - tp
+    tp_all, fp_all, fn_all = tp.sum(), n_pred.sum() - tp.sum(), n_true.sum() - tp.sum()
     
     return {
         "precision": float(np.mean(precisions)),
@@ -167,4 +391,7 @@ def evaluate_tagging(
         "macro_precision": float(np.mean(precisions)),
         "macro_recall": float(np.mean(recalls)),
         "macro_f1": float(np.mean(f1s)),
+        "micro_precision": float(tp_all / (tp_all + fp_all)) if tp_all + fp_all else 0.0,
+        "micro_recall": float(tp_all / (tp_all + fn_all)) if tp_all + fn_all else 0.0,
+        "micro_f1": float(2 * tp_all / (2 * tp_all + fp_all + fn_all)) if tp_all + fp_all + fn_all else 0.0,
     }
@@ -0,0 +1,128 @@
+"""Partial top-k selection over raw score arrays."""
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _worse(heap_scores, heap_idx, a, b):
+    """Whether heap slot a ranks below slot b (lower score, then higher index)."""
+    if heap_scores[a] != heap_scores[b]:
+        return heap_scores[a] < heap_scores[b]
+    return heap_idx[a] > heap_idx[b]
+
+
+@njit(cache=True)
+def _sift_down(heap_scores, heap_idx, pos, size):
+    """Restore the min-heap property below pos."""
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            return
+        if child + 1 < size and _worse(heap_scores, heap_idx, child + 1, child):
+            child += 1
+        if not _worse(heap_scores, heap_idx, child, pos):
+            return
+        heap_scores[pos], heap_scores[child] = heap_scores[child], heap_scores[pos]
+        heap_idx[pos], heap_idx[child] = heap_idx[child], heap_idx[pos]
+        pos = child
+
+
+@njit(cache=True)
+def _drain(heap_scores, heap_idx, size):
+    """Pop a min-heap worst-first into the tail of the output (best first)."""
+    out = np.empty(size, dtype=np.int64)
+    while size > 0:
+        out[size - 1] = heap_idx[0]
+        size -= 1
+        heap_scores[0] = heap_scores[size]
+        heap_idx[0] = heap_idx[size]
+        _sift_down(heap_scores, heap_idx, 0, size)
+    return out
+
+
+@njit(cache=True)
+def topk(scores, k):
+    """
+    Indices of the k highest scores, best first.
+    
+    Uses a size-k min-heap, so selection is O(N log k). Ties are broken by
+    lower index, matching a stable descending sort.
+    
+    Args:
+        scores: Score array (N,)
+        k: Number of results
+    
+    Returns:
+        Index array (min(k, N),)
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    heap_scores = np.empty(k, dtype=np.float64)
+    heap_idx = np.empty(k, dtype=np.int64)
+    if k <= 0:
+        return heap_idx
+    
+    # Fill the heap with the first k items, then heapify
+    for i in range(k):
+        heap_scores[i] = scores[i]
+        heap_idx[i] = i
+    for pos in range(k // 2 - 1, -1, -1):
+        _sift_down(heap_scores, heap_idx, pos, k)
+    
+    # Replace the worst kept item whenever a better one arrives
+    for i in range(k, n):
+        s = scores[i]
+        if s > heap_scores[0]:
+            heap_scores[0] = s
+            heap_idx[0] = i
+            _sift_down(heap_scores, heap_idx, 0, k)
+    
+    return _drain(heap_scores, heap_idx, k)
+
+
+@njit(cache=True)
+def topk_above(scores, k, threshold):
+    """
+    Indices of the k highest scores that are >= threshold, best first.
+    
+    Same heap selection and tie order as topk, with the threshold applied
+    while scanning, so nothing below it is pushed.
+    
+    Args:
+        scores: Score array (N,)
+        k: Maximum number of results
+        threshold: Minimum score
+    
+    Returns:
+        Index array (at most min(k, N),)
+    """
+    n = scores.shape[0]
+    k = max(min(k, n), 0)
+    heap_scores = np.empty(k, dtype=np.float64)
+    heap_idx = np.empty(k, dtype=np.int64)
+    size = 0
+    
+    for i in range(n):
+        s = scores[i]
+        # Negated >= so NaN scores are skipped, as a >= threshold mask would
+        if not (s >= threshold):
+            continue
+        if size < k:
+            # Append, then sift the new item up
+            pos = size
+            heap_scores[pos] = s
+            heap_idx[pos] = i
+            size += 1
+            while pos > 0:
+                parent = (pos - 1) // 2
+                if not _worse(heap_scores, heap_idx, pos, parent):
+                    break
+                heap_scores[pos], heap_scores[parent] = heap_scores[parent], heap_scores[pos]
+                heap_idx[pos], heap_idx[parent] = heap_idx[parent], heap_idx[pos]
+                pos = parent
+        elif k > 0 and s > heap_scores[0]:
+            heap_scores[0] = s
+            heap_idx[0] = i
+            _sift_down(heap_scores, heap_idx, 0, k)
+    
+    return _drain(heap_scores, heap_idx, size)
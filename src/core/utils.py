@@ -4,41 +4,44 @@ from contextlib import contextmanager
 from functools import wraps
 from typing import Any, Callable
 
+import numpy as np
+
 
 @contextmanager
 def timer(label: str = "Operation"):
     """Context manager to time operations."""
-    start = time.perf_counter()
+    start = time.perf_counter_ns()
     try:
         yield
     finally:
-        elapsed_ms = (time.perf_counter() - start) * 1000
+        elapsed_ms = (time.perf_counter_ns() - start) / 1e6
         print(f"{label}: {elapsed_ms:.2f}ms")
 
 
 def timing_decorator(func: Callable) -> Callable:
-    """Decorator to measure and return execution time."""
+    """Decorator to measure and return execution time (integer-ns clock)."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.perf_counter()
+        start = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        elapsed_ms = (time.perf_counter() - start) * 1000
+        elapsed_ms = (time.perf_counter_ns() - start) / 1e6
         return result, elapsed_ms
     return wrapper
 
 
-def min_max_normalize(scores: list[float]) -> list[float]:
-    """Normalize scores to [0, 1] using min-max scaling."""
-    if not scores:
-        return []
+def min_max_normalize(scores: list[float] | np.ndarray) -> np.ndarray:
+    """Normalize scores to [0, 1] using min-max scaling (vectorized)."""
+    arr = np.asarray(scores, dtype=np.float64)
+    if arr.size == 0:
+        return arr
     
-    min_score = min(scores)
-    max_score = max(scores)
+    min_score = arr.min()
+    span = arr.max() - min_score
     
-    if max_score - min_score < 1e-9:
-        return [1.0] * len(scores)
+    if span < 1e-9:
+        return np.ones_like(arr)
     
-    return [(s - min_score) / (max_score - min_score) for s in scores]
+    return (arr - min_score) / span
 
 
 def merge_scores(
@@ -66,13 +69,11 @@ def merge_scores(
         if not ids_scores:
             continue
         
-        scores = [s for _, s in ids_scores]
-        normalized = min_max_normalize(scores)
+        scores = np.fromiter((s for _, s in ids_scores), dtype=np.float64, count=len(ids_scores))
+        weighted = (weights[idx] * min_max_normalize(scores)).tolist()
         
-        for (item_id, _), norm_score in zip(ids_scores, normalized):
-            if item_id not in combined:
-                combined[item_id] = 0.0
-            combined[item_id] += weights[idx] * norm_score
+        for (item_id, _), score in zip(ids_scores, weighted):
+            combined[item_id] = combined.get(item_id, 0.0) + score
     
     # Sort by combined score
     result = sorted(combined.items(), key=lambda x: x[1], reverse=True)
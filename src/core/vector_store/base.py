@@ -40,6 +40,28 @@ class VectorStore(ABC):
         """
         pass
     
+    def batch_search(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 10,
+        ef_search: int | None = None,
+    ) -> list[list[tuple[Any, float]]]:
+        """
+        Search for nearest neighbors of several queries.
+        
+        Backends that support batched queries should override this; the
+        default runs search() once per query.
+        
+        Args:
+            query_vectors: Query vectors (N x D)
+            k: Number of results per query
+            ef_search: Search parameter (for HNSW-based indexes)
+        
+        Returns:
+            One list of (id, distance/similarity) tuples per query
+        """
+        return [self.search(q, k=k, ef_search=ef_search) for q in query_vectors]
+    
     @abstractmethod
     def delete(self, ids: list[Any]):
         """Delete vectors by ID."""
@@ -1,4 +1,6 @@
 """FAISS-based vector store implementation."""
+import threading
+from pathlib import Path
 from typing import Any
 
 import faiss
@@ -7,6 +9,44 @@ import numpy as np
 from src.core.vector_store.base import VectorStore
 
 
+# Product quantization: 48 sub-quantizers x 8 bits = 48 bytes per vector
+PQ_M = 48
+PQ_NBITS = 8
+MAX_NLIST = 4096
+
+# PQ candidates re-scored against fp16 copies of the vectors
+RERANK_DEPTH = 200
+
+# HNSW graph: neighbors per node and build-time candidate list size
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+# Per-thread (1 x D) query buffers, reused across searches
+_TLS = threading.local()
+
+# Value types save_metadata() can store, with their .npy dtypes (str
+# columns are dictionary-encoded instead)
+_METADATA_DTYPES = {bool: np.bool_, int: np.int64, float: np.float64}
+
+
+def _column_type(values: list, name: str) -> type | None:
+    """Get the single Python type of the non-None values (None if all missing)."""
+    types = {type(value) for value in values if value is not None}
+    if len(types) > 1 or not types <= {str, *_METADATA_DTYPES}:
+        names = ", ".join(sorted(t.__name__ for t in types))
+        raise ValueError(f"Cannot save {name} with value types: {names}")
+    return types.pop() if types else None
+
+
+def _query_buffer(dimension: int) -> np.ndarray:
+    """Get this thread's contiguous float32 query buffer."""
+    buf = getattr(_TLS, "buf", None)
+    if buf is None or buf.shape[1] != dimension:
+        buf = np.empty((1, dimension), dtype=np.float32)
+        _TLS.buf = buf
+    return buf
+
+
 class FAISSVectorStore(VectorStore):
     """Vector store using FAISS for ANN search."""
     
@@ -15,6 +55,8 @@ class FAISSVectorStore(VectorStore):
         self.index_type = index_type
         self.index: faiss.Index | None = None
         self.id_map: list[Any] = []  # Maps FAISS index -> item_id
+        self._id_arr: np.ndarray | None = None  # Object-array mirror of id_map
+        self._id_src: list[Any] | None = None  # id_map list _id_arr was built from
         self.metadata: list[dict] = []
         self._is_trained = False
     
@@ -24,7 +66,53 @@ class FAISSVectorStore(VectorStore):
             # IVFFlat with 100 clusters
             quantizer = faiss.IndexFlatIP(self.dimension)  # Inner product (cosine for normalized)
             nlist = min(100, max(1, n_vectors // 39))  # Heuristic: sqrt(N)
-            self.index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
+            self.index = faiss.IndexIVFFlat(
+                quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+        elif self.index_type == "IVFSQ":
+            # IVF with fp16 scalar-quantized storage (half the scan bandwidth)
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            nlist = min(100, max(1, n_vectors // 39))
+            self.index = faiss.IndexIVFScalarQuantizer(
+                quantizer,
+                self.dimension,
+                nlist,
+                faiss.ScalarQuantizer.QT_fp16,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        elif self.index_type == "IVFSQ8":
+            # IVF with int8 scalar-quantized storage (a quarter of fp32 bandwidth)
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            nlist = min(100, max(1, n_vectors // 39))
+            self.index = faiss.IndexIVFScalarQuantizer(
+                quantizer,
+                self.dimension,
+                nlist,
+                faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        elif self.index_type == "SQ8":
+            # Exhaustive scan over int8 scalar-quantized vectors
+            self.index = faiss.IndexScalarQuantizer(
+                self.dimension,
+                faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        elif self.index_type == "IVFPQ":
+            # OPQ rotation + IVF coarse quantizer + PQ-compressed residuals,
+            # with an fp16 refinement stage to re-rank the PQ shortlist
+            nlist = min(MAX_NLIST, max(1, n_vectors // 39))
+            self.index = faiss.index_factory(
+                self.dimension,
+                f"OPQ{PQ_M},IVF{nlist},PQ{PQ_M}x{PQ_NBITS},Refine(SQfp16)",
+                faiss.METRIC_INNER_PRODUCT,
+            )
+            faiss.extract_index_ivf(self.index).nprobe = min(16, nlist)
+        elif self.index_type == "HNSW":
+            # Graph index: sublinear queries with no training step
+            self.index = faiss.IndexHNSWFlat(self.dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            self._is_trained = True
         elif self.index_type == "Flat":
             # Exact search
             self.index = faiss.IndexFlatIP(self.dimension)
@@ -37,17 +125,20 @@ class FAISSVectorStore(VectorStore):
         if len(ids) != len(vectors):
             raise ValueError("IDs and vectors must have same length")
         
-        # Ensure vectors are normalized for cosine similarity
-        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-        vectors = vectors / (norms + 1e-9)
+        # Normalize a float32 copy in place for cosine similarity (one cast,
+        # no hidden float64 -> float32 copy inside FAISS)
+        vectors = np.array(vectors, dtype=np.float32, order="C").reshape(-1, self.dimension)
+        faiss.normalize_L2(vectors)
         
         # Create index if needed
         if self.index is None:
             self._create_index(len(vectors))
         
-        # Train index if needed (IVFFlat requires training)
-        if not self._is_trained and isinstance(self.index, faiss.IndexIVFFlat):
-            if len(vectors) >= 39:  # Minimum for training
+        # Train index if needed (IVF indexes require training)
+        if not self._is_trained and not self.index.is_trained:
+            # PQ codebooks need at least 2^nbits training points
+            min_train = 2 ** PQ_NBITS if self.index_type == "IVFPQ" else 39
+            if len(vectors) >= min_train:
                 self.index.train(vectors)
                 self._is_trained = True
             else:
@@ -58,6 +149,7 @@ class FAISSVectorStore(VectorStore):
         # Add vectors
         self.index.add(vectors)
         self.id_map.extend(ids)
+        self._id_arr = None
         
         if metadata:
             self.metadata.extend(metadata)
@@ -74,25 +166,90 @@ class FAISSVectorStore(VectorStore):
         if self.index is None or len(self.id_map) == 0:
             return []
         
-        # Normalize query vector
-        query_vector = query_vector / (np.linalg.norm(query_vector) + 1e-9)
-        query_vector = query_vector.reshape(1, -1).astype(np.float32)
+        # Normalize query vector into the reusable float32 buffer
+        query = _query_buffer(self.dimension)
+        np.copyto(query, query_vector.reshape(1, -1), casting="same_kind")
+        faiss.normalize_L2(query)
         
-        # Set search parameters
-        if ef_search and isinstance(self.index, faiss.IndexIVFFlat):
-            self.index.nprobe = min(ef_search, self.index.nlist)
+        return self._search(query, k, ef_search)[0]
+    
+    def batch_search(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 10,
+        ef_search: int | None = None,
+    ) -> list[list[tuple[Any, float]]]:
+        """Search for nearest neighbors of many queries in one FAISS call."""
+        # Normalize a float32 copy in place (the caller's array is untouched)
+        queries = np.array(query_vectors, dtype=np.float32, order="C").reshape(-1, self.dimension)
+        if self.index is None or len(self.id_map) == 0:
+            return [[] for _ in range(len(queries))]
+        faiss.normalize_L2(queries)
         
-        # Search
+        return self._search(queries, k, ef_search)
+    
+    def _search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        ef_search: int | None,
+    ) -> list[list[tuple[Any, float]]]:
+        """Search normalized, contiguous float32 queries (nq x D)."""
         k = min(k, len(self.id_map))
-        distances, indices = self.index.search(query_vector, k)
         
-        # Map back to IDs (distances are already similarity scores for IndexFlatIP)
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx >= 0 and idx < len(self.id_map):
-                results.append((self.id_map[idx], float(dist)))
+        # Set search parameters (nprobe for IVF indexes, efSearch for HNSW)
+        if ef_search:
+            ivf = self._ivf()
+            if ivf is not None:
+                # PQ scans are cheap but coarse lists are wide, so probe fewer
+                # (checked on the index itself, which may have been loaded)
+                nprobe = ef_search // 4 if isinstance(ivf, faiss.IndexIVFPQ) else ef_search
+                ivf.nprobe = max(1, min(nprobe, ivf.nlist))
+            elif isinstance(self.index, faiss.IndexHNSW):
+                # The candidate list must hold at least k results
+                self.index.hnsw.efSearch = max(ef_search, k)
         
-        return results
+        # Re-rank the top RERANK_DEPTH PQ candidates with exact scores
+        refine = faiss.downcast_index(self.index)
+        if isinstance(refine, faiss.IndexRefine):
+            refine.k_factor = max(1.0, RERANK_DEPTH / max(k, 1))
+        
+        # Search
+        distances, indices = self.index.search(queries, k)
+        
+        # Indexes built with L2 return squared distances; for unit vectors
+        # d = 2 - 2 * cos, so convert back to cosine similarity
+        if self.index.metric_type == faiss.METRIC_L2:
+            distances = 1.0 - distances / 2.0
+        
+        # Map back to IDs (distances are already similarity scores for inner product)
+        # with one gather; FAISS pads missing hits with -1 at the end of a row,
+        # so each row keeps its first n_valid entries
+        ids = self._ids()[np.maximum(indices, 0)].tolist()
+        n_valid = (indices >= 0).sum(axis=1).tolist()
+        return [
+            list(zip(row_ids[:n], row_dists[:n]))
+            for row_ids, row_dists, n in zip(ids, distances.tolist(), n_valid)
+        ]
+    
+    def _ids(self) -> np.ndarray:
+        """Get id_map as an object array (rebuilt lazily after changes)."""
+        if (
+            self._id_arr is None
+            or self._id_src is not self.id_map
+            or len(self._id_arr) != len(self.id_map)
+        ):
+            self._id_arr = np.empty(len(self.id_map), dtype=object)
+            self._id_arr[:] = self.id_map
+            self._id_src = self.id_map
+        return self._id_arr
+    
+    def _ivf(self) -> faiss.IndexIVF | None:
+        """Get the IVF layer of the index, if any (unwraps OPQ pre-transforms)."""
+        try:
+            return faiss.extract_index_ivf(self.index)
+        except RuntimeError:
+            return None
     
     def delete(self, ids: list[Any]):
         """Delete not supported in FAISS - would require rebuild."""
@@ -102,6 +259,7 @@ class FAISSVectorStore(VectorStore):
         """Clear all vectors."""
         self.index = None
         self.id_map = []
+        self._id_arr = None
         self.metadata = []
         self._is_trained = False
     
@@ -114,7 +272,95 @@ class FAISSVectorStore(VectorStore):
         if self.index:
             faiss.write_index(self.index, path)
     
-    def load(self, path: str):
-        """Load index from disk."""
-        self.index = faiss.read_index(path)
+    def load(self, path: str, mmap: bool = False):
+        """
+        Load index from disk.
+        
+        Args:
+            path: Index file path
+            mmap: Memory-map the index read-only, so processes loading the
+                same file share its pages instead of each holding a copy
+        """
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        self.index = faiss.read_index(path, flags)
         self._is_trained = True
+    
+    def save_metadata(self, path: str | Path):
+        """
+        Save id_map and metadata to a directory of .npy files.
+        
+        IDs must be all str or all int. String metadata fields are
+        dictionary-encoded: a sorted vocabulary of their values plus one code
+        per vector (0 = missing, i + 1 = vocab[i]). bool, int and float fields
+        are stored as typed arrays with a presence mask. Fields mixing value
+        types raise ValueError.
+        """
+        path = Path(path)
+        
+        # Check every column before writing anything
+        id_type = _column_type(self.id_map, "ids")
+        if id_type not in (str, int, None):
+            raise ValueError(f"Cannot save ids of type {id_type.__name__}")
+        keys = sorted({key for meta in self.metadata for key in meta})
+        columns = {key: [meta.get(key) for meta in self.metadata] for key in keys}
+        types = {key: _column_type(values, f"metadata field {key!r}") for key, values in columns.items()}
+        
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(
+            path / "ids.npy",
+            np.asarray(self.id_map, dtype=str if id_type is str else np.int64),
+            allow_pickle=False,
+        )
+        np.save(path / "keys.npy", np.asarray(keys, dtype=str), allow_pickle=False)
+        
+        for key, values in columns.items():
+            if types[key] in _METADATA_DTYPES:
+                dtype = _METADATA_DTYPES[types[key]]
+                np.save(
+                    path / f"{key}.npy",
+                    np.array([dtype(0) if value is None else value for value in values], dtype=dtype),
+                    allow_pickle=False,
+                )
+                np.save(
+                    path / f"{key}_present.npy",
+                    np.array([value is not None for value in values]),
+                    allow_pickle=False,
+                )
+                continue
+            
+            vocab = sorted({value for value in values if value is not None})
+            codes = {value: i + 1 for i, value in enumerate(vocab)}
+            dtype = np.uint16 if len(vocab) < np.iinfo(np.uint16).max else np.uint32
+            np.save(path / f"{key}_vocab.npy", np.asarray(vocab, dtype=str), allow_pickle=False)
+            np.save(
+                path / f"{key}.npy",
+                np.array([codes.get(value, 0) for value in values], dtype=dtype),
+                allow_pickle=False,
+            )
+    
+    def load_metadata(self, path: str | Path):
+        """Load id_map and metadata written by save_metadata()."""
+        path = Path(path)
+        
+        self.id_map = np.load(path / "ids.npy", allow_pickle=False).tolist()
+        self._id_arr = None
+        keys = np.load(path / "keys.npy", allow_pickle=False).tolist()
+        
+        columns = []
+        for key in keys:
+            column = np.load(path / f"{key}.npy", mmap_mode="r", allow_pickle=False)
+            if (path / f"{key}_vocab.npy").exists():
+                vocab = [None] + np.load(path / f"{key}_vocab.npy", allow_pickle=False).tolist()
+                columns.append((key, [vocab[code] for code in column.tolist()]))
+            else:
+                present = np.load(path / f"{key}_present.npy", allow_pickle=False).tolist()
+                columns.append((key, [
+                    value if has_value else None
+                    for value, has_value in zip(column.tolist(), present)
+                ]))
+        
+        self.metadata = [{} for _ in self.id_map]
+        for key, values in columns:
+            for meta, value in zip(self.metadata, values):
+                if value is not None:
+                    meta[key] = value
@@ -1,10 +1,14 @@
 """Generate synthetic menu data with EN/AR items, duplicates, and query labels."""
+import asyncio
+import hashlib
 import json
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import httpx
+import numpy as np
 import pandas as pd
 
 # Set seed for reproducibility
@@ -62,92 +66,151 @@ OUTLET_NAMES = [
 ]
 
 
-def generate_items(n=10000):
-    """Generate synthetic menu items."""
-    items = []
+# Title decorations and description templates (head, tail around the title)
+TITLE_PREFIXES = ["Special", "Deluxe", "Premium", "Classic", "Traditional"]
+TITLE_SUFFIXES = ["Combo", "Meal", "Platter", "Box", "Special"]
+DESCRIPTION_TEMPLATES = [
+    ("Delicious ", " prepared fresh daily"),
+    ("Our signature ", " with special spices"),
+    ("Authentic ", " made with quality ingredients"),
+    ("Popular ", " served hot and fresh"),
+]
+
+# Concurrent /ingest requests while loading seed data
+INGEST_CONCURRENCY = 8
+
+
+def _stable_id(name, modulo=10000):
+    """Deterministic outlet ID (hash() is salted per interpreter run)."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big") % modulo
+
+
+# Lookup tables as object arrays, built once so generate_items samples each
+# column with a single fancy-index
+_TITLES_EN = np.array([en for en, _ in FOOD_TEMPLATES], dtype=object)
+_TITLES_AR = np.array([ar for _, ar in FOOD_TEMPLATES], dtype=object)
+_PREFIX_ARR = np.array(TITLE_PREFIXES, dtype=object)
+_SUFFIX_ARR = np.array(TITLE_SUFFIXES, dtype=object)
+_DESC_HEADS = np.array([head for head, _ in DESCRIPTION_TEMPLATES], dtype=object)
+_DESC_TAILS = np.array([tail for _, tail in DESCRIPTION_TEMPLATES], dtype=object)
+_OUTLET_ARR = np.array(OUTLET_NAMES, dtype=object)
+_OUTLET_IDS = np.array([_stable_id(name) for name in OUTLET_NAMES])
+_CITY_ARR = np.array(CITIES, dtype=object)
+_CUISINE_ARR = np.array(CUISINES, dtype=object)
+_DIET_ARR = np.array(DIET_TAGS, dtype=object)
+
+
+def _sample_tags(rng, tags, counts):
+    """Sample counts[i] distinct tags per row (vectorized shuffles, one list per row)."""
+    picks = tags[rng.random((len(counts), len(tags))).argsort(axis=1)[:, :counts.max(initial=0)]]
+    return [row[:count].tolist() for row, count in zip(picks, counts)]
+
+
+def generate_items(n=10000, seed=42):
+    """
+    Generate synthetic menu items.
     
-    for i in range(n):
-        # Pick random base item
-        title_en, title_ar = random.choice(FOOD_TEMPLATES)
-        
-        # Add variations
-        if random.random() < 0.3:
-            prefixes = ["Special", "Deluxe", "Premium", "Classic", "Traditional"]
-            title_en = f"{random.choice(prefixes)} {title_en}"
-        
-        if random.random() < 0.2:
-            suffixes = ["Combo", "Meal", "Platter", "Box", "Special"]
-            title_en = f"{title_en} {random.choice(suffixes)}"
-        
-        # Generate description
-        descriptions = [
-            f"Delicious {title_en.lower()} prepared fresh daily",
-            f"Our signature {title_en.lower()} with special spices",
-            f"Authentic {title_en.lower()} made with quality ingredients",
-            f"Popular {title_en.lower()} served hot and fresh",
-        ]
-        description = random.choice(descriptions) if random.random() < 0.7 else None
-        
-        # Pick outlet and city
-        outlet_name = random.choice(OUTLET_NAMES)
-        city = random.choice(CITIES)
-        
-        # Generate coordinates (rough estimates)
-        lat = 20.0 + random.uniform(0, 20)
-        lon = 30.0 + random.uniform(0, 25)
-        
-        # Price
-        price = round(random.uniform(10, 150), 2)
-        
-        # Tags
-        cuisine_tags = random.sample(CUISINES, k=random.randint(1, 2))
-        diet_tags = random.sample(DIET_TAGS, k=random.randint(0, 2)) if random.random() < 0.5 else []
-        
-        item = {
-            "outlet_id": hash(outlet_name) % 10000,
-            "outlet_name": outlet_name,
-            "city": city,
-            "lat": lat,
-            "lon": lon,
-            "title_en": title_en,
-            "title_ar": title_ar,
-            "description": description,
-            "price": price,
-            "cuisine_tags": cuisine_tags,
-            "diet_tags": diet_tags,
-        }
-        
-        items.append(item)
+    Every column is drawn in bulk from one NumPy generator and the frame is
+    built straight from the arrays.
+    
+    Returns:
+        DataFrame with n items plus n // 10 near-duplicates
+    """
+    rng = np.random.default_rng(seed)
+    
+    # Pick random base items
+    templates = rng.integers(0, len(FOOD_TEMPLATES), size=n)
+    title_en = _TITLES_EN[templates]
+    title_ar = _TITLES_AR[templates]
+    
+    # Add variations
+    prefixes = _PREFIX_ARR[rng.integers(0, len(_PREFIX_ARR), n)]
+    title_en = np.where(rng.random(n) < 0.3, prefixes + " " + title_en, title_en)
+    suffixes = _SUFFIX_ARR[rng.integers(0, len(_SUFFIX_ARR), n)]
+    title_en = np.where(rng.random(n) < 0.2, title_en + " " + suffixes, title_en)
     
-    # Inject near-duplicates (10% of items)
+    # Generate description (70% of items)
+    template = rng.integers(0, len(DESCRIPTION_TEMPLATES), n)
+    lowered = np.asarray(pd.Series(title_en).str.lower(), dtype=object)
+    descriptions = _DESC_HEADS[template] + lowered + _DESC_TAILS[template]
+    description = np.where(rng.random(n) < 0.7, descriptions, None)
+    
+    # Pick outlet and city
+    outlets = rng.integers(0, len(_OUTLET_ARR), n)
+    
+    # Tags
+    cuisine_tags = _sample_tags(rng, _CUISINE_ARR, rng.integers(1, 3, n))
+    diet_counts = np.where(rng.random(n) < 0.5, rng.integers(0, 3, n), 0)
+    diet_tags = _sample_tags(rng, _DIET_ARR, diet_counts)
+    
+    df = pd.DataFrame({
+        "outlet_id": _OUTLET_IDS[outlets],
+        "outlet_name": _OUTLET_ARR[outlets],
+        "city": _CITY_ARR[rng.integers(0, len(_CITY_ARR), n)],
+        # Coordinates (rough estimates)
+        "lat": 20.0 + rng.uniform(0, 20, n),
+        "lon": 30.0 + rng.uniform(0, 25, n),
+        "title_en": title_en,
+        "title_ar": title_ar,
+        "description": pd.Series(description, dtype=object),  # None stays None
+        "price": np.round(rng.uniform(10, 150, n), 2),
+        "cuisine_tags": cuisine_tags,
+        "diet_tags": diet_tags,
+    })
+    
+    # Inject near-duplicates (10% of items) in one vectorized pass
     num_dupes = n // 10
-    for _ in range(num_dupes):
-        # Pick a random item to duplicate
-        original = random.choice(items)
-        
-        # Create slight variation
-        dupe = original.copy()
-        dupe["outlet_id"] = original["outlet_id"] + random.randint(1, 100)
-        dupe["outlet_name"] = original["outlet_name"] + " Branch"
-        
-        # Slight text variations
-        if random.random() < 0.5:
-            dupe["title_en"] = original["title_en"].replace("Chicken", "Grilled Chicken")
-        if random.random() < 0.3:
-            dupe["price"] = original["price"] + random.uniform(-5, 5)
-        
-        items.append(dupe)
+    dupes = df.iloc[rng.integers(0, n, num_dupes)].reset_index(drop=True)
+    dupes["outlet_id"] += rng.integers(1, 101, num_dupes)
+    dupes["outlet_name"] += " Branch"
     
-    return items
+    # Slight text and price variations
+    retitle = rng.random(num_dupes) < 0.5
+    dupes.loc[retitle, "title_en"] = dupes.loc[retitle, "title_en"].str.replace(
+        "Chicken", "Grilled Chicken", regex=False
+    )
+    reprice = rng.random(num_dupes) < 0.3
+    dupes.loc[reprice, "price"] += rng.uniform(-5, 5, int(reprice.sum()))
+    
+    return pd.concat([df, dupes], ignore_index=True)
+
+
+def _ids_by_title(items, field, lower=False):
+    """Group 1-based item IDs by distinct title, in ID order."""
+    groups = {}
+    for j, item in enumerate(items, start=1):
+        title = item[field]
+        if title:
+            groups.setdefault(title.lower() if lower else title, []).append(j)
+    return groups
+
+
+def _matching_ids(groups, needle, cache):
+    """IDs of items whose title contains needle, scanning distinct titles only."""
+    if needle not in cache:
+        matches = [ids for title, ids in groups.items() if needle in title]
+        cache[needle] = sorted(j for ids in matches for j in ids)
+    return cache[needle]
 
 
 def generate_queries(items, n=300):
-    """Generate search queries with relevance labels."""
+    """
+    Generate search queries with relevance labels.
+    
+    Relevance is still substring containment, but it is checked once per
+    distinct title (a few hundred) rather than per item, and repeated queries
+    reuse their labels.
+    """
     queries = []
     
     # Extract unique item titles
     titles = list(set([item["title_en"] for item in items]))
     
+    # Item IDs grouped by distinct title
+    en_groups = _ids_by_title(items, "title_en", lower=True)
+    ar_groups = _ids_by_title(items, "title_ar")
+    en_cache, ar_cache = {}, {}
+    
     for i in range(n):
         if i < n // 2:
             # Exact match queries
@@ -155,10 +218,7 @@ def generate_queries(items, n=300):
             query = target_title
             
             # Find relevant items
-            relevant_ids = [
-                j for j, item in enumerate(items, start=1)
-                if target_title.lower() in item["title_en"].lower()
-            ]
+            relevant_ids = _matching_ids(en_groups, target_title.lower(), en_cache)
         else:
             # Partial/keyword queries
             words = ["chicken", "shawarma", "burger", "pizza", "salad", "kebab",
@@ -168,17 +228,11 @@ def generate_queries(items, n=300):
             if random.random() < 0.3:
                 # Arabic query
                 query = random.choice(ar_words)
-                relevant_ids = [
-                    j for j, item in enumerate(items, start=1)
-                    if item["title_ar"] and query in item["title_ar"]
-                ]
+                relevant_ids = _matching_ids(ar_groups, query, ar_cache)
             else:
                 # English query
                 query = random.choice(words)
-                relevant_ids = [
-                    j for j, item in enumerate(items, start=1)
-                    if query.lower() in item["title_en"].lower()
-                ]
+                relevant_ids = _matching_ids(en_groups, query.lower(), en_cache)
         
         if relevant_ids:
             queries.append({
@@ -189,6 +243,49 @@ def generate_queries(items, n=300):
     return queries
 
 
+def resolve_relevant_ids(queries, items, key_to_id):
+    """
+    Map relevant_ids from 1-based positions in items to database item IDs.
+    
+    Batches are ingested concurrently, so serial item_ids don't follow list
+    order; items are matched on their (outlet_id, title_en) natural key.
+    Positions that share a key (the later item replaced the earlier one)
+    collapse to one ID.
+    """
+    resolved = []
+    for q in queries:
+        ids = []
+        for j in q["relevant_ids"]:
+            item = items[j - 1]
+            item_id = key_to_id.get((int(item["outlet_id"]), item["title_en"]))
+            if item_id is not None:
+                ids.append(item_id)
+        ids = list(dict.fromkeys(ids))
+        if ids:
+            resolved.append({"query": q["query"], "relevant_ids": ids})
+    return resolved
+
+
+async def load_batches(api_url, items, batch_size=100, concurrency=INGEST_CONCURRENCY):
+    """POST items to /ingest in batches, with up to `concurrency` requests in flight."""
+    n_batches = (len(items) + batch_size - 1) // batch_size
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def post_batch(client, batch_no, batch):
+        async with semaphore:
+            response = await client.post("/ingest", json={"items": batch})
+        if response.is_success:
+            print(f"  Loaded batch {batch_no}/{n_batches}")
+        else:
+            print(f"  ✗ Batch {batch_no} failed: {response.text}")
+    
+    async with httpx.AsyncClient(base_url=api_url, timeout=60.0) as client:
+        await asyncio.gather(*(
+            post_batch(client, i // batch_size + 1, items[i:i + batch_size])
+            for i in range(0, len(items), batch_size)
+        ))
+
+
 def main():
     """Generate and save data."""
     print("Generating synthetic menu data...")
@@ -199,19 +296,37 @@ def main():
     
     # Generate items
     print("Generating 10,000 menu items...")
-    items = generate_items(10000)
+    df = generate_items(10000)
+    items = df.to_dict("records")
     
-    # Save items to CSV
-    df = pd.DataFrame(items)
+    # Start ingest in the background (network-bound) while the files and
+    # queries below are written
+    api_url = os.getenv("API_URL", "http://localhost:8000")
+    executor = ThreadPoolExecutor(max_workers=1)
+    ingest = None
+    try:
+        response = httpx.get(f"{api_url}/health", timeout=5.0)
+        if response.status_code == 200:
+            print("Loading data via API in the background...")
+            ingest = executor.submit(asyncio.run, load_batches(api_url, items))
+    except Exception as e:
+        print(f"⚠ Could not reach API: {e}")
+    
+    # Save items to CSV (human-readable) and Parquet (typed; tag columns
+    # stay list<string>, floats keep full precision)
     items_path = output_dir / "items.csv"
-    df.to_csv(items_path, index=False)
+    df.to_csv(items_path, index=False, lineterminator="\n", chunksize=10000)
     print(f"✓ Items saved to {items_path}")
     
+    parquet_path = output_dir / "items.parquet"
+    df.to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+    print(f"✓ Items saved to {parquet_path}")
+    
     # Generate queries
     print("Generating 300 labeled queries...")
     queries = generate_queries(items, 300)
     
-    # Save queries
+    # Save queries (relevant_ids are 1-based positions in items.csv)
     queries_path = output_dir / "queries.json"
     with open(queries_path, 'w', encoding='utf-8') as f:
         json.dump(queries, f, ensure_ascii=False, indent=2)
@@ -228,30 +343,17 @@ def main():
         json.dump(labels, f, indent=2)
     print(f"✓ Labels saved to {labels_path}")
     
-    # Load data into API
-    print("\nLoading data via API...")
-    api_url = os.getenv("API_URL", "http://localhost:8000")
+    # Wait for the background ingest, then load query labels
+    if ingest is None:
+        print("⚠ API not healthy. Data generated but not loaded.")
+        executor.shutdown()
+        return
     
+    print("\nWaiting for API ingest to finish...")
     try:
-        # Test health
-        response = httpx.get(f"{api_url}/health", timeout=5.0)
-        if response.status_code != 200:
-            print("⚠ API not healthy. Data generated but not loaded.")
-            return
-        
-        # Ingest items in batches
-        batch_size = 100
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i+batch_size]
-            response = httpx.post(
-                f"{api_url}/ingest",
-                json={"items": batch},
-                timeout=60.0
-            )
-            if response.status_code == 200:
-                print(f"  Loaded batch {i//batch_size + 1}/{(len(items) + batch_size - 1)//batch_size}")
-            else:
-                print(f"  ✗ Batch {i//batch_size + 1} failed: {response.text}")
+        # Items were POSTed in batches, several in flight at once
+        ingest.result()
+        executor.shutdown()
         
         print("✓ All items loaded into API")
         
@@ -263,11 +365,20 @@ def main():
         engine = create_engine(db_url)
         
         with Session(engine) as db:
+            # Resolve label positions to the item_ids the ingest assigned
+            key_to_id = {
+                (outlet_id, title_en): item_id
+                for item_id, outlet_id, title_en in db.execute(
+                    text("SELECT item_id, outlet_id, title_en FROM items")
+                )
+            }
+            labels = resolve_relevant_ids(queries, items, key_to_id)
+            
             # Clear existing labels
             db.execute(text("DELETE FROM query_labels"))
             
             # Insert new labels
-            for q in queries:
+            for q in labels:
                 db.execute(
                     text("INSERT INTO query_labels (query, relevant_ids) VALUES (:query, :relevant_ids)"),
                     {"query": q["query"], "relevant_ids": q["relevant_ids"]}
@@ -275,8 +386,8 @@ def main():
             
             db.commit()
         
-        print(f"✓ {len(queries)} query labels loaded into database")
-        
+        print(f"✓ {len(labels)} query labels loaded into database")
+    
     except Exception as e:
         print(f"⚠ Could not load data via API: {e}")
         print("  Data files are saved and can be loaded manually.")
@@ -17,3 +17,23 @@ def enqueue_job(func, *args, **kwargs):
     """Enqueue a background job."""
     job = job_queue.enqueue(func, *args, **kwargs)
     return job.id
+
+
+def enqueue_many(func, args_list: list[tuple]) -> list[str]:
+    """
+    Enqueue one job per args tuple in a single Redis round trip.
+    
+    Args:
+        func: Job function
+        args_list: Positional args for each job, e.g. [(item_ids,), ...]
+    
+    Returns:
+        Job IDs, in args_list order
+    """
+    pipe = redis_conn.pipeline(transaction=False)
+    jobs = job_queue.enqueue_many(
+        [Queue.prepare_data(func, args=args) for args in args_list],
+        pipeline=pipe,
+    )
+    pipe.execute()
+    return [job.id for job in jobs]
@@ -0,0 +1,22 @@
+"""Shared pytest fixtures."""
+from pathlib import Path
+
+import pytest
+
+from src.core.tagging import LabelTagger
+
+# Label vocabulary used by the tagging tests
+CUISINE_LABELS = ["Lebanese", "Italian", "Indian", "Chinese"]
+DIET_LABELS = ["vegan", "spicy"]
+
+# Label embeddings persisted between runs (same file the API uses)
+LABEL_CACHE = Path("data/cache/label_embeddings.npz")
+
+
+@pytest.fixture(scope="session")
+def tagger():
+    """One LabelTagger per session, with the test label vocabulary encoded once."""
+    tagger = LabelTagger(cache_path=LABEL_CACHE)
+    tagger.set_labels("cuisine", CUISINE_LABELS)
+    tagger.set_labels("diet", DIET_LABELS)
+    return tagger
@@ -0,0 +1,34 @@
+"""Tests for the local demo API."""
+from fastapi.testclient import TestClient
+
+import app_simple
+from src.core.hybrid import combine_scores
+from src.core.item_store import ItemTable
+
+
+def test_search_hybrid_uses_requested_fusion(monkeypatch):
+    """Test that /api/search fuses hybrid results with the requested method."""
+    sparse_results = [("a", 10.0), ("b", 9.0), ("c", 0.0)]
+    dense_results = [("c", 1.0), ("b", 0.6), ("a", 0.5)]
+    
+    async def fake_encode_and_search(query_normalized, k, ef_search):
+        return dense_results, 0.0, 0.0
+    
+    monkeypatch.setattr(app_simple, "_sparse_search", lambda query: (sparse_results, 0.0))
+    monkeypatch.setattr(app_simple, "_encode_and_search", fake_encode_and_search)
+    monkeypatch.setattr(app_simple, "get_items_db", lambda: ItemTable.from_items({
+        item_id: {"title_en": item_id.upper(), "price": 1.0} for item_id in "abc"
+    }))
+    
+    client = TestClient(app_simple.app)
+    ids = {}
+    for fusion in ["minmax", "rrf"]:
+        response = client.post("/api/search", json={
+            "query": "chicken", "k": 3, "mode": "hybrid", "alpha": 0.5, "fusion": fusion,
+        })
+        assert response.status_code == 200
+        ids[fusion] = [result["item_id"] for result in response.json()["results"]]
+        expected = combine_scores(sparse_results, dense_results, alpha=0.5, k=3, fusion=fusion)
+        assert ids[fusion] == [item_id for item_id, _ in expected]
+    
+    assert ids["minmax"] != ids["rrf"]
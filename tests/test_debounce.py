@@ -0,0 +1,22 @@
+"""Tests for debounced background execution."""
+import time
+
+from src.core.debounce import Debouncer
+
+
+def test_debouncer_coalesces_rebuilds():
+    """Test that a burst of triggers causes a single background run."""
+    runs = []
+    debouncer = Debouncer(lambda: runs.append(1), delay_ms=50)
+    try:
+        versions = [debouncer.trigger() for _ in range(5)]
+        deadline = time.monotonic() + 5
+        while debouncer.version < versions[-1] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        debouncer.stop(timeout=5)
+    
+    assert versions == [1] * 5
+    assert runs == [1]
+    assert debouncer.version == 1
+    assert not debouncer.pending
@@ -2,7 +2,8 @@
 import numpy as np
 import pytest
 
-from src.core.dedup import deduplicate_items, UnionFind, evaluate_dedup_pairs
+from src.core import dedup
+from src.core.dedup import deduplicate_items, UnionFind, evaluate_dedup_pairs, similar_pairs
 
 
 def test_union_find():
@@ -98,5 +99,99 @@ def test_dedup_evaluation():
     assert metrics["false_negatives"] == 2
 
 
+@pytest.mark.parametrize("method", ["hamming", "ivf", "hnsw"])
+def test_similar_pairs_candidates_match_exact(monkeypatch, method):
+    """Test that candidate-based search finds the same near-duplicate pairs."""
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal((300, 32)).astype(np.float32)
+    noise = 0.01 * rng.standard_normal((300, 32)).astype(np.float32)
+    embeddings = np.vstack([base, base + noise])
+    
+    exact = set(zip(*(rows.tolist() for rows in similar_pairs(embeddings, 0.95))))
+    
+    monkeypatch.setattr(dedup, "EXACT_MAX_ITEMS", 0)
+    approx = set(zip(*(rows.tolist() for rows in similar_pairs(embeddings, 0.95, method))))
+    
+    assert exact == {(i, i + 300) for i in range(300)}
+    assert approx == exact
+
+
+def test_union_find_long_chain():
+    """Test that find handles chains deeper than the recursion limit."""
+    uf = UnionFind()
+    n = 5000
+    for i in range(n + 1):
+        uf.find(i)
+    
+    # Hand-build a chain 0 -> 1 -> ... -> n
+    uf.parent[:n] = np.arange(1, n + 1)
+    
+    assert uf.find(0) == n
+    assert all(uf.parent[:n] == uf.index[n])
+
+
+def test_union_find_union_many_matches_union():
+    """Test batched unions and capacity growth against one-at-a-time unions."""
+    rng = np.random.default_rng(3)
+    xs = [f"item_{i}" for i in rng.integers(0, 100, 150)]
+    ys = [f"item_{i}" for i in rng.integers(0, 100, 150)]
+    
+    single = UnionFind()
+    for x, y in zip(xs, ys):
+        single.union(x, y)
+    batched = UnionFind(n=4)
+    batched.union_many(xs, ys)
+    
+    expected = {frozenset(c) for c in _clusters_by_dict(xs, ys).values()}
+    assert {frozenset(c) for c in single.get_clusters().values()} == expected
+    assert {frozenset(c) for c in batched.get_clusters().values()} == expected
+    assert all(cluster_id in items for cluster_id, items in batched.get_clusters().items())
+
+
+def _clusters_by_dict(xs, ys):
+    """Reference clustering by repeated label merging."""
+    label = {}
+    for x, y in zip(xs, ys):
+        lx, ly = label.setdefault(x, x), label.setdefault(y, y)
+        if lx != ly:
+            for item, lab in label.items():
+                if lab == ly:
+                    label[item] = lx
+    clusters = {}
+    for item, lab in label.items():
+        clusters.setdefault(lab, []).append(item)
+    return clusters
+
+
+def test_deduplicate_items_matches_union_find():
+    """Test that the array-backed clustering matches dict UnionFind over the same pairs."""
+    rng = np.random.default_rng(1)
+    embeddings = rng.standard_normal((300, 8)).astype(np.float32)
+    item_ids = [f"item_{i}" for i in range(300)]
+    
+    clusters = deduplicate_items(item_ids, embeddings, sim_threshold=0.8)
+    
+    uf = UnionFind()
+    for i, j in zip(*similar_pairs(embeddings, 0.8)):
+        uf.union(item_ids[i], item_ids[j])
+    expected = {frozenset(items) for items in uf.get_clusters().values() if len(items) > 1}
+    
+    assert {frozenset(items) for items in clusters.values()} == expected
+    assert all(cluster_id in items for cluster_id, items in clusters.items())
+
+
+def test_dense_pairs_tiled_matches_full_matrix(monkeypatch):
+    """Test that row-tiled dense pairs equal the full upper-triangular scan."""
+    rng = np.random.default_rng(2)
+    embeddings = rng.standard_normal((700, 8)).astype(np.float32)
+    normed = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = set(zip(*(rows.tolist() for rows in np.nonzero(np.triu(normed @ normed.T >= 0.8, k=1)))))
+    
+    monkeypatch.setattr(dedup, "TILE_ROWS", 128)
+    tiled = set(zip(*(rows.tolist() for rows in similar_pairs(embeddings, 0.8))))
+    
+    assert tiled == expected
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,28 @@
+"""Tests for the query-encoding micro-batcher."""
+import asyncio
+
+import numpy as np
+
+from src.core.embed_batcher import EmbedBatcher
+
+
+def test_embed_batcher_coalesces_requests():
+    """Test that concurrent submits share a single encode call."""
+    calls = []
+    
+    def fake_encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+    
+    async def run():
+        batcher = EmbedBatcher(encode_fn=fake_encode, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(t) for t in ["a", "bb", "ccc"]))
+        finally:
+            await batcher.stop()
+    
+    vectors = asyncio.run(run())
+    
+    assert len(calls) == 1
+    assert [float(v[0]) for v in vectors] == [1.0, 2.0, 3.0]
@@ -1,7 +1,7 @@
 """Tests for evaluation metrics."""
 import pytest
 
-from src.core.eval import recall_at_k, mean_reciprocal_rank, precision_at_k, ndcg_at_k
+from src.core.eval import evaluate_search, per_query_metrics, recall_at_k, mean_reciprocal_rank, precision_at_k, ndcg_at_k
 
 
 def test_recall_at_k():
@@ -94,5 +94,41 @@ def test_empty_predictions():
     assert precision == 0.0
 
 
+def test_evaluate_search_matches_individual_metrics():
+    """Test that the single-pass evaluation matches the per-metric functions."""
+    predictions = [[1, 2, 3, 4, 5], [10, 11, 12], [20, 21], [7, 7, 8]]
+    ground_truth = [[1, 3, 6], [11, 13], [], [8, 9]]
+    
+    metrics = evaluate_search(predictions, ground_truth, ks=[1, 3])
+    
+    assert metrics["mrr"] == pytest.approx(mean_reciprocal_rank(predictions, ground_truth))
+    for k in (1, 3):
+        assert metrics[f"recall@{k}"] == pytest.approx(recall_at_k(predictions, ground_truth, k))
+        assert metrics[f"precision@{k}"] == pytest.approx(precision_at_k(predictions, ground_truth, k))
+        assert metrics[f"ndcg@{k}"] == pytest.approx(ndcg_at_k(predictions, ground_truth, k))
+
+
+def test_ndcg_beyond_discount_table():
+    """Test that k past the precomputed discount table gives the same NDCG."""
+    predictions = [[1, 2, 3, 4, 5]]
+    ground_truth = [[1, 3, 5]]
+    
+    assert ndcg_at_k(predictions, ground_truth, k=5000) == pytest.approx(ndcg_at_k(predictions, ground_truth, k=5))
+
+
+def test_per_query_metrics():
+    """Test per-query hit, first-hit rank, recall and precision."""
+    predictions = [[1, 2, 1, 3], [10, 11, 12, 13], [20]]
+    ground_truth = [[1, 3], [13], [99]]
+    
+    results = per_query_metrics(predictions, ground_truth, k=3)
+    
+    assert [r["hit"] for r in results] == [1, 0, 0]
+    assert [r["first_hit_rank"] for r in results] == [1, 4, None]
+    assert results[0]["recall"] == 0.5  # Repeated item counts once
+    assert results[0]["precision"] == pytest.approx(1 / 3)
+    assert results[1]["recall"] == 0.0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,28 @@
+"""Tests for the columnar item store."""
+import pyarrow as pa
+
+from src.core.item_store import ItemTable
+
+
+def test_item_table_parquet_round_trip(tmp_path):
+    """Test item lookup and column gathers on the Arrow-backed item store."""
+    items = {
+        "item_1": {"title_en": "Shawarma", "city": "Dubai", "price": 12.5},
+        "item_2": {"title_en": "Falafel", "price": None},
+    }
+    ItemTable.from_items(items).write_parquet(tmp_path / "items.parquet")
+    table = ItemTable.read_parquet(tmp_path / "items.parquet")
+    
+    assert len(table) == 2
+    assert table.table.schema.field("city").type == pa.dictionary(pa.uint16(), pa.string())
+    assert "item_2" in table and "item_3" not in table
+    assert table["item_1"]["title_en"] == "Shawarma"
+    
+    rows = table.rows(["item_2", "item_3", "item_1"])
+    assert rows.tolist() == [1, -1, 0]
+    
+    fields = table.take(rows[rows >= 0], ["title_en", "city", "price", "outlet_name"])
+    assert fields["title_en"] == ["Falafel", "Shawarma"]
+    assert fields["city"] == [None, "Dubai"]
+    assert fields["price"] == [None, 12.5]
+    assert fields["outlet_name"] == [None, None]
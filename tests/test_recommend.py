@@ -0,0 +1,106 @@
+"""Tests for content-based recommendations."""
+import numpy as np
+
+from src.core.recommend import ContentBasedRecommender
+
+
+def test_recommend_similar_items_matches_brute_force():
+    """Test that similar items match a brute-force cosine ranking."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((50, 16)).astype(np.float32)
+    item_ids = [f"item_{i}" for i in range(50)]
+    
+    recommender = ContentBasedRecommender()
+    recommender.set_items(item_ids, embeddings)
+    
+    results = recommender.recommend_similar_items("item_3", k=5)
+    
+    normed = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    sims = normed @ normed[3]
+    sims[3] = -np.inf
+    expected = [item_ids[i] for i in np.argsort(-sims)[:5]]
+    
+    assert [item_id for item_id, _ in results] == expected
+    assert "item_3" not in [item_id for item_id, _ in results]
+
+
+def test_recommend_for_user_excludes_interacted():
+    """Test that user recommendations skip already-interacted items."""
+    rng = np.random.default_rng(1)
+    embeddings = rng.standard_normal((20, 8)).astype(np.float32)
+    item_ids = list(range(20))
+    
+    recommender = ContentBasedRecommender()
+    recommender.set_items(item_ids, embeddings)
+    recommender.update_user_profile("u1", [0, 1])
+    
+    results = recommender.recommend_for_user("u1", k=5, exclude_items=[0, 1])
+    
+    assert len(results) == 5
+    assert not {0, 1} & {item_id for item_id, _ in results}
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_recommend_for_users_matches_single_user():
+    """Test that batched recommendations equal per-user calls."""
+    rng = np.random.default_rng(3)
+    embeddings = rng.standard_normal((30, 8)).astype(np.float32)
+    
+    recommender = ContentBasedRecommender()
+    recommender.set_items(list(range(30)), embeddings)
+    recommender.update_user_profile("u1", [0, 1, 2])
+    recommender.update_user_profile("u2", [5, 1])
+    exclude_map = {"u1": [0, 1, 2], "u2": [5]}
+    
+    batched = recommender.recommend_for_users(["u1", "u2", "new"], k=4, exclude_map=exclude_map)
+    
+    for user_id in ("u1", "u2", "new"):
+        single = recommender.recommend_for_user(user_id, k=4, exclude_items=exclude_map.get(user_id))
+        assert [item_id for item_id, _ in batched[user_id]] == [item_id for item_id, _ in single]
+        np.testing.assert_allclose(
+            [score for _, score in batched[user_id]],
+            [score for _, score in single],
+            rtol=1e-5,
+        )
+
+
+def test_popularity_vector_tracks_interactions():
+    """Test that the row-aligned popularity counts follow profile updates and catalog reloads."""
+    embeddings = np.eye(4, dtype=np.float32)
+    
+    recommender = ContentBasedRecommender()
+    recommender.set_items(["a", "b", "c", "d"], embeddings)
+    recommender.update_user_profile("u1", ["a", "b", "b", "zzz"])
+    recommender.update_user_profile("u2", ["b"])
+    
+    np.testing.assert_array_equal(recommender._pop_vec, [1, 3, 0, 0])
+    assert recommender._pop_max == 3
+    
+    recommender.set_items(["d", "b"], embeddings[:2])
+    np.testing.assert_array_equal(recommender._pop_vec, [0, 3])
+
+
+def test_set_items_memmap_float16(tmp_path):
+    """Test recommending from a read-only float16 memmap without copying it."""
+    rng = np.random.default_rng(2)
+    embeddings = rng.standard_normal((10, 8)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    
+    path = tmp_path / "embeddings.fp16"
+    writer = np.memmap(path, dtype=np.float16, mode="w+", shape=embeddings.shape)
+    writer[:] = embeddings
+    writer.flush()
+    
+    recommender = ContentBasedRecommender()
+    recommender.set_items(
+        np.arange(100, 110),
+        np.memmap(path, dtype=np.float16, mode="r", shape=embeddings.shape),
+        normalized=True,
+    )
+    
+    assert isinstance(recommender.item_embeddings, np.memmap)
+    results = recommender.recommend_similar_items(104, k=3)
+    assert len(results) == 3
+    assert all(isinstance(item_id, int) for item_id, _ in results)
+    assert 104 not in [item_id for item_id, _ in results]
@@ -1,10 +1,21 @@
 """Tests for search functionality."""
+import threading
+
+import numpy as np
 import pytest
 
-from src.core.normalize import normalize_text
-from src.core.embeddings import encode_texts, cosine_similarity
-from src.core.sparse import BM25Retriever
-from src.core.hybrid import combine_scores
+from src.core.normalize import AR_CHARS, AR_DIAC, normalize_cached, normalize_text
+from src.core.embeddings import (
+    batch_cosine_similarity,
+    cosine_similarity,
+    embedding_from_row,
+    embedding_to_bytes,
+    encode_texts,
+)
+from src.core.sparse import BM25Index, BM25Retriever
+from src.core.hybrid import combine_scores, hybrid_search
+from src.core.utils import merge_scores, min_max_normalize
+from src.core.vector_store.faiss_store import FAISSVectorStore
 
 
 def test_normalize_arabic():
@@ -26,6 +37,21 @@ def test_normalize_arabic():
     assert normalized == "ااا"
 
 
+def test_normalize_single_pass_matches_regex():
+    """Test that the fused translate table strips exactly the AR_DIAC ranges."""
+    text = "".join(chr(c) for c in range(0x0600, 0x0700)) + " Mixed ١٢ "
+    expected = " ".join(AR_DIAC.sub("", text.translate(AR_CHARS)).split()).lower()
+    assert normalize_text(text) == expected
+
+
+def test_normalize_cached_matches_normalize_text():
+    """Test that the memoized normalizer respects the diacritics flag."""
+    text = "  Shawarma  مَرْحَبًا ١٢ "
+    assert normalize_cached(text) == normalize_text(text)
+    assert normalize_cached(text, False) == normalize_text(text, remove_diacritics=False)
+    assert normalize_cached(text) != normalize_cached(text, False)
+
+
 def test_embeddings():
     """Test embedding generation."""
     texts = ["chicken shawarma", "شاورما دجاج", "pizza"]
@@ -39,6 +65,49 @@ def test_embeddings():
     assert 0 <= sim <= 1
 
 
+def test_embedding_bytes_round_trip():
+    """Test raw-bytes embeddings decode to the same vector as the fallback."""
+    vector = np.array([0.5, -1.25, 3.0], dtype=np.float32)
+    
+    decoded = embedding_from_row(embedding_to_bytes(vector))
+    
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, vector)
+    assert np.array_equal(embedding_from_row(None, vector.tolist()), vector)
+
+
+def test_batch_cosine_similarity_assume_normalized():
+    """Test that the normalized fast path matches full cosine similarity."""
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((5, 16)).astype(np.float32)
+    docs = rng.standard_normal((7, 16)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+    
+    fast = batch_cosine_similarity(queries, docs, assume_normalized=True)
+    
+    np.testing.assert_allclose(fast, batch_cosine_similarity(queries, docs), atol=1e-5)
+    
+    out = np.empty((5, 7), dtype=np.float32)
+    assert batch_cosine_similarity(queries, docs, assume_normalized=True, out=out) is out
+    np.testing.assert_array_equal(out, fast)
+
+
+def test_cosine_similarity_matrix_matches_pairwise():
+    """Test that 2D inputs score every pair like the 1D path."""
+    rng = np.random.default_rng(1)
+    a = rng.standard_normal((3, 8))
+    b = rng.standard_normal((4, 8))
+    
+    matrix = cosine_similarity(a, b)
+    
+    assert matrix.shape == (3, 4)
+    for i in range(3):
+        for j in range(4):
+            assert matrix[i, j] == pytest.approx(cosine_similarity(a[i], b[j]), abs=1e-6)
+    assert cosine_similarity(a[0], b).shape == (1, 4)
+
+
 def test_sparse_retrieval():
     """Test BM25 sparse retrieval."""
     corpus = [
@@ -59,6 +128,152 @@ def test_sparse_retrieval():
     assert results[0][0] in [1, 3]  # Should return chicken items
 
 
+def test_bm25_index_matches_retriever(tmp_path):
+    """Test that the mmap-backed BM25 index reproduces BM25Okapi scores."""
+    corpus = [
+        "chicken shawarma wrap",
+        "beef kebab plate",
+        "chicken tikka masala",
+        "pizza margherita",
+        "falafel wrap",
+        "beef burger",
+    ]
+    ids = [1, 2, 3, 4, 5, 6]
+    
+    retriever = BM25Retriever()
+    retriever.fit(corpus, ids)
+    
+    BM25Index.from_retriever(retriever).save(tmp_path)
+    index = BM25Index.load(tmp_path)
+    
+    for query in ["chicken", "beef wrap", "unknown"]:
+        expected = dict(zip(ids, retriever.bm25.get_scores(query.split())))
+        for results in (index.search(query, k=6), retriever.search(query, k=6)):
+            for item_id, score in results:
+                assert score == pytest.approx(expected[item_id], rel=1e-5)
+
+
+def test_bm25_flat_tokens_match_doc_freqs():
+    """Test that postings built from flat term IDs match rank_bm25's dicts."""
+    corpus = ["chicken chicken wrap", "beef wrap", "", "wrap beef beef beef"]
+    
+    retriever = BM25Retriever()
+    retriever.fit(corpus, [1, 2, 3, 4])
+    assert retriever.tokenized_corpus == [doc.split() for doc in corpus]
+    
+    flat = BM25Index.from_retriever(retriever)
+    
+    # Simulate a retriever pickled before the flat layout
+    legacy = BM25Retriever()
+    legacy.__dict__ = {"bm25": retriever.bm25, "corpus_ids": [1, 2, 3, 4]}
+    dicts = BM25Index.from_retriever(legacy)
+    
+    assert flat.term_index == dicts.term_index
+    for name in ("indptr", "indices", "data", "idf", "doc_lens"):
+        np.testing.assert_array_equal(getattr(flat, name), getattr(dicts, name))
+
+
+@pytest.mark.parametrize("index_type", ["Flat", "HNSW", "IVFFlat", "IVFSQ", "IVFSQ8", "SQ8"])
+def test_faiss_store_returns_similarities(index_type):
+    """Test that FAISS search scores are cosine similarities, best first."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    
+    store = FAISSVectorStore(dimension=16, index_type=index_type)
+    store.add(list(range(200)), vectors)
+    
+    results = store.search(vectors[7], k=5, ef_search=200)
+    scores = [score for _, score in results]
+    
+    assert results[0][0] == 7
+    assert scores[0] == pytest.approx(1.0, abs=1e-2)
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_faiss_nprobe_follows_loaded_index_type(tmp_path):
+    """Test that nprobe is chosen from the loaded index, not the configured type."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((400, 16)).astype(np.float32)
+    
+    built = FAISSVectorStore(dimension=16, index_type="IVFFlat")
+    built.add(list(range(400)), vectors)
+    built.save(str(tmp_path / "index.idx"))
+    
+    store = FAISSVectorStore(dimension=16, index_type="IVFPQ")
+    store.load(str(tmp_path / "index.idx"))
+    store.id_map = list(range(400))
+    store.search(vectors[0], k=5, ef_search=4)
+    
+    assert store._ivf().nprobe == 4
+
+
+def test_faiss_batch_search_matches_search():
+    """Test that batched queries return the same hits as one-by-one search."""
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((100, 16)).astype(np.float32)
+    
+    store = FAISSVectorStore(dimension=16, index_type="Flat")
+    store.add(list(range(100)), vectors)
+    
+    batched = store.batch_search(vectors[:5], k=3)
+    assert len(batched) == 5
+    for query, results in zip(vectors[:5], batched):
+        single = store.search(query, k=3)
+        assert [i for i, _ in results] == [i for i, _ in single]
+        assert [s for _, s in results] == pytest.approx([s for _, s in single], abs=1e-5)
+
+
+def test_faiss_search_drops_padding_and_tracks_id_map():
+    """Test that -1 padded hits are dropped and new IDs are picked up."""
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    
+    store = FAISSVectorStore(dimension=16, index_type="IVFFlat")
+    store.add([f"item_{i}" for i in range(200)], vectors)
+    
+    # One probed list holds fewer than k vectors, so FAISS pads with -1
+    results = store.search(vectors[0], k=200, ef_search=1)
+    assert 0 < len(results) < 200
+    assert results[0][0] == "item_0"
+    
+    store.id_map = [f"new_{i}" for i in range(200)]
+    assert store.search(vectors[0], k=1)[0][0] == "new_0"
+
+
+def test_faiss_metadata_round_trip(tmp_path):
+    """Test that id_map and metadata survive the .npy round trip."""
+    store = FAISSVectorStore(dimension=4, index_type="Flat")
+    store.id_map = ["item_1", "item_2", "item_3"]
+    store.metadata = [{"city": "Dubai"}, {}, {"city": "Cairo"}]
+    store.save_metadata(tmp_path)
+    
+    loaded = FAISSVectorStore(dimension=4, index_type="Flat")
+    loaded.load_metadata(tmp_path)
+    
+    assert loaded.id_map == store.id_map
+    assert loaded.metadata == store.metadata
+    
+    # Int IDs and non-string fields keep their types
+    store.id_map = [10, 2**40, 3]
+    store.metadata = [
+        {"city": "Dubai", "price": 12.5, "stock": 3, "vegan": True},
+        {"stock": 0},
+        {"city": "Cairo", "price": 8.0, "vegan": False},
+    ]
+    store.save_metadata(tmp_path / "typed")
+    loaded.load_metadata(tmp_path / "typed")
+    
+    assert loaded.id_map == store.id_map
+    assert loaded.metadata == store.metadata
+    assert [type(v) for v in loaded.metadata[0].values()] == [str, float, int, bool]
+    
+    # Mixed value types are rejected instead of stringified
+    store.metadata = [{"price": 1}, {"price": "1.5"}, {}]
+    with pytest.raises(ValueError, match="price"):
+        store.save_metadata(tmp_path / "mixed")
+    assert not (tmp_path / "mixed").exists()
+
+
 def test_hybrid_scoring():
     """Test hybrid score combination."""
     sparse_results = [(1, 10.0), (2, 5.0), (3, 2.0)]
@@ -77,6 +292,59 @@ def test_hybrid_scoring():
     assert len(combined) == 4
 
 
+def test_hybrid_rrf_fusion():
+    """Test Reciprocal Rank Fusion scores from ranks alone."""
+    sparse_results = [(1, 10.0), (2, 5.0), (3, 2.0)]
+    dense_results = [(2, 0.9), (1, 0.7), (4, 0.5)]
+    
+    combined = dict(combine_scores(sparse_results, dense_results, alpha=0.5, fusion="rrf", rrf_k=60))
+    assert combined[1] == pytest.approx(0.5 / 61 + 0.5 / 62)
+    assert combined[3] == pytest.approx(0.5 / 63)
+    
+    # Rescaling one retriever's scores leaves the fusion unchanged
+    scaled = [(id_, score * 100) for id_, score in dense_results]
+    assert combine_scores(sparse_results, scaled, fusion="rrf") == combine_scores(
+        sparse_results, dense_results, fusion="rrf"
+    )
+    
+    with pytest.raises(ValueError):
+        combine_scores(sparse_results, dense_results, fusion="mean")
+
+
+def test_hybrid_search_runs_retrievers_concurrently():
+    """Test that hybrid_search overlaps the two retrievers and normalizes the query once."""
+    # Both searches must be in flight at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    
+    class BlockingRetriever:
+        def __init__(self, results):
+            self.results = results
+            self.queries = []
+        
+        def search(self, query, k=10):
+            self.queries.append(query)
+            barrier.wait()
+            return self.results
+    
+    sparse = BlockingRetriever([(1, 2.0), (2, 1.0)])
+    dense = BlockingRetriever([(2, 0.9), (3, 0.5)])
+    
+    results = hybrid_search("  Chicken  أرز ", sparse, dense, k=2, alpha=0.5)
+    
+    assert sparse.queries == dense.queries == ["chicken ارز"]
+    assert {item_id for item_id, _ in results} == {1, 2}
+
+
+def test_min_max_normalize_and_merge():
+    """Test vectorized min-max scaling and weighted list merging."""
+    np.testing.assert_allclose(min_max_normalize([2.0, 4.0, 3.0]), [0.0, 1.0, 0.5])
+    np.testing.assert_array_equal(min_max_normalize([5.0, 5.0]), [1.0, 1.0])
+    assert min_max_normalize([]).size == 0
+    
+    merged = merge_scores([[("a", 1.0), ("b", 0.0)], [("b", 2.0), ("c", 1.0)]], [0.5, 0.5])
+    assert merged == [("a", 0.5), ("b", 0.5), ("c", 0.0)]
+
+
 def test_arabic_vs_english_search():
     """Test that dense search improves Arabic queries."""
     # This is a placeholder - would need actual data
@@ -1,17 +1,12 @@
 """Tests for tagging functionality."""
+import numpy as np
 import pytest
 
 from src.core.tagging import LabelTagger, evaluate_tagging
 
 
-def test_label_assignment():
+def test_label_assignment(tagger):
     """Test label assignment with threshold."""
-    tagger = LabelTagger()
-    
-    # Set labels
-    tagger.set_labels("cuisine", ["Lebanese", "Italian", "Indian"])
-    tagger.set_labels("diet", ["vegan", "spicy"])
-    
     # Tag item
     text = "Delicious chicken shawarma with spicy sauce"
     results = tagger.assign_all_groups(text, top_n=2, threshold=0.3)
@@ -20,11 +15,8 @@ def test_label_assignment():
     assert "diet" in results
 
 
-def test_tagging_threshold():
+def test_tagging_threshold(tagger):
     """Test that threshold filters labels."""
-    tagger = LabelTagger()
-    tagger.set_labels("cuisine", ["Lebanese", "Chinese"])
-    
     text = "Lebanese hummus plate"
     
     # Low threshold
@@ -37,6 +29,121 @@ def test_tagging_threshold():
     assert len(results_high) <= len(results_low)
 
 
+def test_score_labels_top_n():
+    """Test scoring a precomputed embedding against cached label embeddings."""
+    tagger = LabelTagger()
+    tagger.set_label_embeddings("cuisine", ["Lebanese", "Italian", "Indian"], np.eye(3))
+    tagger.set_label_embeddings("diet", ["vegan", "spicy"], np.eye(3)[[2, 0]])
+    
+    text_embedding = np.array([0.6, 0.8, 0.0], dtype=np.float32)
+    
+    results = tagger.score_labels(text_embedding, "cuisine", top_n=1, threshold=0.1)
+    assert [label for label, _ in results] == ["Italian"]
+    
+    results = tagger.score_labels(text_embedding, "cuisine", top_n=5, threshold=0.1)
+    assert [label for label, _ in results] == ["Italian", "Lebanese"]
+    assert results[0][1] == pytest.approx(0.8, abs=1e-3)
+    
+    all_groups = tagger.assign_all_groups("", top_n=5, threshold=0.1, text_embedding=text_embedding)
+    assert all_groups["cuisine"] == results
+    assert [label for label, _ in all_groups["diet"]] == ["spicy"]
+    
+    # Replacing a group keeps the other group's rows
+    tagger.set_label_embeddings("cuisine", ["Indian"], np.eye(3)[[2]])
+    assert tagger.score_labels(text_embedding, "diet", top_n=5, threshold=0.1) == all_groups["diet"]
+    assert tagger.score_labels(text_embedding, "cuisine", top_n=5, threshold=0.1) == []
+
+
+def test_assign_batch_matches_single():
+    """Test batch tagging against per-text scoring."""
+    tagger = LabelTagger()
+    tagger.set_label_embeddings("cuisine", ["Lebanese", "Italian", "Indian"], np.eye(3))
+    tagger.set_label_embeddings("diet", ["vegan", "spicy"], np.eye(3)[[2, 0]])
+    
+    text_embeddings = np.array([
+        [0.6, 0.8, 0.0],
+        [0.0, 0.0, 2.0],
+        [-1.0, 0.0, 0.0],
+    ], dtype=np.float32)
+    texts = ["a", "b", "c"]
+    
+    batch = tagger.assign_labels_batch(texts, "cuisine", top_n=2, threshold=0.1, text_embeddings=text_embeddings)
+    assert batch == [
+        tagger.score_labels(emb, "cuisine", top_n=2, threshold=0.1) for emb in text_embeddings
+    ]
+    assert batch[2] == []
+    
+    all_batch = tagger.assign_all_groups_batch(texts, top_n=2, threshold=0.1, text_embeddings=text_embeddings)
+    assert all_batch == [
+        tagger.assign_all_groups(text, top_n=2, threshold=0.1, text_embedding=emb)
+        for text, emb in zip(texts, text_embeddings)
+    ]
+
+
+def test_set_labels_encodes_each_label_once(monkeypatch):
+    """Test that set_labels defers encoding and only encodes unseen labels."""
+    encoded = []
+    
+    def fake_encode(texts, normalize=True, batch_size=32):
+        encoded.append(list(texts))
+        return np.eye(4, dtype=np.float32)[[len(text) % 4 for text in texts]]
+    
+    monkeypatch.setattr("src.core.tagging.encode_texts", fake_encode)
+    tagger = LabelTagger()
+    tagger.set_labels("cuisine", ["Lebanese", "Thai"])
+    tagger.set_labels("diet", ["Thai", "vegan", "vegan"])
+    assert encoded == []
+    
+    # First use encodes both groups' labels in one pass
+    tagger.score_labels(np.ones(4), "diet", top_n=5, threshold=0.0)
+    assert encoded == [["Lebanese", "Thai", "vegan"]]
+    assert tagger.label_names.tolist() == ["Lebanese", "Thai", "Thai", "vegan", "vegan"]
+    np.testing.assert_array_equal(tagger.label_matrix[1], tagger.label_matrix[2])
+    
+    # Setting a group again only encodes the new label
+    tagger.set_labels("cuisine", ["Thai", "Indian"])
+    tagger.assign_all_groups("", top_n=1, threshold=0.0, text_embedding=np.ones(4))
+    assert encoded[1:] == [["Indian"]]
+    assert tagger.label_names.tolist() == ["Thai", "Indian", "Thai", "vegan", "vegan"]
+
+
+def test_label_cache_persists_across_taggers(monkeypatch, tmp_path):
+    """Test that a second tagger reuses label embeddings saved to disk."""
+    encoded = []
+    
+    def fake_encode(texts, normalize=True, batch_size=32):
+        encoded.append(list(texts))
+        return np.eye(4, dtype=np.float32)[[len(text) % 4 for text in texts]]
+    
+    monkeypatch.setattr("src.core.tagging.encode_texts", fake_encode)
+    cache_path = tmp_path / "labels.npz"
+    
+    first = LabelTagger(cache_path=cache_path)
+    first.set_labels("cuisine", ["Lebanese", "Thai"])
+    first.score_labels(np.ones(4), "cuisine")
+    
+    second = LabelTagger(cache_path=cache_path)
+    second.set_labels("cuisine", ["Thai", "Lebanese", "Indian"])
+    second.score_labels(np.ones(4), "cuisine")
+    
+    assert encoded == [["Lebanese", "Thai"], ["Indian"]]
+    np.testing.assert_array_equal(second.label_matrix[1], first.label_matrix[0])
+    
+    # A cache written by another encoder is ignored
+    monkeypatch.setattr("src.core.tagging.ENCODER_KEY", "other-model|")
+    third = LabelTagger(cache_path=cache_path)
+    third.set_labels("cuisine", ["Thai"])
+    third.score_labels(np.ones(4), "cuisine")
+    assert encoded[-1] == ["Thai"]
+    
+    # An unwritable cache location only costs the save
+    (tmp_path / "not_a_dir").write_text("")
+    fourth = LabelTagger(cache_path=tmp_path / "not_a_dir" / "labels.npz")
+    fourth.set_labels("cuisine", ["Thai"])
+    assert len(fourth.score_labels(np.ones(4), "cuisine")) == 1
+    assert list(tmp_path.glob("*.npz")) == [cache_path]
+
+
 def test_tagging_evaluation():
     """Test tagging evaluation metrics."""
     predictions = [
@@ -59,5 +166,23 @@ def test_tagging_evaluation():
     assert 0 <= metrics["f1"] <= 1
 
 
+def test_tagging_evaluation_empty_rows():
+    """Test per-sample scores with empty predictions or ground truth."""
+    predictions = [["a", "b"], [], ["c"], []]
+    ground_truth = [["a"], [], [], ["x"]]
+    
+    metrics = evaluate_tagging(predictions, ground_truth)
+    
+    # Rows: (0.5, 1, 2/3), both empty (1, 1, 1), then two zero rows
+    assert metrics["precision"] == pytest.approx(1.5 / 4)
+    assert metrics["recall"] == pytest.approx(2 / 4)
+    assert metrics["f1"] == pytest.approx((2 / 3 + 1) / 4)
+    
+    # Pooled: tp=1, fp=2 (b, c), fn=1 (x)
+    assert metrics["micro_precision"] == pytest.approx(1 / 3)
+    assert metrics["micro_recall"] == pytest.approx(1 / 2)
+    assert metrics["micro_f1"] == pytest.approx(2 / 5)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,30 @@
+"""Tests for heap top-k selection."""
+import numpy as np
+
+from src.core.topk import topk, topk_above
+
+
+def test_topk_matches_stable_sort():
+    """Test heap top-k against a stable descending sort, including ties."""
+    rng = np.random.default_rng(0)
+    scores = np.round(rng.random(500), 1)
+    
+    for k in [0, 1, 10, 500, 600]:
+        expected = np.argsort(-scores, kind="stable")[:k]
+        assert topk(scores, k).tolist() == expected.tolist()
+
+
+def test_topk_above_matches_filtered_sort():
+    """Test thresholded top-k against filtering then a stable sort."""
+    rng = np.random.default_rng(1)
+    scores = np.round(rng.random(200), 1).astype(np.float32)
+    
+    for k in [0, 1, 5, 200]:
+        for threshold in [0.0, 0.55, 1.1]:
+            order = np.argsort(-scores, kind="stable")
+            expected = order[scores[order] >= threshold][:k]
+            assert topk_above(scores, k, threshold).tolist() == expected.tolist()
+    
+    # NaN scores never pass the threshold
+    scores[[3, 7]] = np.nan
+    assert not np.isin([3, 7], topk_above(scores, 200, 0.0)).any()
@@ -1,12 +1,85 @@
 """Streamlit demo UI for Menu Intelligence Suite (Local Version)."""
 import streamlit as st
 import pandas as pd
-import requests
-import json
+import httpx
+import orjson
 
 # Point to local API (will start it if needed)
 API_URL = "http://127.0.0.1:8080"
 
+# Repeated searches/tag requests (Streamlit reruns the script on every
+# widget change) are served from Streamlit's cache instead of re-encoding
+CACHE_TTL = 300
+CACHE_ENTRIES = 1024
+
+# The health probe runs on every rerun; reuse its answer briefly, and give
+# up quickly when the API is down
+HEALTH_TTL = 10
+HEALTH_TIMEOUT = 0.5
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Get the shared keep-alive HTTP client (one connection pool for all reruns)."""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+    )
+
+
+class APIError(Exception):
+    """Non-success response from the API (message is the response body)."""
+
+
+def _json(response: httpx.Response) -> dict:
+    """Decode a successful response (orjson), raising APIError otherwise."""
+    if response.status_code != 200:
+        raise APIError(response.text)
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=HEALTH_TTL, show_spinner=False)
+def api_health() -> dict | None:
+    """GET /health (None if the API is unreachable; cached like a response)."""
+    try:
+        return _json(get_http_client().get("/health", timeout=HEALTH_TIMEOUT))
+    except httpx.HTTPError:
+        return None
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_search(query: str, k: int, mode: str, alpha: float, normalize_arabic: bool) -> dict:
+    """POST /api/search."""
+    response = get_http_client().post(
+        "/api/search",
+        json={
+            "query": query,
+            "k": k,
+            "mode": mode,
+            "alpha": alpha,
+            "normalize_arabic": normalize_arabic
+        },
+        timeout=30
+    )
+    return _json(response)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def api_tag(text: str, top_n: int, threshold: float) -> dict:
+    """POST /api/tag."""
+    response = get_http_client().post(
+        "/api/tag",
+        json={
+            "text": text,
+            "top_n": top_n,
+            "threshold": threshold
+        },
+        timeout=10
+    )
+    return _json(response)
+
+
 st.set_page_config(
     page_title="Menu Intelligence Suite",
     page_icon="🍽",
@@ -18,14 +91,13 @@ st.markdown("**Multilingual semantic search for food delivery (Local Demo)**")
 
 # Check API health
 try:
-    health_response = requests.get(f"{API_URL}/health", timeout=2)
-    if health_response.status_code == 200:
-        health_data = health_response.json()
+    health_data = api_health()
+    if health_data is not None:
         st.sidebar.success(f"✓ API Connected | {health_data['vector_store_count']} vectors")
     else:
-        st.sidebar.error("API not responding")
-except:
-    st.sidebar.warning("⚠ API not running. Start with: python -c \"from app_simple import app; import uvicorn; uvicorn.run(app, host='127.0.0.1', port=8080)\"")
+        st.sidebar.warning("⚠ API not running. Start with: python -c \"from app_simple import app; import uvicorn; uvicorn.run(app, host='127.0.0.1', port=8080)\"")
+except APIError:
+    st.sidebar.error("API not responding")
 
 # Sidebar controls
 st.sidebar.header("Configuration")
@@ -78,64 +150,51 @@ with tab1:
         else:
             try:
                 with st.spinner("Searching..."):
-                    response = requests.post(
-                        f"{API_URL}/api/search",
-                        json={
-                            "query": query,
-                            "k": k,
-                            "mode": mode,
-                            "alpha": alpha,
-                            "normalize_arabic": normalize_arabic
+                    data = api_search(query, k, mode, alpha, normalize_arabic)
+                
+                results = data.get("results", [])
+                timings = data.get("timings", {})
+                
+                if results:
+                    st.success(f"Found {len(results)} results in {timings.get('total_ms', 0):.1f}ms")
+                    
+                    # Display results as table
+                    df = pd.DataFrame(results)
+                    
+                    # Reorder columns
+                    display_cols = ['title_en', 'title_ar', 'outlet_name', 'city', 'price', 'score']
+                    display_cols = [c for c in display_cols if c in df.columns]
+                    
+                    # Raw floats are formatted by Streamlit (and stay numerically sortable)
+                    st.dataframe(
+                        df[display_cols],
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={
+                            "score": st.column_config.NumberColumn(format="%.3f"),
+                            "price": st.column_config.NumberColumn(format="$%.2f"),
                         },
-                        timeout=30
                     )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get("results", [])
-                    timings = data.get("timings", {})
                     
-                    if results:
-                        st.success(f"Found {len(results)} results in {timings.get('total_ms', 0):.1f}ms")
-                        
-                        # Display results as table
-                        df = pd.DataFrame(results)
-                        
-                        # Format columns
-                        if 'score' in df.columns:
-                            df['score'] = df['score'].apply(lambda x: f"{x:.3f}")
-                        if 'price' in df.columns:
-                            df['price'] = df['price'].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "N/A")
-                        
-                        # Reorder columns
-                        display_cols = ['title_en', 'title_ar', 'outlet_name', 'city', 'price', 'score']
-                        display_cols = [c for c in display_cols if c in df.columns]
-                        
-                        st.dataframe(
-                            df[display_cols],
-                            use_container_width=True,
-                            hide_index=True
-                        )
-                        
-                        # Show timing breakdown
-                        with st.expander("⏱️ Performance Details"):
-                            col1, col2, col3, col4 = st.columns(4)
-                            if timings.get('encode_ms'):
-                                col1.metric("Encoding", f"{timings['encode_ms']:.1f}ms")
-                            if timings.get('sparse_ms'):
-                                col2.metric("Sparse", f"{timings['sparse_ms']:.1f}ms")
-                            if timings.get('dense_ms'):
-                                col3.metric("Dense", f"{timings['dense_ms']:.1f}ms")
-                            if timings.get('hybrid_ms'):
-                                col4.metric("Hybrid", f"{timings['hybrid_ms']:.1f}ms")
-                    else:
-                        st.info("No results found. Try a different query.")
+                    # Show timing breakdown
+                    with st.expander("⏱️ Performance Details"):
+                        col1, col2, col3, col4 = st.columns(4)
+                        if timings.get('encode_ms'):
+                            col1.metric("Encoding", f"{timings['encode_ms']:.1f}ms")
+                        if timings.get('sparse_ms'):
+                            col2.metric("Sparse", f"{timings['sparse_ms']:.1f}ms")
+                        if timings.get('dense_ms'):
+                            col3.metric("Dense", f"{timings['dense_ms']:.1f}ms")
+                        if timings.get('hybrid_ms'):
+                            col4.metric("Hybrid", f"{timings['hybrid_ms']:.1f}ms")
                 else:
-                    st.error(f"Search failed: {response.text}")
+                    st.info("No results found. Try a different query.")
             
-            except requests.exceptions.Timeout:
+            except APIError as e:
+                st.error(f"Search failed: {e}")
+            except httpx.TimeoutException:
                 st.error("Request timed out. The API might be processing...")
-            except requests.exceptions.ConnectionError:
+            except httpx.ConnectError:
                 st.error("Cannot connect to API. Make sure it's running on port 8080.")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -163,41 +222,33 @@ with tab2:
         else:
             try:
                 with st.spinner("Analyzing..."):
-                    response = requests.post(
-                        f"{API_URL}/api/tag",
-                        json={
-                            "text": text_input,
-                            "top_n": top_n,
-                            "threshold": threshold
-                        },
-                        timeout=10
-                    )
+                    data = api_tag(text_input, top_n, threshold)
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("Cuisine Labels")
-                        cuisine = data.get("cuisine", [])
-                        if cuisine:
-                            for tag in cuisine:
-                                st.write(f"**{tag['label']}** - {tag['score']:.2f}")
-                        else:
-                            st.info("No cuisine labels above threshold")
-                    
-                    with col2:
-                        st.subheader("Diet Labels")
-                        diet = data.get("diet", [])
-                        if diet:
-                            for tag in diet:
-                                st.write(f"**{tag['label']}** - {tag['score']:.2f}")
-                        else:
-                            st.info("No diet labels above threshold")
-                else:
-                    st.error(f"Tagging failed: {response.text}")
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.subheader("Cuisine Labels")
+                    cuisine = data.get("cuisine", [])
+                    if cuisine:
+                        # One Markdown element for all labels (one paragraph each)
+                        st.markdown("\n\n".join(
+                            f"**{tag['label']}** - {tag['score']:.2f}" for tag in cuisine
+                        ))
+                    else:
+                        st.info("No cuisine labels above threshold")
+                
+                with col2:
+                    st.subheader("Diet Labels")
+                    diet = data.get("diet", [])
+                    if diet:
+                        st.markdown("\n\n".join(
+                            f"**{tag['label']}** - {tag['score']:.2f}" for tag in diet
+                        ))
+                    else:
+                        st.info("No diet labels above threshold")
             
+            except APIError as e:
+                st.error(f"Tagging failed: {e}")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
 
@@ -231,8 +282,9 @@ with tab3:
     
     ### Performance
     
-    - First query: ~3s (includes model loading)
-    - Subsequent queries: <100ms
+    - API startup: ~3s (loads the model, indexes and label embeddings, so
+      the first query pays no cold start)
+    - Queries: <100ms
     - Vector similarity: Cosine distance on normalized embeddings
     """)
     